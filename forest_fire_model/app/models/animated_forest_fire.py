@@ -1,22 +1,24 @@
-import numpy as np
+import io
 import os
+import shutil
 import matplotlib.pyplot as plt
 import matplotlib.colors as colors
 import matplotlib.animation as animation
-from .forest_fire_automaton import ForestFireAutomaton
+from .vectorized_automaton import VectorizedForestFireAutomaton
 from .land_cover import LandCoverType
-from .cell import CellState
 from app.models.wind import WindDirection
 from .fuzzy_logic import FuzzyFireController
+from .pipeline import FramePipeline
 
-class AnimatedForestFire(ForestFireAutomaton):
+class AnimatedForestFire(VectorizedForestFireAutomaton):
     def __init__(self, land_cover_file: str,
                  fuzzy_controller: FuzzyFireController, 
                  wind_direction: WindDirection = WindDirection.N, 
                  wind_speed: float = 0.0,
                  humidity: float = 50.0,
                  temperature: float = 15.0,
-                 output_dir: str = 'frames'):
+                 output_dir: str = 'frames',
+                 seed=None):
         """
         Инициализация анимированной модели лесного пожара.
         
@@ -25,9 +27,10 @@ class AnimatedForestFire(ForestFireAutomaton):
             wind_direction (WindDirection): Направление ветра (по умолчанию - север).
             wind_speed (float): Скорость ветра (по умолчанию 0.0 м/с).
             humidity (float): Влажность воздуха (по умолчанию 50.0%).
+            seed: Зерно генератора случайных чисел (по умолчанию None).
         """
-        # Инициализация родительского класса ForestFireAutomaton
-        super().__init__(land_cover_file, fuzzy_controller, wind_direction, wind_speed, humidity, temperature)
+        # Инициализация родительского класса VectorizedForestFireAutomaton
+        super().__init__(land_cover_file, fuzzy_controller, wind_direction, wind_speed, humidity, temperature, seed=seed)
         self.current_frame = 0
         self.max_frames = 0 
         
@@ -40,6 +43,7 @@ class AnimatedForestFire(ForestFireAutomaton):
         os.makedirs(self.output_dir, exist_ok=True)
         # Инициализация переменных для анимации
         self.animation = None
+        self._last_frame_file = None
     
     def setup_visualization(self):
         """
@@ -51,7 +55,6 @@ class AnimatedForestFire(ForestFireAutomaton):
         self.norm = colors.BoundaryNorm(self.bounds, len(self.cmap.colors))
         
         # Инициализация числового представления сетки
-        self.grid_numeric = np.zeros((self.height, self.width))
         self._update_grid_numeric()  # Заполнение сетки начальными значениями
         
         # Создание изображения на оси
@@ -66,19 +69,7 @@ class AnimatedForestFire(ForestFireAutomaton):
         """
         Обновляет числовое представление сетки на основе текущего состояния клеток.
         """
-        for y in range(self.height):
-            for x in range(self.width):
-                cell = self.grid[y][x]
-                if cell.state == CellState.FOREST:
-                    self.grid_numeric[y][x] = cell.land_type
-                elif cell.state == CellState.IGNITION:
-                    self.grid_numeric[y][x] = LandCoverType.IGNITION.value
-                elif cell.state == CellState.FIRE:
-                    self.grid_numeric[y][x] = LandCoverType.FIRE.value
-                elif cell.state == CellState.BURNING_OUT:
-                    self.grid_numeric[y][x] = LandCoverType.BURNING_OUT.value
-                elif cell.state == CellState.ASH:
-                    self.grid_numeric[y][x] = LandCoverType.ASH.value
+        self.grid_numeric = self.get_grid_numeric()
 
     def update_frame(self, frame):
         """
@@ -99,47 +90,134 @@ class AnimatedForestFire(ForestFireAutomaton):
         if (self.current_frame % 10 == 0):
             print(f"Текущий кадр: {self.current_frame}")
         
+        frame_filename = os.path.join(self.output_dir, f"frame_{frame:04d}.png")
+        if self._last_frame_file is not None and self.is_extinct():
+            # Пожар погас: кадр не меняется, повторяем сохраненный без моделирования и отрисовки
+            shutil.copyfile(self._last_frame_file, frame_filename)
+            return [self.img]
+        
+        metrics = self.metrics
+        metrics.begin_step(self.step_count + 1)
+        
         # Обновление состояния модели
-        self.update()
+        with metrics.phase('update'):
+            self.update()
         
         # Обновление числового представления сетки
-        self._update_grid_numeric()
+        with metrics.phase('grid_numeric'):
+            self._update_grid_numeric()
         
         # Обновление изображения
-        self.img.set_array(self.grid_numeric)
+        with metrics.phase('set_array'):
+            self.img.set_array(self.grid_numeric)
         
         # Обновление заголовка
         # self.ax.set_title(f"Wind: {self.wind_direction.name} {self.wind_speed}m/s, Humidity: {self.humidity}%, Temp: {self.temperature}°C")
-        frame_filename = os.path.join(self.output_dir, f"frame_{frame:04d}.png")
-        self.fig.savefig(frame_filename, bbox_inches='tight', pad_inches=0, transparent=True)
+        with metrics.phase('savefig'):
+            self.fig.savefig(frame_filename, bbox_inches='tight', pad_inches=0, transparent=True)
+        self._last_frame_file = frame_filename
+        metrics.end_step()
         
         return [self.img]
     
-    def animate(self, frames=50, interval=200):
+    def animate(self, frames=50, interval=200, stop_when_extinct=False):
         """
         Создает и запускает анимацию.
         
+        Кадры после того, как пожар погас, повторяют последний сохраненный
+        кадр без моделирования и отрисовки.
+        
         Args:
             frames (int): Количество кадров анимации (по умолчанию 50).
             interval (int): Интервал между кадрами в миллисекундах (по умолчанию 200).
+            stop_when_extinct (bool): Завершить анимацию, когда пожар погас (по умолчанию False).
             
         Returns:
             animation.FuncAnimation: Объект анимации.
         """
         self.current_frame = 0
         self.max_frames = frames
+        self._last_frame_file = None
         # Остановка предыдущей анимации, если она существует
         if hasattr(self, 'animation') and self.animation is not None:
             self.animation.event_source.stop()
         
-        # Создание новой анимации
+        # Создание новой анимации; при stop_when_extinct кадры выдаются, пока горит пожар
+        extra = dict(frames=self._frame_numbers(frames), save_count=frames) if stop_when_extinct else dict(frames=frames)
         self.animation = animation.FuncAnimation(
             self.fig, 
             self.update_frame, 
-            frames=frames,
             interval=interval,
             blit=True,  # Оптимизация для анимации
-            repeat=False
+            repeat=False,
+            **extra
         )
         
-        return self.animation
\ No newline at end of file
+        return self.animation
+    
+    def _frame_numbers(self, frames):
+        """
+        Номера кадров до тех пор, пока пожар не погаснет.
+        """
+        for frame in range(frames):
+            if frame > 0 and self.is_extinct():
+                print(f"Пожар погас на кадре {frame}")
+                return
+            yield frame
+    
+    def save_frames(self, frames=50, stop_when_extinct=False, queue_size=4):
+        """
+        Моделирует и сохраняет кадры PNG в output_dir без FuncAnimation,
+        выполняя отрисовку и запись файлов в фоновых потоках.
+        
+        Автомат передает в ограниченную очередь снимки состояния (uint8);
+        фигура matplotlib используется только потоком отрисовки. Файлы
+        совпадают с кадрами update_frame, порядок кадров сохраняется.
+        
+        Args:
+            frames (int): Количество кадров (по умолчанию 50).
+            stop_when_extinct (bool): Завершить, когда пожар погас (по умолчанию False).
+            queue_size (int): Размер очередей конвейера в кадрах (по умолчанию 4).
+            
+        Returns:
+            int: Число выполненных шагов моделирования.
+        """
+        last = [None, None]
+        
+        def render(item):
+            frame, state = item
+            # Повтор снимка (пожар погас) не отрисовывается заново
+            if state is not last[0]:
+                self.grid_numeric = self.get_grid_numeric(state)
+                self.img.set_array(self.grid_numeric)
+                buffer = io.BytesIO()
+                self.fig.savefig(buffer, format='png', bbox_inches='tight', pad_inches=0, transparent=True)
+                last[:] = state, buffer.getvalue()
+            return frame, last[1]
+        
+        def write(item):
+            frame, data = item
+            with open(os.path.join(self.output_dir, f"frame_{frame:04d}.png"), 'wb') as f:
+                f.write(data)
+        
+        metrics = self.metrics
+        with FramePipeline([render, write], queue_size=queue_size, names=['render', 'write']) as pipeline:
+            for frame in range(frames):
+                if (frame + 1) % 10 == 0:
+                    print(f"Текущий кадр: {frame + 1}")
+                metrics.begin_step(self.step_count + 1)
+                with metrics.phase('update'):
+                    self.update()
+                state = self.state.copy()
+                with metrics.phase('submit'):
+                    pipeline.submit((frame, state))
+                metrics.end_step()
+                
+                if frame + 1 < frames and self.is_extinct():
+                    print(f"Пожар погас на кадре {frame + 1}")
+                    if not stop_when_extinct:
+                        # Кадр не меняется: повторяем снимок без моделирования
+                        for rest in range(frame + 1, frames):
+                            pipeline.submit((rest, state))
+                    return frame + 1
+        return frames
@@ -0,0 +1,217 @@
+import json
+import os
+from typing import Optional
+import numpy as np
+
+from .cell import CellState
+from .cell_grid import land_cover_codes
+from .forest_fire_automaton import ForestFireAutomaton
+from .video_renderer import build_palette
+
+# Состояния пожара, для которых записывается шаг перехода (по каналу на состояние)
+FIRE_STATES = (CellState.IGNITION, CellState.FIRE, CellState.BURNING_OUT, CellState.ASH)
+
+# Значение канала для клеток, не достигших состояния
+NOT_REACHED = -1
+
+
+class ArrivalTimes:
+    """
+    Шаги перехода клеток в состояния пожара.
+
+    Канал k содержит шаг, на котором клетка перешла в состояние FIRE_STATES[k]
+    (NOT_REACHED - не переходила). Каналы int16 занимают 8 байт на клетку для
+    всего прогона и позволяют восстановить любой кадр без повторного моделирования.
+
+    Клетка, подожженная через ignite() без следующего состояния, на первом шаге
+    возвращается в FOREST и может загореться снова от соседей. Каналы хранят
+    последнее загорание, а прерванные загорания хранятся отдельно в reverted.
+
+    Атрибуты:
+        bands (np.ndarray): Шаги переходов формы (4, строки, столбцы), int16.
+        reverted (np.ndarray): Прерванные загорания формы (k, 3): плоский индекс
+            клетки, шаг загорания и шаг возврата в FOREST.
+        land_type (np.ndarray): Карта растительности (нужна для восстановления кадров).
+        step_count (int): Последний записанный шаг.
+        profile (dict): Профиль rasterio исходной карты (привязка, проекция).
+    """
+    def __init__(self, bands: np.ndarray, land_type: Optional[np.ndarray] = None,
+                 step_count: int = 0, profile: Optional[dict] = None,
+                 reverted: Optional[np.ndarray] = None):
+        self.bands = bands
+        self.reverted = np.empty((0, 3), dtype=np.int64) if reverted is None else reverted
+        self.land_type = land_type
+        self.step_count = step_count
+        self.profile = profile
+
+    @classmethod
+    def load(cls, file_path: str) -> 'ArrivalTimes':
+        """
+        Читает шаги переходов из файла NPZ или GeoTIFF (по расширению).
+
+        Args:
+            file_path (str): Путь к файлу.
+
+        Returns:
+            ArrivalTimes: Шаги переходов.
+        """
+        if _is_geotiff(file_path):
+            import rasterio
+
+            with rasterio.open(file_path) as src:
+                tags = src.tags()
+                reverted = np.array(json.loads(tags.get('reverted', '[]')), dtype=np.int64).reshape(-1, 3)
+                return cls(src.read().astype(np.int16), None,
+                           int(tags.get('step_count', 0)), src.profile, reverted)
+        with np.load(file_path) as data:
+            meta = json.loads(str(data['meta']))
+            land_type = data['land_type'] if 'land_type' in data else None
+            return cls(data['bands'], land_type, meta['step_count'], reverted=data['reverted'])
+
+    def save(self, file_path: str):
+        """
+        Сохраняет шаги переходов в сжатый файл NPZ (вместе с картой растительности)
+        или в четырехканальный GeoTIFF int16 с привязкой исходной карты.
+
+        Args:
+            file_path (str): Путь к файлу (.npz, .tif или .tiff).
+        """
+        if not _is_geotiff(file_path):
+            arrays = dict(bands=self.bands, reverted=self.reverted)
+            if self.land_type is not None:
+                arrays['land_type'] = self.land_type
+            meta = {'step_count': self.step_count, 'states': [state.name for state in FIRE_STATES]}
+            np.savez_compressed(file_path, meta=np.array(json.dumps(meta)), **arrays)
+            return
+
+        import rasterio
+
+        profile = dict(self.profile or {})
+        profile.update(driver='GTiff', count=len(FIRE_STATES), dtype='int16', nodata=NOT_REACHED,
+                       height=self.bands.shape[1], width=self.bands.shape[2], compress='deflate')
+        # Параметры блочной структуры исходного файла могут не подходить к новому типу данных
+        for key in ('blockxsize', 'blockysize', 'tiled', 'interleave', 'photometric'):
+            profile.pop(key, None)
+        with rasterio.open(file_path, 'w', **profile) as dst:
+            dst.write(self.bands)
+            for band, state in enumerate(FIRE_STATES, start=1):
+                dst.set_band_description(band, state.name)
+            dst.update_tags(step_count=self.step_count, reverted=json.dumps(self.reverted.tolist()))
+
+    def state_at(self, step: int) -> np.ndarray:
+        """
+        Восстанавливает состояние клеток после шага step.
+
+        Args:
+            step (int): Номер шага.
+
+        Returns:
+            np.ndarray: Состояния клеток (значения CellState), uint8.
+        """
+        state = np.full(self.bands.shape[1:], CellState.FOREST.value, dtype=np.uint8)
+        # Каналы идут в порядке переходов: более позднее состояние перекрывает раннее
+        for band, cell_state in zip(self.bands, FIRE_STATES):
+            state[(band != NOT_REACHED) & (band <= step)] = cell_state.value
+        cells, ignited, extinguished = self.reverted.T
+        active = (ignited <= step) & (step < extinguished)
+        state.ravel()[cells[active]] = CellState.IGNITION.value
+        return state
+
+    def frame(self, step: int, land_type: Optional[np.ndarray] = None, scale: int = 1) -> np.ndarray:
+        """
+        Восстанавливает кадр RGB после шага step в цветах VideoRenderer.
+
+        Args:
+            step (int): Номер шага.
+            land_type (np.ndarray): Карта растительности (по умолчанию - сохраненная).
+            scale (int): Целочисленный коэффициент увеличения кадра (по умолчанию 1).
+
+        Returns:
+            np.ndarray: Кадр (строки * scale, столбцы * scale, 3) uint8.
+        """
+        land_type = self.land_type if land_type is None else land_type
+        if land_type is None:
+            raise ValueError("Для восстановления кадра нужна карта растительности")
+        state = self.state_at(step)
+        image = np.take(build_palette(), land_cover_codes(state, land_type).astype(np.uint8), axis=0)
+        if scale > 1:
+            image = image.repeat(scale, axis=0).repeat(scale, axis=1)
+        return image
+
+
+class ArrivalTimeRecorder:
+    """
+    Записывает шаги переходов клеток автомата в состояния пожара.
+
+    После каждого шага проверяются только клетки, горевшие до или после
+    шага: остальные клетки за шаг не меняют состояние.
+    """
+    def __init__(self, automaton: ForestFireAutomaton, profile: Optional[dict] = None):
+        """
+        Args:
+            automaton (ForestFireAutomaton): Автомат; текущее состояние записывается сразу.
+            profile (dict): Профиль rasterio карты (по умолчанию читается из файла
+                карты растительности автомата, если он известен).
+        """
+        self.automaton = automaton
+        if profile is None and automaton.land_cover_file is not None:
+            import rasterio
+
+            with rasterio.open(automaton.land_cover_file) as src:
+                profile = src.profile
+        bands = np.full((len(FIRE_STATES),) + automaton.state.shape, NOT_REACHED, dtype=np.int16)
+        self.arrival_times = ArrivalTimes(bands, automaton.land_type, automaton.step_count, profile)
+        self._front = np.empty(0, dtype=np.int64)
+        self.record()
+
+    def record(self):
+        """
+        Записывает переходы, произошедшие на последнем шаге автомата.
+        """
+        step = self.automaton.step_count
+        if step > np.iinfo(np.int16).max:
+            raise OverflowError(f"Шаг {step} не помещается в канал int16")
+
+        front = self.automaton.burning_indices()
+        cells = np.union1d(self._front, front)
+        self._front = front
+        self.arrival_times.step_count = step
+        if not cells.size:
+            return
+
+        state = self.automaton.state.ravel()[cells]
+        bands = self.arrival_times.bands.reshape(len(FIRE_STATES), -1)
+
+        # Загорание прервано: клетка вернулась в FOREST и может загореться снова
+        reverted = cells[(state == CellState.FOREST.value) & (bands[0, cells] != NOT_REACHED)]
+        if reverted.size:
+            rows = np.column_stack([reverted, bands[0, reverted], np.full(reverted.size, step)])
+            self.arrival_times.reverted = np.concatenate([self.arrival_times.reverted, rows.astype(np.int64)])
+            bands[:, reverted] = NOT_REACHED
+
+        for band, cell_state in zip(self.arrival_times.bands, FIRE_STATES):
+            reached = cells[state == cell_state.value]
+            band = band.ravel()
+            band[reached[band[reached] == NOT_REACHED]] = step
+
+    def run(self, steps: int, stop_when_extinct: bool = True) -> ArrivalTimes:
+        """
+        Выполняет steps шагов автомата, записывая переходы после каждого.
+
+        Args:
+            steps (int): Количество шагов.
+            stop_when_extinct (bool): Остановиться, когда пожар погас (по умолчанию True).
+
+        Returns:
+            ArrivalTimes: Шаги переходов.
+        """
+        for _ in range(steps):
+            if stop_when_extinct and self.automaton.is_extinct():
+                break
+            self.automaton.update()
+            self.record()
+        return self.arrival_times
+
+
+def _is_geotiff(file_path: str) -> bool:
+    return os.path.splitext(file_path)[1].lower() in ('.tif', '.tiff')
@@ -0,0 +1,188 @@
+import importlib
+import importlib.util
+import warnings
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from .cell import CellState
+from .wind import WindDirection
+from .forest_fire_automaton import INITIAL_FIRE_DURATION
+
+# Реализация по умолчанию
+DEFAULT_BACKEND = 'numpy'
+
+
+class Backend:
+    """
+    Реализация шага автомата, выбираемая по имени.
+
+    Класс автомата импортируется только при первом использовании, поэтому
+    необязательные зависимости не нужны, пока реализация не выбрана.
+
+    Атрибуты:
+        name (str): Имя реализации.
+        module (str): Модуль пакета моделей с классом автомата.
+        class_name (str): Имя класса автомата.
+        requires (tuple): Необязательные пакеты, без которых реализация недоступна.
+        fallback (str): Реализация, используемая вместо недоступной (None - ошибка).
+        description (str): Описание.
+    """
+    def __init__(self, name: str, module: str, class_name: str,
+                 requires: Sequence[str] = (), fallback: Optional[str] = None,
+                 description: str = ''):
+        self.name = name
+        self.module = module
+        self.class_name = class_name
+        self.requires = tuple(requires)
+        self.fallback = fallback
+        self.description = description
+
+    def available(self) -> bool:
+        """
+        Проверяет, установлены ли необязательные пакеты реализации.
+        """
+        return all(importlib.util.find_spec(package) is not None for package in self.requires)
+
+    def load(self) -> type:
+        """
+        Импортирует и возвращает класс автомата.
+        """
+        module = importlib.import_module(f'.{self.module}', __package__)
+        return getattr(module, self.class_name)
+
+
+BACKENDS: Dict[str, Backend] = {}
+
+
+def register_backend(backend: Backend):
+    """
+    Регистрирует реализацию шага автомата (заменяет реализацию с тем же именем).
+    """
+    BACKENDS[backend.name] = backend
+
+
+register_backend(Backend('reference', 'forest_fire_automaton', 'ForestFireAutomaton',
+                         description="Эталонная реализация: обход клеток в цикле Python"))
+register_backend(Backend('numpy', 'vectorized_automaton', 'VectorizedForestFireAutomaton',
+                         description="Операции над массивами NumPy по фронту пожара"))
+register_backend(Backend('numba', 'numba_automaton', 'NumbaForestFireAutomaton',
+                         requires=('numba',), fallback='numpy',
+                         description="Обход фронта ядрами, скомпилированными Numba"))
+
+
+def resolve_backend(name: str = DEFAULT_BACKEND) -> Backend:
+    """
+    Возвращает реализацию по имени; вместо недоступной реализации - ее замену
+    (с предупреждением).
+
+    Args:
+        name (str): Имя реализации.
+
+    Returns:
+        Backend: Доступная реализация.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Неизвестная реализация: {name} (доступны: {', '.join(BACKENDS)})")
+    backend = BACKENDS[name]
+    while not backend.available():
+        missing = ', '.join(package for package in backend.requires
+                            if importlib.util.find_spec(package) is None)
+        if backend.fallback is None:
+            raise ImportError(f"Для реализации {backend.name} требуются пакеты: {missing}")
+        warnings.warn(f"Реализация {backend.name} недоступна (нет пакетов: {missing}), "
+                      f"используется {backend.fallback}", RuntimeWarning, stacklevel=2)
+        backend = BACKENDS[backend.fallback]
+    return backend
+
+
+def available_backends() -> List[str]:
+    """
+    Возвращает имена реализаций, для которых установлены все зависимости.
+    """
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+
+def create_automaton(land_cover_file, fuzzy_controller, backend: str = DEFAULT_BACKEND, **kwargs):
+    """
+    Создает автомат выбранной реализации.
+
+    Args:
+        land_cover_file (str | np.ndarray): Путь к карте растительности или сама карта.
+        fuzzy_controller: FuzzyFireController или его скомпилированная форма.
+        backend (str): Имя реализации (по умолчанию DEFAULT_BACKEND).
+        **kwargs: Погода, зерно и прочие параметры автомата.
+
+    Returns:
+        ForestFireAutomaton: Автомат.
+    """
+    return resolve_backend(backend).load()(land_cover_file, fuzzy_controller, **kwargs)
+
+
+def check_conformance(land_cover: np.ndarray, fuzzy_controller,
+                      steps: int = 30,
+                      seed=0,
+                      ignition_points: Optional[List[Tuple[int, int]]] = None,
+                      backends: Optional[Sequence[str]] = None,
+                      height_map: Optional[np.ndarray] = None,
+                      cell_size=1.0,
+                      grid_edits: Optional[List[Tuple[int, int, int, CellState]]] = None,
+                      wind_direction: WindDirection = WindDirection.N,
+                      wind_speed: float = 5.0,
+                      humidity: float = 40.0,
+                      temperature: float = 20.0) -> Dict[str, Optional[bool]]:
+    """
+    Проверяет, что реализации дают одинаковую сетку при одном зерне.
+
+    Каждая реализация выполняет steps шагов одного сценария; состояния и
+    счетчики горения сравниваются с первой реализацией списка (по умолчанию -
+    эталонной). Все реализации получают скомпилированную форму контроллера,
+    поэтому сравниваются правила автомата, а не способы нечеткого вывода.
+
+    Args:
+        land_cover (np.ndarray): Карта растительности.
+        fuzzy_controller: FuzzyFireController или его скомпилированная форма.
+        steps (int): Количество шагов.
+        seed: Зерно генератора случайных чисел.
+        ignition_points (list): Точки возгорания (x, y) (по умолчанию - центр карты).
+        backends (list): Имена проверяемых реализаций (по умолчанию - все).
+        height_map (np.ndarray): Рельеф (None - ровная местность).
+        cell_size (float | tuple): Размер клетки рельефа в метрах (один или по X и по Y).
+        grid_edits (list): Изменения состояния клеток через grid[y][x] в виде
+            (шаг, x, y, состояние): применяются перед шагом с этим номером.
+        wind_direction, wind_speed, humidity, temperature: Параметры погоды.
+
+    Returns:
+        dict: Для каждой реализации True (совпадает), False (различается)
+            или None (недоступна).
+    """
+    backends = list(BACKENDS) if backends is None else list(backends)
+    if ignition_points is None:
+        height, width = land_cover.shape
+        ignition_points = [(width // 2, height // 2)]
+    compile_controller = getattr(fuzzy_controller, 'compile', None)
+    controller = compile_controller() if compile_controller is not None else fuzzy_controller
+
+    results = {}
+    expected = None
+    for name in backends:
+        backend = BACKENDS[name]
+        if not backend.available():
+            results[name] = None
+            continue
+        automaton = backend.load()(land_cover, controller, wind_direction, wind_speed,
+                                   humidity, temperature, seed=seed)
+        if height_map is not None:
+            automaton.set_height_map(height_map, cell_size)
+        for x, y in ignition_points:
+            automaton.ignite(x, y, INITIAL_FIRE_DURATION)
+        for step in range(steps):
+            for edit_step, x, y, cell_state in grid_edits or ():
+                if edit_step == step:
+                    automaton.grid[y][x].state = cell_state
+            automaton.update()
+
+        grid = (automaton.state.copy(), automaton.fire_duration.copy())
+        if expected is None:
+            expected = grid
+        results[name] = all(np.array_equal(a, b) for a, b in zip(grid, expected))
+    return results
@@ -0,0 +1,347 @@
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import multiprocessing as mp
+from typing import Dict, List, Optional
+import numpy as np
+
+from .fuzzy_logic import FuzzyFireController, load_compiled_controller
+from .forest_fire_automaton import ForestFireAutomaton, INITIAL_FIRE_DURATION
+from .vectorized_automaton import VectorizedForestFireAutomaton
+from .video_renderer import FFmpegWriter, FrameRenderer
+from .wind import WindDirection
+
+# Размеры синтетических карт по умолчанию
+DEFAULT_SIZES = (100, 500, 1000, 2000, 5000)
+
+# Погода, при которой пожар устойчиво распространяется
+BENCHMARK_WEATHER = dict(wind_direction=WindDirection.NE, wind_speed=8.0, humidity=20.0, temperature=30.0)
+
+# Каталог проекта (содержит пакет app): из него запускается замер холодного старта
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def synthetic_land_cover(size: int, seed: int = 0) -> np.ndarray:
+    """
+    Создает синтетическую карту растительности со всеми 17 типами LandCoverType.
+
+    Типы распределены пятнами: сглаженное случайное поле делится по квантилям
+    на 17 примерно равных по площади классов.
+
+    Args:
+        size (int): Размер стороны квадратной карты.
+        seed (int): Зерно генератора (по умолчанию 0).
+
+    Returns:
+        np.ndarray: Карта (size, size) uint8 со значениями 1-17.
+    """
+    from scipy import ndimage
+
+    rng = np.random.default_rng(seed)
+    coarse = rng.random((max(size // 16, 2), max(size // 16, 2)))
+    field = ndimage.zoom(coarse, size / coarse.shape[0], order=1)[:size, :size]
+    field += rng.random(field.shape) * 0.05  # Неровные границы пятен
+    quantiles = np.quantile(field, np.linspace(0, 1, 18)[1:-1])
+    return (np.digitize(field, quantiles) + 1).astype(np.uint8)
+
+
+def _metric(value: float, unit: str, higher_is_better: bool = True) -> dict:
+    return {'value': float(value), 'unit': unit, 'higher_is_better': higher_is_better}
+
+
+def _peak_rss_mb() -> float:
+    """
+    Пиковый объем резидентной памяти текущего процесса в МБ.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux возвращает килобайты, macOS - байты
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _ignite_center(automaton: ForestFireAutomaton):
+    center_y, center_x = automaton.height // 2, automaton.width // 2
+    for y in range(center_y - 2, center_y + 3):
+        for x in range(center_x - 2, center_x + 3):
+            automaton.ignite(x, y, INITIAL_FIRE_DURATION)
+
+
+def benchmark_fuzzy(fuzzy_controller: FuzzyFireController, evaluations: int = 20000,
+                    step_evaluations: int = 1000000, scalar_evaluations: int = 200,
+                    seed: int = 0) -> Dict[str, dict]:
+    """
+    Измеряет скорость нечеткого вывода: поэлементного (skfuzzy) и скомпилированного.
+
+    Скомпилированный вывод замеряется на произвольных входах (худший случай) и
+    на входах, как на шаге автомата: при постоянной погоде различаются только
+    число горящих соседей и коэффициент направления ветра.
+
+    Args:
+        fuzzy_controller (FuzzyFireController): Нечеткий контроллер.
+        evaluations (int): Количество произвольных точек для скомпилированного вывода.
+        step_evaluations (int): Количество точек шага автомата для скомпилированного вывода.
+        scalar_evaluations (int): Количество вызовов compute_fire_probability.
+        seed (int): Зерно генератора входных данных.
+
+    Returns:
+        dict: Метрики.
+    """
+    rng = np.random.default_rng(seed)
+    wind = rng.uniform(-30, 30, evaluations)
+    humidity = rng.uniform(0, 100, evaluations)
+    neighbors = rng.integers(1, 9, evaluations)
+    temperature = rng.uniform(-20, 50, evaluations)
+
+    start = time.perf_counter()
+    compiled = fuzzy_controller.compile()
+    compile_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled.compute(wind, humidity, neighbors, temperature)
+    compiled_seconds = time.perf_counter() - start
+
+    step_wind = BENCHMARK_WEATHER['wind_speed'] * rng.choice([1.0, 0.0, -0.6], step_evaluations)
+    step_neighbors = rng.integers(1, 9, step_evaluations)
+    start = time.perf_counter()
+    compiled.compute(step_wind, BENCHMARK_WEATHER['humidity'], step_neighbors, BENCHMARK_WEATHER['temperature'])
+    step_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(scalar_evaluations):
+        fuzzy_controller.compute_fire_probability(wind[i], humidity[i], neighbors[i], temperature[i])
+    scalar_seconds = time.perf_counter() - start
+
+    return {
+        'fuzzy.compile_seconds': _metric(compile_seconds, 's', higher_is_better=False),
+        'fuzzy.compiled_evals_per_sec': _metric(evaluations / compiled_seconds, 'evals/s'),
+        'fuzzy.compiled_step_evals_per_sec': _metric(step_evaluations / step_seconds, 'evals/s'),
+        'fuzzy.scalar_evals_per_sec': _metric(scalar_evaluations / scalar_seconds, 'evals/s'),
+    }
+
+
+def benchmark_automaton(automaton: ForestFireAutomaton, steps: int, prefix: str) -> Dict[str, dict]:
+    """
+    Измеряет скорость шагов автомата с очагом в центре карты.
+
+    Args:
+        automaton (ForestFireAutomaton): Автомат (без очагов).
+        steps (int): Количество шагов.
+        prefix (str): Префикс названий метрик.
+
+    Returns:
+        dict: Метрики.
+    """
+    _ignite_center(automaton)
+    start = time.perf_counter()
+    for _ in range(steps):
+        automaton.update()
+    seconds = time.perf_counter() - start
+    return {
+        f'{prefix}.steps_per_sec': _metric(steps / seconds, 'steps/s'),
+        f'{prefix}.cells_per_sec': _metric(steps * automaton.width * automaton.height / seconds, 'cells/s'),
+    }
+
+
+def benchmark_rendering(automaton: ForestFireAutomaton, frames: int, prefix: str,
+                        ffmpeg_path: Optional[str] = 'ffmpeg') -> Dict[str, dict]:
+    """
+    Измеряет скорость построения кадров RGB и их кодирования ffmpeg.
+
+    Кодирование пропускается, если ffmpeg недоступен.
+
+    Args:
+        automaton (ForestFireAutomaton): Автомат с текущим состоянием.
+        frames (int): Количество кадров.
+        prefix (str): Префикс названий метрик.
+        ffmpeg_path (str): Путь к ffmpeg (None - не измерять кодирование).
+
+    Returns:
+        dict: Метрики.
+    """
+    renderer = FrameRenderer(automaton)
+    start = time.perf_counter()
+    for _ in range(frames):
+        renderer.render()
+    results = {f'{prefix}.render_fps': _metric(frames / (time.perf_counter() - start), 'frames/s')}
+
+    if ffmpeg_path and shutil.which(ffmpeg_path):
+        with tempfile.TemporaryDirectory() as directory:
+            output_file = os.path.join(directory, 'benchmark.mp4')
+            start = time.perf_counter()
+            with FFmpegWriter(output_file, renderer.width, renderer.height, ffmpeg_path=ffmpeg_path) as writer:
+                for _ in range(frames):
+                    writer.write(renderer.render())
+            results[f'{prefix}.encode_fps'] = _metric(frames / (time.perf_counter() - start), 'frames/s')
+    return results
+
+
+def _benchmark_size(size: int, steps: int, frames: int, compiled_controller,
+                    ffmpeg_path: Optional[str]) -> Dict[str, dict]:
+    """
+    Замеры для одного размера карты; выполняется в отдельном процессе,
+    чтобы пиковая память относилась только к этому размеру.
+    """
+    land_cover = synthetic_land_cover(size)
+    results = {}
+    for prefix, track_front in ((f'automaton.vectorized.{size}', True),
+                                (f'automaton.full_grid.{size}', False)):
+        automaton = VectorizedForestFireAutomaton(land_cover, compiled_controller, seed=0,
+                                                  track_front=track_front, **BENCHMARK_WEATHER)
+        results.update(benchmark_automaton(automaton, steps, prefix))
+    results.update(benchmark_rendering(automaton, frames, f'render.{size}', ffmpeg_path))
+    results[f'memory.{size}.peak_rss_mb'] = _metric(_peak_rss_mb(), 'MB', higher_is_better=False)
+    return results
+
+
+def measure_cold_start() -> Dict[str, dict]:
+    """
+    Измеряет время холодного старта: запуск интерпретатора, импорт модулей
+    и загрузку скомпилированного нечеткого контроллера в новом процессе.
+
+    Кэш контроллера на диске заполняется заранее, поэтому замеряется
+    обычный запуск, а не первый после изменения определения контроллера.
+
+    Returns:
+        dict: Метрики.
+    """
+    load_compiled_controller()
+    code = ("from app.models.fuzzy_logic import load_compiled_controller\n"
+            "from app.models.vectorized_automaton import VectorizedForestFireAutomaton\n"
+            "load_compiled_controller()\n")
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], cwd=PROJECT_DIR, check=True)
+    return {'startup.cold_start_seconds': _metric(time.perf_counter() - start, 's', higher_is_better=False)}
+
+
+def run_benchmarks(sizes: List[int] = DEFAULT_SIZES, steps: int = 20, frames: int = 10,
+                   fuzzy_controller: Optional[FuzzyFireController] = None,
+                   reference_max_size: int = 100, cold_start: bool = True,
+                   ffmpeg_path: Optional[str] = 'ffmpeg') -> dict:
+    """
+    Выполняет набор замеров производительности.
+
+    Args:
+        sizes (list): Размеры сторон синтетических карт.
+        steps (int): Количество шагов автомата для каждого размера.
+        frames (int): Количество кадров для замера отрисовки и кодирования.
+        fuzzy_controller (FuzzyFireController): Нечеткий контроллер (по умолчанию создается,
+            время создания входит в результаты).
+        reference_max_size (int): Наибольший размер карты для поклеточного ForestFireAutomaton.
+        cold_start (bool): Измерять холодный старт в отдельном процессе.
+        ffmpeg_path (str): Путь к ffmpeg (None - не измерять кодирование).
+
+    Returns:
+        dict: Описание окружения ('meta') и метрики ('results').
+    """
+    results = {}
+    if fuzzy_controller is None:
+        start = time.perf_counter()
+        fuzzy_controller = FuzzyFireController()
+        fuzzy_controller.simulator  # Система правил skfuzzy строится по запросу
+        results['fuzzy.init_seconds'] = _metric(time.perf_counter() - start, 's', higher_is_better=False)
+
+    print("Замер нечеткого вывода")
+    results.update(benchmark_fuzzy(fuzzy_controller))
+
+    for size in sizes:
+        if size <= reference_max_size:
+            print(f"Замер ForestFireAutomaton: {size}x{size}")
+            automaton = ForestFireAutomaton(synthetic_land_cover(size), fuzzy_controller,
+                                            seed=0, **BENCHMARK_WEATHER)
+            results.update(benchmark_automaton(automaton, max(steps // 4, 1), f'automaton.reference.{size}'))
+
+    # Каждый размер замеряется в новом процессе: пиковая память процесса не уменьшается
+    context = mp.get_context('spawn')
+    compiled = fuzzy_controller.compile()
+    for size in sizes:
+        print(f"Замер VectorizedForestFireAutomaton и отрисовки: {size}x{size}")
+        with context.Pool(1) as pool:
+            results.update(pool.apply(_benchmark_size, (size, steps, frames, compiled, ffmpeg_path)))
+
+    if cold_start:
+        print("Замер холодного старта")
+        results.update(measure_cold_start())
+
+    meta = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'sizes': list(sizes),
+        'steps': steps,
+        'frames': frames,
+    }
+    return {'meta': meta, 'results': results}
+
+
+def save_results(results: dict, file_path: str):
+    """
+    Сохраняет результаты замеров в JSON.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+def load_results(file_path: str) -> dict:
+    """
+    Читает результаты замеров из JSON.
+    """
+    with open(file_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.1) -> List[dict]:
+    """
+    Сравнивает результаты с эталонными и находит ухудшения.
+
+    Ухудшением считается изменение метрики в худшую сторону более чем на
+    threshold (доля эталонного значения). Метрики, отсутствующие в одном из
+    наборов, не сравниваются.
+
+    Args:
+        baseline (dict): Эталонные результаты.
+        current (dict): Текущие результаты.
+        threshold (float): Допустимое относительное ухудшение (по умолчанию 0.1).
+
+    Returns:
+        list: Сравнение по каждой общей метрике (name, baseline, current, change, regression).
+    """
+    comparison = []
+    for name, reference in sorted(baseline['results'].items()):
+        if name not in current['results'] or reference['value'] == 0:
+            continue
+        value = current['results'][name]['value']
+        change = (value - reference['value']) / reference['value']
+        worse = -change if reference['higher_is_better'] else change
+        comparison.append({
+            'name': name,
+            'unit': reference['unit'],
+            'baseline': reference['value'],
+            'current': value,
+            'change': change,
+            'regression': worse > threshold,
+        })
+    return comparison
+
+
+def print_comparison(comparison: List[dict]) -> int:
+    """
+    Печатает таблицу сравнения.
+
+    Returns:
+        int: Количество ухудшений.
+    """
+    for row in comparison:
+        flag = 'УХУДШЕНИЕ' if row['regression'] else ''
+        print(f"{row['name']:<45} {row['baseline']:>14.4g} {row['current']:>14.4g} "
+              f"{row['change']:>+8.1%} {row['unit']:<9} {flag}")
+    regressions = sum(row['regression'] for row in comparison)
+    print(f"Ухудшений: {regressions} из {len(comparison)}")
+    return regressions
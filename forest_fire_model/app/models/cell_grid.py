@@ -0,0 +1,152 @@
+import numpy as np
+
+from .cell import CellState
+from .land_cover import LandCoverType
+
+# Коды состояний пожара в LandCoverType идут подряд: IGNITION = 18 ... ASH = 21
+FIRE_CODE_OFFSET = LandCoverType.IGNITION.value - CellState.IGNITION.value
+
+
+def land_cover_codes(state: np.ndarray, land_type: np.ndarray) -> np.ndarray:
+    """
+    Возвращает коды LandCoverType клеток для визуализации.
+
+    Args:
+        state (np.ndarray): Состояния клеток.
+        land_type (np.ndarray): Типы растительности клеток.
+
+    Returns:
+        np.ndarray: Тип растительности для клеток FOREST и код состояния пожара для остальных.
+    """
+    return np.where(state == CellState.FOREST.value, land_type, state + FIRE_CODE_OFFSET)
+
+
+class CellGrid:
+    """
+    Компактное хранилище сетки клеток на массивах NumPy.
+
+    Состояние и следующее состояние хранятся как uint8, счетчик горения -
+    как int16, тип растительности - как uint8, то есть несколько байт на
+    клетку вместо отдельного объекта ForestFireCell. Доступ вида
+    grid[y][x].state сохраняется через легковесные объекты-представления.
+
+    Атрибуты:
+        state (np.ndarray): Текущие состояния клеток (значения CellState).
+        next_state (np.ndarray): Состояния, применяемые при следующем обновлении.
+        fire_duration (np.ndarray): Продолжительность горения клеток.
+        land_type (np.ndarray): Типы растительности (значения LandCoverType).
+    """
+    def __init__(self, land_type: np.ndarray, on_change=None):
+        """
+        Инициализация сетки: все клетки в состоянии FOREST.
+
+        Args:
+            land_type (np.ndarray): Карта растительности.
+            on_change: Функция, вызываемая с плоским индексом клетки при
+                изменении ее состояния через представление (по умолчанию None).
+        """
+        if land_type.dtype != np.uint8:
+            land_type = np.clip(land_type, 0, 255).astype(np.uint8)
+        self.land_type = land_type
+        self.height, self.width = land_type.shape
+        # FOREST = 0: массивы создаются через np.zeros, и ОС выделяет страницы
+        # памяти лениво - только для участков сетки, которых коснулся пожар
+        self.state = np.zeros(land_type.shape, dtype=np.uint8)
+        self.next_state = np.zeros(land_type.shape, dtype=np.uint8)
+        self.fire_duration = np.zeros(land_type.shape, dtype=np.int16)
+        self.on_change = on_change
+
+    def __len__(self) -> int:
+        return self.height
+
+    def __getitem__(self, y: int) -> 'GridRow':
+        if not -self.height <= y < self.height:
+            raise IndexError("grid row index out of range")
+        return GridRow(self, y % self.height)
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield GridRow(self, y)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Объем памяти, занимаемый массивами сетки (в байтах).
+        """
+        return self.state.nbytes + self.next_state.nbytes + self.fire_duration.nbytes + self.land_type.nbytes
+
+
+class GridRow:
+    """
+    Представление строки сетки, возвращающее CellView по координате X.
+    """
+    __slots__ = ('_grid', '_y')
+
+    def __init__(self, grid: CellGrid, y: int):
+        self._grid = grid
+        self._y = y
+
+    def __len__(self) -> int:
+        return self._grid.width
+
+    def __getitem__(self, x: int) -> 'CellView':
+        width = self._grid.width
+        if not -width <= x < width:
+            raise IndexError("grid column index out of range")
+        return CellView(self._grid, self._y, x % width)
+
+    def __iter__(self):
+        for x in range(self._grid.width):
+            yield CellView(self._grid, self._y, x)
+
+
+class CellView:
+    """
+    Представление клетки сетки с интерфейсом ForestFireCell.
+
+    Не хранит данных: чтение и запись атрибутов обращаются к массивам CellGrid.
+    """
+    __slots__ = ('_grid', '_y', '_x')
+
+    def __init__(self, grid: CellGrid, y: int, x: int):
+        self._grid = grid
+        self._y = y
+        self._x = x
+
+    @property
+    def state(self) -> CellState:
+        return CellState(int(self._grid.state[self._y, self._x]))
+
+    @state.setter
+    def state(self, value: CellState):
+        self._grid.state[self._y, self._x] = value.value
+        if self._grid.on_change is not None:
+            self._grid.on_change(self._y * self._grid.width + self._x)
+
+    @property
+    def next_state(self) -> CellState:
+        return CellState(int(self._grid.next_state[self._y, self._x]))
+
+    @next_state.setter
+    def next_state(self, value: CellState):
+        self._grid.next_state[self._y, self._x] = value.value
+
+    @property
+    def fire_duration(self) -> int:
+        return int(self._grid.fire_duration[self._y, self._x])
+
+    @fire_duration.setter
+    def fire_duration(self, value: int):
+        self._grid.fire_duration[self._y, self._x] = value
+
+    @property
+    def land_type(self) -> int:
+        return int(self._grid.land_type[self._y, self._x])
+
+    def update(self):
+        """
+        Обновляет состояние клетки (см. ForestFireCell.update).
+        """
+        self.state = self.next_state
+        if self.state in [CellState.IGNITION, CellState.FIRE, CellState.BURNING_OUT]:
+            self.fire_duration += 1
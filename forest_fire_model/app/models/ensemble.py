@@ -0,0 +1,288 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+from .wind import WindDirection
+from .fuzzy_logic import FuzzyFireController, CompiledFuzzyInference
+from .forest_fire_automaton import INITIAL_FIRE_DURATION
+from .vectorized_automaton import VectorizedForestFireAutomaton
+from .stacked_automaton import StackedForestFireAutomaton
+
+# Состояние процесса-исполнителя: карта растительности из общей памяти
+# и скомпилированный нечеткий контроллер, общие для всех его прогонов
+_worker_memory = None
+_worker_land_cover = None
+_worker_controller = None
+
+
+class EnsembleResult:
+    """
+    Результат ансамбля стохастических прогонов одного сценария.
+
+    Атрибуты:
+        runs (int): Количество прогонов.
+        burn_count (np.ndarray): Число прогонов, в которых клетка загорелась.
+        arrival_sum (np.ndarray): Сумма шагов загорания клетки по прогонам.
+        profile (dict): Профиль rasterio исходной карты (привязка, проекция).
+    """
+    def __init__(self, runs: int, shape: Tuple[int, int], profile: Optional[dict] = None):
+        self.runs = runs
+        self.burn_count = np.zeros(shape, dtype=np.int32)
+        self.arrival_sum = np.zeros(shape, dtype=np.float64)
+        self.profile = profile
+
+    def add_run(self, cells: np.ndarray, arrival: np.ndarray):
+        """
+        Учитывает результат одного прогона.
+
+        Args:
+            cells (np.ndarray): Плоские индексы загоревшихся клеток.
+            arrival (np.ndarray): Шаг загорания каждой из этих клеток.
+        """
+        self.burn_count.ravel()[cells] += 1
+        self.arrival_sum.ravel()[cells] += arrival
+
+    @property
+    def burn_probability(self) -> np.ndarray:
+        """
+        Доля прогонов, в которых клетка загорелась (0.0-1.0).
+        """
+        return self.burn_count / self.runs
+
+    @property
+    def mean_arrival_time(self) -> np.ndarray:
+        """
+        Средний шаг загорания по прогонам, в которых клетка загорелась (NaN - не горела).
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.burn_count > 0, self.arrival_sum / self.burn_count, np.nan)
+
+    def save(self, burn_probability_file: str, arrival_time_file: str):
+        """
+        Сохраняет растры вероятности и среднего времени загорания в GeoTIFF
+        с привязкой исходной карты.
+
+        Args:
+            burn_probability_file (str): Путь для растра вероятности загорания.
+            arrival_time_file (str): Путь для растра среднего шага загорания.
+        """
+        write_geotiff(burn_probability_file, self.burn_probability, self.profile)
+        write_geotiff(arrival_time_file, self.mean_arrival_time, self.profile, nodata=-1.0)
+
+
+def write_geotiff(file_path: str, data: np.ndarray, profile: Optional[dict], nodata: Optional[float] = None):
+    """
+    Записывает одноканальный растр float32 в GeoTIFF.
+
+    Args:
+        file_path (str): Путь к файлу.
+        data (np.ndarray): Данные растра; NaN заменяются значением nodata.
+        profile (dict): Профиль rasterio исходной карты (может быть None).
+        nodata (float): Значение для отсутствующих данных (по умолчанию None).
+    """
+    import rasterio
+
+    profile = dict(profile or {})
+    profile.update(driver='GTiff', count=1, dtype='float32', nodata=nodata,
+                   height=data.shape[0], width=data.shape[1])
+    # Параметры блочной структуры исходного файла могут не подходить к новому типу данных
+    for key in ('blockxsize', 'blockysize', 'tiled', 'interleave', 'photometric'):
+        profile.pop(key, None)
+    values = data.astype(np.float32)
+    if nodata is not None:
+        values[np.isnan(values)] = nodata
+    with rasterio.open(file_path, 'w', **profile) as dst:
+        dst.write(values, 1)
+
+
+def _init_worker(memory_name: str, shape: Tuple[int, int], dtype: str,
+                 controller: CompiledFuzzyInference):
+    """
+    Инициализирует процесс-исполнитель: подключает карту растительности
+    из общей памяти и сохраняет контроллер для всех прогонов процесса.
+    """
+    global _worker_memory, _worker_land_cover, _worker_controller
+    _worker_memory = shared_memory.SharedMemory(name=memory_name)
+    _worker_land_cover = np.ndarray(shape, dtype=dtype, buffer=_worker_memory.buf)
+    _worker_controller = controller
+
+
+def _run_realisation(seed: np.random.SeedSequence, scenario: dict) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Выполняет один прогон сценария в процессе-исполнителе.
+
+    Returns:
+        tuple: Плоские индексы загоревшихся клеток и шаги их загорания.
+    """
+    return simulate_arrival(_worker_land_cover, _worker_controller, seed, **scenario)
+
+
+def _run_batch(seeds: List[np.random.SeedSequence], scenario: dict) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Выполняет пакет прогонов сценария одной стопкой в процессе-исполнителе.
+
+    Returns:
+        list: Для каждого прогона - плоские индексы загоревшихся клеток и шаги их загорания.
+    """
+    return simulate_arrival_stacked(_worker_land_cover, _worker_controller, seeds, **scenario)
+
+
+def simulate_arrival(land_cover: np.ndarray, fuzzy_controller, seed,
+                     ignition_points: List[Tuple[int, int]], steps: int,
+                     wind_direction: WindDirection = WindDirection.N,
+                     wind_speed: float = 0.0,
+                     humidity: float = 50.0,
+                     temperature: float = 15.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Моделирует один прогон и возвращает шаг загорания каждой загоревшейся клетки.
+
+    Args:
+        land_cover (np.ndarray): Карта растительности.
+        fuzzy_controller: FuzzyFireController или его скомпилированная форма.
+        seed: Зерно генератора случайных чисел прогона.
+        ignition_points (list): Точки начального возгорания (x, y).
+        steps (int): Количество шагов моделирования.
+        wind_direction, wind_speed, humidity, temperature: Параметры погоды.
+
+    Returns:
+        tuple: Плоские индексы загоревшихся клеток и шаги их загорания.
+    """
+    automaton = VectorizedForestFireAutomaton(land_cover, fuzzy_controller, wind_direction,
+                                              wind_speed, humidity, temperature, seed=seed)
+    arrival = np.full(land_cover.size, -1, dtype=np.int32)
+    for x, y in ignition_points:
+        automaton.ignite(x, y, INITIAL_FIRE_DURATION)
+        arrival[y * automaton.width + x] = 0
+
+    for step in range(1, steps + 1):
+        automaton.update()
+        burning = automaton.burning_cells
+        if not burning.size:
+            break  # Пожар погас: дальнейшие шаги ничего не меняют
+        arrival[burning[arrival[burning] < 0]] = step
+
+    cells = np.flatnonzero(arrival >= 0)
+    return cells, arrival[cells]
+
+
+def simulate_arrival_stacked(land_cover: np.ndarray, fuzzy_controller, seeds: list,
+                             ignition_points: List[Tuple[int, int]], steps: int,
+                             wind_direction: WindDirection = WindDirection.N,
+                             wind_speed: float = 0.0,
+                             humidity: float = 50.0,
+                             temperature: float = 15.0) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Моделирует несколько прогонов одной стопкой (StackedForestFireAutomaton).
+
+    Результат каждого прогона совпадает с simulate_arrival с тем же зерном.
+
+    Args:
+        land_cover (np.ndarray): Карта растительности.
+        fuzzy_controller: FuzzyFireController или его скомпилированная форма.
+        seeds (list): Зерна прогонов.
+        ignition_points (list): Точки начального возгорания (x, y).
+        steps (int): Количество шагов моделирования.
+        wind_direction, wind_speed, humidity, temperature: Параметры погоды.
+
+    Returns:
+        list: Для каждого прогона - плоские индексы загоревшихся клеток и шаги их загорания.
+    """
+    count = len(seeds)
+    automaton = StackedForestFireAutomaton(land_cover, fuzzy_controller, count, wind_direction,
+                                           wind_speed, humidity, temperature, seed=list(seeds))
+    area = land_cover.size
+    arrival = np.full(count * area, -1, dtype=np.int32)
+    for realisation in range(count):
+        for x, y in ignition_points:
+            automaton.ignite(realisation, x, y, INITIAL_FIRE_DURATION)
+            arrival[realisation * area + y * automaton.width + x] = 0
+
+    for step in range(1, steps + 1):
+        automaton.update()
+        burning = automaton.burning_cells
+        if not burning.size:
+            break  # Пожар погас во всех прогонах
+        arrival[burning[arrival[burning] < 0]] = step
+
+    results = []
+    for layer in arrival.reshape(count, area):
+        cells = np.flatnonzero(layer >= 0)
+        results.append((cells, layer[cells]))
+    return results
+
+
+def run_ensemble(land_cover_file: str,
+                 fuzzy_controller: FuzzyFireController,
+                 runs: int,
+                 ignition_points: List[Tuple[int, int]],
+                 steps: int,
+                 wind_direction: WindDirection = WindDirection.N,
+                 wind_speed: float = 0.0,
+                 humidity: float = 50.0,
+                 temperature: float = 15.0,
+                 seed: Optional[int] = None,
+                 workers: Optional[int] = None,
+                 batch_size: int = 1) -> EnsembleResult:
+    """
+    Выполняет ансамбль стохастических прогонов сценария в пуле процессов.
+
+    Карта растительности читается один раз и передается исполнителям через
+    общую память; каждый исполнитель хранит свой экземпляр скомпилированного
+    контроллера. Прогоны получают независимые зерна из SeedSequence(seed),
+    поэтому результат не зависит от числа исполнителей и размера пакета.
+
+    При batch_size > 1 исполнитель моделирует пакет прогонов одной стопкой
+    (StackedForestFireAutomaton): накладные расходы шага делятся на весь пакет.
+
+    Args:
+        land_cover_file (str): Путь к файлу с картой растительности (TIFF-формат).
+        fuzzy_controller (FuzzyFireController): Нечеткий контроллер.
+        runs (int): Количество прогонов.
+        ignition_points (list): Точки начального возгорания (x, y).
+        steps (int): Количество шагов моделирования в каждом прогоне.
+        wind_direction, wind_speed, humidity, temperature: Параметры погоды.
+        seed (int): Зерно ансамбля (по умолчанию None - случайное).
+        workers (int): Количество процессов (по умолчанию - число ядер).
+        batch_size (int): Количество прогонов, моделируемых одной стопкой (по умолчанию 1).
+
+    Returns:
+        EnsembleResult: Частота и среднее время загорания клеток.
+    """
+    import rasterio
+
+    with rasterio.open(land_cover_file) as src:
+        land_cover = src.read(1)
+        profile = src.profile
+
+    memory = shared_memory.SharedMemory(create=True, size=land_cover.nbytes)
+    try:
+        np.ndarray(land_cover.shape, dtype=land_cover.dtype, buffer=memory.buf)[...] = land_cover
+
+        scenario = dict(ignition_points=list(ignition_points), steps=steps,
+                        wind_direction=wind_direction, wind_speed=wind_speed,
+                        humidity=humidity, temperature=temperature)
+        result = EnsembleResult(runs, land_cover.shape, profile)
+        seeds = np.random.SeedSequence(seed).spawn(runs)
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(memory.name, land_cover.shape, land_cover.dtype.str,
+                                           fuzzy_controller.compile())) as executor:
+            if batch_size > 1:
+                batches = [seeds[start:start + batch_size] for start in range(0, runs, batch_size)]
+                futures = [executor.submit(_run_batch, batch, scenario) for batch in batches]
+            else:
+                futures = [executor.submit(_run_realisation, run_seed, scenario) for run_seed in seeds]
+            done = 0
+            for future in futures:
+                outcomes = future.result() if batch_size > 1 else [future.result()]
+                for outcome in outcomes:
+                    result.add_run(*outcome)
+                    done += 1
+                    if done % 10 == 0:
+                        print(f"Выполнено прогонов: {done}/{runs}")
+    finally:
+        memory.close()
+        memory.unlink()
+
+    return result
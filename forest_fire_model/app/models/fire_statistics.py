@@ -0,0 +1,213 @@
+import csv
+import json
+import math
+import os
+from typing import Callable, Optional
+import numpy as np
+
+from .cell import CellState
+from .land_cover import LandCoverType
+from .forest_fire_automaton import ForestFireAutomaton
+
+# Типы растительности, по которым считается площадь пожара (без состояний пожара)
+VEGETATION_CLASSES = [land_type for land_type in LandCoverType if land_type.value < LandCoverType.IGNITION.value]
+
+# Горящие состояния, для которых записывается размер фронта
+FRONT_STATES = (CellState.IGNITION, CellState.FIRE, CellState.BURNING_OUT)
+
+# Значения маски пройденных огнем клеток: уже учтенные клетки и клетки,
+# добавляемые (или исключаемые) на текущем шаге
+_BURNED = 2
+_CHANGED = 1
+
+
+class FireStatisticsRecorder:
+    """
+    Показатели пожара по шагам, обновляемые по изменившимся клеткам.
+
+    Клетка пройдена огнем, если она не в состоянии FOREST. После каждого шага
+    просматриваются только клетки, горевшие до или после шага (остальные за шаг
+    не меняют состояние), поэтому стоимость записи пропорциональна длине
+    фронта, а не площади карты. Показатели шага:
+        step: Номер шага.
+        burned_area: Число пройденных огнем клеток.
+        burned_<ТИП>: То же по типам растительности (bincount по кодам LandCoverType).
+        front: Число горящих клеток; ignition, fire, burning_out - по состояниям.
+        ash: Число догоревших клеток.
+        perimeter: Длина границы пройденной огнем области в сторонах клеток.
+        spread_rate: Прирост площади за шаг (клеток за шаг).
+        radius_rate: Прирост радиуса круга той же площади (клеток за шаг) -
+            линейная скорость распространения.
+
+    Записи передаются в callback, дописываются в файл CSV или JSON Lines
+    (по расширению) сразу после шага и хранятся в records.
+
+    Атрибуты:
+        records (list): Записи шагов (если keep_records=True).
+    """
+    def __init__(self, automaton: ForestFireAutomaton, output_file: Optional[str] = None,
+                 callback: Optional[Callable[[dict], None]] = None,
+                 keep_records: bool = True):
+        """
+        Args:
+            automaton (ForestFireAutomaton): Автомат; текущее состояние записывается сразу
+                (единственный просмотр всей сетки).
+            output_file (str): Файл записей: .csv или .jsonl (None - не записывать).
+            callback: Функция, вызываемая с записью каждого шага.
+            keep_records (bool): Хранить записи шагов в records (по умолчанию True).
+        """
+        self.automaton = automaton
+        self.callback = callback
+        self.keep_records = keep_records
+        self.records = []
+
+        self._writer = None
+        self._file = None
+        if output_file is not None:
+            extension = os.path.splitext(output_file)[1].lower()
+            if extension not in ('.csv', '.jsonl'):
+                raise ValueError(f"Неподдерживаемый формат файла показателей: {extension}")
+            self._file = open(output_file, 'w', encoding='utf-8', newline='')
+            if extension == '.csv':
+                self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames())
+                self._writer.writeheader()
+
+        # Маска пройденных огнем клеток с рамкой в одну клетку: соседи по
+        # сторонам находятся без проверки границ
+        height, width = automaton.state.shape
+        self._stride = width + 2
+        self._mask = np.zeros((height + 2) * self._stride, dtype=np.uint8)
+        self._side_offsets = np.array([-self._stride, self._stride, -1, 1])
+        self._land_type = automaton.land_type.ravel()
+
+        self.burned_area = 0
+        self.burned_by_class = np.zeros(256, dtype=np.int64)
+        self.perimeter = 0
+        self._radius = 0.0
+
+        burned = np.flatnonzero(automaton.state.ravel() != CellState.FOREST.value)
+        self._update_burned(burned, np.empty(0, dtype=np.int64))
+        self._front = automaton.burning_indices()
+        self.record()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def fieldnames() -> list:
+        """
+        Возвращает имена показателей в порядке столбцов CSV.
+        """
+        return (['step', 'burned_area']
+                + [f'burned_{land_type.name}' for land_type in VEGETATION_CLASSES]
+                + ['front'] + [state.name.lower() for state in FRONT_STATES]
+                + ['ash', 'perimeter', 'spread_rate', 'radius_rate'])
+
+    def record(self) -> dict:
+        """
+        Обновляет показатели по клеткам, изменившимся на последнем шаге,
+        и записывает их.
+
+        Returns:
+            dict: Показатели шага.
+        """
+        automaton = self.automaton
+        front = automaton.burning_indices()
+        cells = np.union1d(self._front, front)
+        self._front = front
+        state = automaton.state.ravel()
+
+        # Клетки, впервые пройденные огнем, и клетки, вернувшиеся в FOREST
+        # (загорание прервано через grid[y][x])
+        burned = self._mask[self._padded(cells)] == _BURNED
+        forest = state[cells] == CellState.FOREST.value
+        previous_area = self.burned_area
+        self._update_burned(cells[~burned & ~forest], cells[burned & forest])
+
+        # Пройденная огнем клетка либо горит, либо догорела
+        front_states = np.bincount(state[front], minlength=CellState.ASH.value + 1)
+        radius = math.sqrt(self.burned_area / math.pi)
+        record = {'step': automaton.step_count, 'burned_area': self.burned_area}
+        for land_type in VEGETATION_CLASSES:
+            record[f'burned_{land_type.name}'] = int(self.burned_by_class[land_type.value])
+        record['front'] = int(front.size)
+        for cell_state in FRONT_STATES:
+            record[cell_state.name.lower()] = int(front_states[cell_state.value])
+        record.update(ash=self.burned_area - int(front.size),
+                      perimeter=self.perimeter,
+                      spread_rate=self.burned_area - previous_area,
+                      radius_rate=radius - self._radius)
+        self._radius = radius
+
+        if self.keep_records:
+            self.records.append(record)
+        if self._file is not None:
+            if self._writer is not None:
+                self._writer.writerow(record)
+            else:
+                self._file.write(json.dumps(record) + '\n')
+            self._file.flush()
+        if self.callback is not None:
+            self.callback(record)
+        return record
+
+    def run(self, steps: int, stop_when_extinct: bool = True) -> list:
+        """
+        Выполняет steps шагов автомата, записывая показатели после каждого.
+
+        Args:
+            steps (int): Количество шагов.
+            stop_when_extinct (bool): Остановиться, когда пожар погас (по умолчанию True).
+
+        Returns:
+            list: Записи шагов.
+        """
+        for _ in range(steps):
+            if stop_when_extinct and self.automaton.is_extinct():
+                break
+            self.automaton.update()
+            self.record()
+        return self.records
+
+    def close(self):
+        """
+        Закрывает файл записей.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+    def _padded(self, cells: np.ndarray) -> np.ndarray:
+        """
+        Переводит плоские индексы клеток в индексы маски с рамкой.
+        """
+        ys, xs = np.divmod(cells, self._stride - 2)
+        return (ys + 1) * self._stride + xs + 1
+
+    def _update_burned(self, added: np.ndarray, removed: np.ndarray):
+        """
+        Добавляет и исключает клетки пройденной огнем области, обновляя
+        площадь по типам растительности и периметр.
+
+        Периметр P = 4N - 2E (N - клеток, E - пар соседних по стороне клеток).
+        Изменяемые клетки отмечаются в маске значением _CHANGED, остальные
+        клетки области имеют значение _BURNED. Тогда сумма значений соседей
+        изменяемых клеток равна удвоенному числу пар, в которые они входят:
+        пара с остальной областью дает 2, пара двух изменяемых клеток - 1 + 1.
+        """
+        mask = self._mask
+        for cells, sign in ((added, 1), (removed, -1)):
+            if not cells.size:
+                continue
+            padded = self._padded(cells)
+            mask[padded] = _CHANGED
+            pairs = int(mask[padded[:, None] + self._side_offsets].sum(dtype=np.int64))
+            mask[padded] = _BURNED if sign > 0 else 0
+
+            self.perimeter += sign * (4 * cells.size - pairs)
+            self.burned_area += sign * cells.size
+            self.burned_by_class += sign * np.bincount(self._land_type[cells], minlength=256)
@@ -1,41 +1,55 @@
-import random
+import copy
+import json
 import numpy as np
 import os
-import matplotlib.pyplot as plt
-import matplotlib.colors as colors
-import matplotlib.animation as animation
-from typing import List
-from scipy import ndimage
-import rasterio
+from typing import Union
 
-from .cell import ForestFireCell, CellState
+from .cell import CellState
+from .cell_grid import CellGrid, land_cover_codes
 from .wind import WindDirection
 from .fuzzy_logic import FuzzyFireController
 from .land_cover import LandCoverType
+from .rng import CounterRNG
+from .metrics import NULL_METRICS
+from .weather import WeatherSchedule
+from .terrain import NEIGHBOR_OFFSETS, SLOPE_PRECISION, compute_slope_weights, load_dem
+from .rules import (FIRST_BURNING_STATE, LAST_BURNING_STATE, build_wind_effect_matrix, combine_wind_factor,
+                    merge_weather, next_burning_state, wind_matrix_changed)
+
+# Начальный счетчик горения точек возгорания, задаваемых пользователем: точка
+# остается в состоянии IGNITION на несколько шагов дольше клеток, подожженных соседями
+INITIAL_FIRE_DURATION = -3
 
 class ForestFireAutomaton:
-    def __init__(self, land_cover_file: str,
+    def __init__(self, land_cover_file: Union[str, np.ndarray],
                  fuzzy_controller: FuzzyFireController, 
                  wind_direction: WindDirection = WindDirection.N, 
                  wind_speed: float = 0.0,
                  humidity: float = 50.0,
-                 temperature: float = 15.0):
+                 temperature: float = 15.0,
+                 seed=None):
         """
         Инициализация автомата для моделирования лесного пожара.
         
         Args:
-            land_cover_file (str): Путь к файлу с картой растительности (TIFF-формат).
+            land_cover_file (str | np.ndarray): Путь к файлу с картой растительности (TIFF-формат)
+                или уже загруженная карта.
             wind_direction (WindDirection): Направление ветра (по умолчанию - север).
             wind_speed (float): Скорость ветра (по умолчанию 0.0 м/с).
             humidity (float): Влажность воздуха (по умолчанию 50.0%).
+            seed: Зерно генератора случайных чисел (по умолчанию None - случайное).
         """
         # Загрузка карты растительности из файла
-        self.land_cover = self.load_land_cover_tif(land_cover_file)
+        if isinstance(land_cover_file, np.ndarray):
+            self.land_cover = land_cover_file
+            self.land_cover_file = None
+        else:
+            self.land_cover = self.load_land_cover_tif(land_cover_file)
+            self.land_cover_file = os.path.abspath(land_cover_file)
         self.height, self.width = self.land_cover.shape
         
         # Инициализация сетки клеток на основе карты растительности
-        self.grid = [[ForestFireCell(land_type=int(self.land_cover[y][x])) 
-                     for x in range(self.width)] for y in range(self.height)]
+        self._init_grid()
         
         # Установка параметров окружающей среды
         self.wind_direction = wind_direction
@@ -47,9 +61,57 @@ class ForestFireAutomaton:
         self.fuzzy_controller = fuzzy_controller
         
         # Создание матрицы влияния ветра на распространение огня
-        self.wind_effect_matrix = self._create_wind_effect_matrix()
+        self.wind_effect_matrix = build_wind_effect_matrix(self.wind_direction, self.wind_speed)
+        
+        # Количество выполненных шагов моделирования
+        self.step_count = 0
+        
+        # Генератор случайных чисел: значения зависят только от зерна, шага и клетки,
+        # поэтому все реализации автомата дают одинаковый результат при одном зерне
+        self.rng = CounterRNG(seed)
+        
+        # Сбор показателей по шагам (SimulationMetrics); по умолчанию отключен
+        self.metrics = NULL_METRICS
+        self.candidate_count = 0
+        
+        # Ряд погодных данных, применяемый перед каждым шагом (см. set_weather_schedule)
+        self.weather_schedule = None
+        
+        # Рельеф, размер клетки и веса влияния уклона для восьми соседей (см. set_height_map)
+        self.height_map = None
+        self.cell_size = 1.0
+        self.slope_weights = None
+
+    def _init_grid(self, land_type: np.ndarray = None):
+        """
+        Создает компактную сетку клеток на основе карты растительности.
+        
+        Массивы сетки доступны напрямую как state, next_state, fire_duration
+        и land_type; grid[y][x] возвращает представление клетки.
+        
+        Args:
+            land_type (np.ndarray): Готовый массив типов растительности (uint8)
+                для совместного использования несколькими сетками (по умолчанию
+                строится по карте растительности).
+        """
+        self.grid = CellGrid(self.land_cover if land_type is None else land_type,
+                             on_change=self._on_cell_changed)
+        self.state = self.grid.state
+        self.next_state = self.grid.next_state
+        self.fire_duration = self.grid.fire_duration
+        self.land_type = self.grid.land_type
+    
+    def _on_cell_changed(self, index: int):
+        """
+        Вызывается при изменении состояния клетки через grid[y][x].
+        
+        Args:
+            index (int): Плоский индекс клетки.
+        """
+        pass
 
-    def load_land_cover_tif(self, file_path: str) -> np.ndarray:
+    @staticmethod
+    def load_land_cover_tif(file_path: str) -> np.ndarray:
         """
         Загружает TIFF-файл карты растительности.
         
@@ -59,82 +121,24 @@ class ForestFireAutomaton:
         Returns:
             np.ndarray: Массив с данными о типе растительности.
         """
+        import rasterio
+
         with rasterio.open(file_path) as src:
             data = src.read(1)  # Читаем первый канал
             return data
 
-    def _create_wind_effect_matrix(self) -> List[List[float]]:
+    def ignite(self, x: int, y: int, fire_duration: int = 0):
         """
-        Создает матрицу 3x3, описывающую влияние ветра на распространение огня.
+        Поджигает клетку с заданными координатами.
         
-        Returns:
-            List[List[float]]: Матрица влияния ветра.
-        """
-        matrix = [[-0.5 for _ in range(3)] for _ in range(3)]
-        matrix[1][1] = 0.0  # Центральная клетка (текущая) не учитывается
-        
-        if self.wind_speed == 0:
-            return matrix
-        
-        # Настройка матрицы в зависимости от направления ветра
-        if self.wind_direction == WindDirection.N:
-            matrix[0][1] = 1  # Север
-            matrix[0][0] = 0.5  # Северо-запад
-            matrix[0][2] = 0.5  # Северо-восток
-            matrix[2][0] = -1  # Юг
-            matrix[2][1] = -1  # Юго-запад
-            matrix[2][2] = -1  # Юго-восток
-        elif self.wind_direction == WindDirection.NE:
-            matrix[0][2] = 1  # Северо-восток
-            matrix[0][1] = 1  # Север
-            matrix[1][2] = 1  # Восток
-            matrix[2][0] = -1  # Юго-запад
-            matrix[1][0] = -1  # Запад
-            matrix[2][0] = -1  # Юг
-        elif self.wind_direction == WindDirection.E:
-            matrix[1][2] = 1  # Восток
-            matrix[0][2] = 0.5  # Северо-восток
-            matrix[2][2] = 0.5  # Юго-восток
-            matrix[1][0] = -1  # Запад
-            matrix[0][0] = -1  # Северо-запад
-            matrix[2][0] = -1  # Юго-запад
-        elif self.wind_direction == WindDirection.SE:
-            matrix[2][2] = 1  # Юго-восток
-            matrix[1][2] = 1  # Восток
-            matrix[2][1] = 1  # Юг
-            matrix[0][0] = -1  # Северо-запад
-            matrix[0][1] = -1  # Север
-            matrix[1][0] = -1  # Запад
-        elif self.wind_direction == WindDirection.S:
-            matrix[2][1] = 1  # Юг
-            matrix[2][0] = 0.5  # Юго-запад
-            matrix[2][2] = 0.5  # Юго-восток
-            matrix[0][1] = -1  # Север
-            matrix[0][0] = -1  # Северо-запад
-            matrix[0][2] = -1  # Северо-восток
-        elif self.wind_direction == WindDirection.SW:
-            matrix[2][0] = 1  # Юго-запад
-            matrix[2][1] = 1  # Юг
-            matrix[1][0] = 1  # Запад
-            matrix[0][2] = -1  # Северо-восток
-            matrix[0][1] = -1  # Север
-            matrix[1][2] = -1  # Восток
-        elif self.wind_direction == WindDirection.W:
-            matrix[1][0] = 1  # Запад
-            matrix[0][0] = 0.5  # Северо-запад
-            matrix[2][0] = 0.5  # Юго-запад
-            matrix[1][2] = -1  # Восток 
-            matrix[0][2] = -1  # Северо-восток
-            matrix[2][2] = -1  # Юго-восток
-        elif self.wind_direction == WindDirection.NW:
-            matrix[0][0] = 1  # Северо-запад
-            matrix[0][1] = 1  # Север
-            matrix[1][0] = 1  # Запад
-            matrix[2][2] = -1  # Юго-восток
-            matrix[1][2] = -1  # Восток
-            matrix[2][1] = -1  # Юг
-            
-        return matrix
+        Args:
+            x (int): Координата X клетки.
+            y (int): Координата Y клетки.
+            fire_duration (int): Начальное значение счетчика горения (по умолчанию 0).
+        """
+        cell = self.grid[y][x]
+        cell.state = CellState.IGNITION
+        cell.fire_duration = fire_duration
     
     def ignite_random_cells(self, count: int = 1):
         """
@@ -143,8 +147,9 @@ class ForestFireAutomaton:
         Args:
             count (int): Количество клеток для поджига (по умолчанию 1).
         """
-        for _ in range(count):
-            x, y = random.randint(0, self.width-1), random.randint(0, self.height-1)
+        xs = self.rng.integers(self.width, count)
+        ys = self.rng.integers(self.height, count)
+        for x, y in zip(xs, ys):
             if self.grid[y][x].state == CellState.FOREST:  # Зажигаем только лесные клетки
                 self.grid[y][x].state = CellState.IGNITION
     
@@ -152,15 +157,313 @@ class ForestFireAutomaton:
         """
         Обновляет состояние всех клеток в сетке.
         """
+        metrics = self.metrics
+        metrics.begin_step(self.step_count + 1)
+        fuzzy_stats = self._fuzzy_stats() if metrics.enabled else None
+        
+        if self.weather_schedule is not None:
+            with metrics.phase('weather'):
+                self.set_weather(*self.weather_schedule.at(self.step_count))
+        
+        if self.is_extinct():
+            # Без горящих клеток шаг не изменяет состояние: выполняется только учет шага
+            self.candidate_count = 0
+        else:
+            self._step()
+        self.step_count += 1
+        
+        if metrics.enabled:
+            self._record_step_metrics(fuzzy_stats)
+        metrics.end_step()
+    
+    def _step(self):
+        """
+        Выполняет один шаг моделирования (без учета номера шага и показателей).
+        """
+        self.candidate_count = 0
+        
+        # Случайные числа для всех клеток шага разыгрываются одним запросом
+        self._step_uniforms = self.rng.uniforms(self.step_count + 1, np.arange(self.height * self.width))
+        
         # Фаза 1: Расчет следующего состояния для всех клеток
-        for y in range(self.height):
-            for x in range(self.width):
-                self._update_cell(x, y)
+        with self.metrics.phase('compute_next_state'):
+            for y in range(self.height):
+                for x in range(self.width):
+                    self._update_cell(x, y)
         
         # Фаза 2: Применение следующего состояния
-        for y in range(self.height):
-            for x in range(self.width):
-                self.grid[y][x].update()
+        with self.metrics.phase('apply_state'):
+            self.state[...] = self.next_state
+            self.fire_duration[self.burning_mask()] += 1
+    
+    def _fuzzy_stats(self) -> dict:
+        """
+        Возвращает накопленные счетчики нечеткого контроллера (если он их ведет).
+        """
+        stats = getattr(self.fuzzy_controller, 'stats', None)
+        return stats() if stats is not None else {}
+    
+    def burning_count(self) -> int:
+        """
+        Возвращает число горящих клеток.
+        """
+        return int(np.count_nonzero(self.burning_mask()))
+    
+    def burning_indices(self) -> np.ndarray:
+        """
+        Возвращает упорядоченные плоские индексы горящих клеток.
+        """
+        return np.flatnonzero(self.burning_mask())
+    
+    def is_extinct(self) -> bool:
+        """
+        Проверяет, погас ли пожар.
+        
+        Клетка загорается только от горящего соседа, а догоревшая клетка не
+        меняется, поэтому без горящих клеток состояние сетки больше не изменится.
+        
+        Returns:
+            bool: True, если горящих клеток нет.
+        """
+        return self.burning_count() == 0
+    
+    def _record_step_metrics(self, fuzzy_stats: dict):
+        """
+        Записывает счетчики завершенного шага в self.metrics.
+        
+        Args:
+            fuzzy_stats (dict): Счетчики нечеткого контроллера до начала шага.
+        """
+        delta = {name: value - fuzzy_stats.get(name, 0) for name, value in self._fuzzy_stats().items()}
+        evaluations = delta.get('evaluations', 0)
+        burning = self.burning_count()
+        
+        self.metrics.count('fuzzy_evaluations', evaluations + delta.get('scalar_evaluations', 0))
+        if evaluations:
+            # Доля повторяющихся наборов входов внутри пакетных запросов
+            self.metrics.count('fuzzy_dedup_rate', 1 - delta.get('unique_evaluations', 0) / evaluations)
+        lookups = delta.get('cache_hits', 0) + delta.get('cache_misses', 0)
+        if lookups:
+            self.metrics.count('fuzzy_cache_hits', delta['cache_hits'])
+            self.metrics.count('fuzzy_cache_hit_rate', delta['cache_hits'] / lookups)
+        self.metrics.count('candidate_cells', self.candidate_count)
+        self.metrics.count('burning_cells', burning)
+        self.metrics.count('active_cells', burning + self.candidate_count)
+    
+    @property
+    def weather(self) -> tuple:
+        """
+        Текущая погода: (направление ветра, скорость ветра, влажность, температура).
+        """
+        return self.wind_direction, self.wind_speed, self.humidity, self.temperature
+    
+    def set_weather(self, wind_direction: WindDirection = None, wind_speed: float = None,
+                    humidity: float = None, temperature: float = None):
+        """
+        Изменяет параметры погоды; незаданные параметры сохраняются.
+        
+        Матрица влияния ветра и производные от погоды таблицы перестраиваются
+        только если погода действительно изменилась, поэтому метод можно
+        вызывать на каждом шаге.
+        
+        Args:
+            wind_direction (WindDirection): Направление ветра.
+            wind_speed (float): Скорость ветра.
+            humidity (float): Влажность воздуха.
+            temperature (float): Температура воздуха.
+        """
+        previous = self.weather
+        weather = merge_weather(previous, wind_direction, wind_speed, humidity, temperature)
+        if weather == previous:
+            return
+        self.wind_direction, self.wind_speed, self.humidity, self.temperature = weather
+        
+        wind_changed = wind_matrix_changed(previous, weather)
+        if wind_changed:
+            self.wind_effect_matrix = build_wind_effect_matrix(self.wind_direction, self.wind_speed)
+        self.metrics.count('weather_changes')
+        self._on_weather_changed(wind_changed)
+    
+    def _on_weather_changed(self, wind_changed: bool):
+        """
+        Вызывается после изменения погоды для перестройки производных таблиц.
+        
+        Args:
+            wind_changed (bool): Перестроена ли матрица влияния ветра.
+        """
+        pass
+    
+    def set_weather_schedule(self, schedule: WeatherSchedule):
+        """
+        Задает ряд погодных данных: перед каждым шагом погода берется из
+        schedule.at(step_count). None отключает ряд (погода сохраняется).
+        
+        Args:
+            schedule (WeatherSchedule): Ряд погодных данных.
+        """
+        self.weather_schedule = schedule
+        if schedule is not None:
+            self.set_weather(*schedule.at(self.step_count))
+    
+    def set_height_map(self, height_map: np.ndarray, cell_size=1.0):
+        """
+        Задает рельеф и заранее рассчитывает веса влияния уклона.
+        
+        Горящий сосед учитывается с весом, зависящим от уклона между ним и
+        клеткой, поэтому число горящих соседей становится дробным. Веса
+        рассчитываются один раз, и учет рельефа не добавляет работы на шаге.
+        None отключает учет рельефа.
+        
+        Args:
+            height_map (np.ndarray): Высоты клеток (м) размера карты растительности.
+            cell_size (float | tuple): Размер клетки в метрах (один или по X и по Y).
+        """
+        if height_map is None:
+            self.height_map = self.slope_weights = None
+            self.cell_size = 1.0
+            return
+        if height_map.shape != self.land_cover.shape:
+            raise ValueError("Размер рельефа не совпадает с картой растительности")
+        self.height_map = height_map
+        self.cell_size = cell_size
+        self.slope_weights = compute_slope_weights(height_map, cell_size)
+    
+    def load_terrain(self, dem_file: str, cell_size=None):
+        """
+        Загружает рельеф из файла (TIFF-формат), совмещая его с сеткой карты растительности.
+        
+        Args:
+            dem_file (str): Путь к файлу цифровой модели рельефа.
+            cell_size (float | tuple): Размер клетки в метрах (по умолчанию - по растру).
+        """
+        height_map, raster_cell_size = load_dem(dem_file, self.land_cover_file, self.land_cover.shape)
+        self.set_height_map(height_map, cell_size or raster_cell_size)
+    
+    def save_checkpoint(self, file_path: str):
+        """
+        Сохраняет состояние моделирования в сжатый файл NPZ.
+        
+        Сохраняются массивы состояния и счетчика горения, номер шага, погода,
+        ряд погодных данных, рельеф с размером клетки и состояние генератора
+        случайных чисел. Карта растительности сохраняется
+        ссылкой на исходный файл, а если автомат создан из массива - самим массивом.
+        
+        Args:
+            file_path (str): Путь к файлу контрольной точки.
+        """
+        meta = {
+            'automaton': type(self).__name__,
+            'step_count': self.step_count,
+            'wind_direction': self.wind_direction.name,
+            'wind_speed': self.wind_speed,
+            'humidity': self.humidity,
+            'temperature': self.temperature,
+            'land_cover_file': self.land_cover_file,
+            'rng_state': self.rng.state
+        }
+        arrays = dict(state=self.state, next_state=self.next_state, fire_duration=self.fire_duration)
+        if self.land_cover_file is None:
+            arrays['land_cover'] = self.land_cover
+        if self.weather_schedule is not None:
+            meta['weather_schedule'] = {
+                'records': self.weather_schedule.to_records(),
+                'interpolate': self.weather_schedule.interpolate,
+                'precision': self.weather_schedule.precision
+            }
+        if self.height_map is not None:
+            arrays['height_map'] = self.height_map
+            meta['cell_size'] = (float(self.cell_size) if np.isscalar(self.cell_size)
+                                 else [float(size) for size in self.cell_size])
+        np.savez_compressed(file_path, meta=np.array(json.dumps(meta)), **arrays)
+    
+    @classmethod
+    def load_checkpoint(cls, file_path: str, fuzzy_controller: FuzzyFireController,
+                        land_cover: Union[str, np.ndarray] = None) -> 'ForestFireAutomaton':
+        """
+        Создает автомат из контрольной точки.
+        
+        Args:
+            file_path (str): Путь к файлу контрольной точки.
+            fuzzy_controller (FuzzyFireController): Нечеткий контроллер.
+            land_cover (str | np.ndarray): Карта растительности вместо сохраненной
+                ссылки (например, если исходный файл перемещен).
+        
+        Returns:
+            ForestFireAutomaton: Автомат в сохраненном состоянии.
+        """
+        with np.load(file_path) as checkpoint:
+            meta = json.loads(str(checkpoint['meta']))
+            if land_cover is None:
+                land_cover = checkpoint['land_cover'] if meta['land_cover_file'] is None else meta['land_cover_file']
+            automaton = cls(land_cover, fuzzy_controller,
+                            wind_direction=WindDirection[meta['wind_direction']],
+                            wind_speed=meta['wind_speed'],
+                            humidity=meta['humidity'],
+                            temperature=meta['temperature'])
+            if checkpoint['state'].shape != automaton.state.shape:
+                raise ValueError("Размер карты растительности не совпадает с контрольной точкой")
+            automaton.state[...] = checkpoint['state']
+            automaton.next_state[...] = checkpoint['next_state']
+            automaton.fire_duration[...] = checkpoint['fire_duration']
+            if 'height_map' in checkpoint:
+                cell_size = meta['cell_size']
+                automaton.set_height_map(checkpoint['height_map'],
+                                         cell_size if np.isscalar(cell_size) else tuple(cell_size))
+        automaton.step_count = meta['step_count']
+        automaton.rng.state = meta['rng_state']
+        schedule = meta.get('weather_schedule')
+        if schedule is not None:
+            automaton.set_weather_schedule(WeatherSchedule.from_records(
+                schedule['records'], interpolate=schedule['interpolate'], precision=schedule['precision']))
+        automaton._on_state_loaded()
+        return automaton
+    
+    def _on_state_loaded(self):
+        """
+        Вызывается после восстановления массивов состояния из контрольной точки.
+        """
+        pass
+    
+    def fork(self, **weather) -> 'ForestFireAutomaton':
+        """
+        Создает независимую копию моделирования в текущем состоянии.
+        
+        Копия использует общие с исходным автоматом карту растительности и
+        нечеткий контроллер и копирует только изменяемые массивы состояния.
+        Генератор случайных чисел копируется вместе с состоянием.
+        
+        Args:
+            **weather: Параметры погоды ветви (см. set_weather).
+        
+        Returns:
+            ForestFireAutomaton: Копия автомата.
+        """
+        branch = copy.copy(self)
+        branch.rng = copy.deepcopy(self.rng)
+        branch.metrics = NULL_METRICS
+        branch._init_grid(self.land_type)
+        branch.state[...] = self.state
+        branch.next_state[...] = self.next_state
+        branch.fire_duration[...] = self.fire_duration
+        branch._on_forked(self)
+        if weather:
+            branch.set_weather(**weather)
+        return branch
+    
+    def _on_forked(self, source: 'ForestFireAutomaton'):
+        """
+        Копирует в ветвь изменяемое состояние подклассов, кроме массивов сетки.
+        
+        Args:
+            source (ForestFireAutomaton): Исходный автомат.
+        """
+        pass
+    
+    def burning_mask(self) -> np.ndarray:
+        """
+        Возвращает маску горящих клеток (IGNITION, FIRE, BURNING_OUT).
+        """
+        return (self.state >= FIRST_BURNING_STATE) & (self.state <= LAST_BURNING_STATE)
     
     def _update_cell(self, x: int, y: int):
         """
@@ -176,6 +479,8 @@ class ForestFireAutomaton:
             # Проверяем горящих соседей
             burning_neighbors, wind_dir = self._count_burning_neighbors(x, y)
             if burning_neighbors > 0:
+                self.candidate_count += 1
+                
                 # Рассчитываем вероятность возгорания с учетом нечеткой логики
                 prob = self.fuzzy_controller.compute_fire_probability(
                     self.wind_speed * wind_dir, self.humidity, burning_neighbors, self.temperature)
@@ -184,15 +489,13 @@ class ForestFireAutomaton:
                 prob *= LandCoverType.get_ignition_modifier(cell.land_type)
                 
                 # Применяем вероятность возгорания
-                if random.random() * 100 < prob:
+                if self._step_uniforms[y * self.width + x] * 100 < prob:
                     cell.next_state = CellState.IGNITION
         # Переходы между состояниями горения
-        elif cell.state == CellState.IGNITION and cell.fire_duration >= 1:
-            cell.next_state = CellState.FIRE
-        elif cell.state == CellState.FIRE and cell.fire_duration >= 8:
-            cell.next_state = CellState.BURNING_OUT
-        elif cell.state == CellState.BURNING_OUT and cell.fire_duration >= 9:
-            cell.next_state = CellState.ASH
+        else:
+            next_state = next_burning_state(cell.state, cell.fire_duration)
+            if next_state is not None:
+                cell.next_state = next_state
     
     def _count_burning_neighbors(self, x: int, y: int) -> int:
         """
@@ -207,56 +510,45 @@ class ForestFireAutomaton:
         """
         count = 0
         wind_dir = 0
-        current_height = self.height_map[y][x] if hasattr(self, 'height_map') else 0
+        slope_weights = self.slope_weights
         
         # Проверяем все 8 соседних клеток
-        for dy in [-1, 0, 1]:
-            for dx in [-1, 0, 1]:
-                if dx == 0 and dy == 0:
-                    continue  # Пропускаем текущую клетку
-                
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < self.width and 0 <= ny < self.height:
-                    if self.grid[ny][nx].state in [CellState.IGNITION, CellState.FIRE, CellState.BURNING_OUT]:
-                        neighbor_height = self.height_map[ny][nx] if hasattr(self, 'height_map') else 0
-                        height_diff = neighbor_height - current_height
-                        
-                        count += 1
-
-                        weight = self.wind_effect_matrix[dy+1][dx+1]
-
-                        if (weight == 1):
-                            wind_dir = 1
-                        elif (weight == 0.5 and wind_dir != 1):
-                            wind_dir = 0
-                        elif (weight == -1 and wind_dir != 1):
-                            wind_dir = -0.6
-                        elif (weight == -0.5 and wind_dir != 1):
-                            wind_dir = -0.6
+        for k, (dy, dx) in enumerate(NEIGHBOR_OFFSETS):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.width and 0 <= ny < self.height:
+                if FIRST_BURNING_STATE <= self.state[ny, nx] <= LAST_BURNING_STATE:
+                    # На ровной местности каждый сосед учитывается с весом 1
+                    count += 1 if slope_weights is None else float(slope_weights[k, y, x])
+                    wind_dir = combine_wind_factor(wind_dir, self.wind_effect_matrix[dy+1][dx+1])
 
+        if slope_weights is not None:
+            count = float(np.round(count, SLOPE_PRECISION))
         return (count, wind_dir)
     
+    def get_grid_numeric(self, state: np.ndarray = None) -> np.ndarray:
+        """
+        Возвращает числовое представление сетки для визуализации.
+        
+        Args:
+            state (np.ndarray): Снимок состояний клеток (по умолчанию - текущее состояние).
+        
+        Returns:
+            np.ndarray: Тип растительности для негоревших клеток и код
+                LandCoverType для клеток в состояниях пожара.
+        """
+        if state is None:
+            state = self.state
+        return land_cover_codes(state, self.land_type).astype(np.float64)
+    
     def visualize(self):
         """
         Визуализирует текущее состояние сетки с помощью matplotlib.
         """
+        import matplotlib.pyplot as plt
+        import matplotlib.colors as colors
+
         # Создаем числовое представление сетки
-        grid_numeric = np.zeros((self.height, self.width))
-        
-        # Заполняем сетку значениями в соответствии с состоянием клеток
-        for y in range(self.height):
-            for x in range(self.width):
-                cell = self.grid[y][x]
-                if cell.state == CellState.FOREST:
-                    grid_numeric[y][x] = cell.land_type
-                elif cell.state == CellState.IGNITION:
-                    grid_numeric[y][x] = LandCoverType.IGNITION.value
-                elif cell.state == CellState.FIRE:
-                    grid_numeric[y][x] = LandCoverType.FIRE.value
-                elif cell.state == CellState.BURNING_OUT:
-                    grid_numeric[y][x] = LandCoverType.BURNING_OUT.value
-                elif cell.state == CellState.ASH:
-                    grid_numeric[y][x] = LandCoverType.ASH.value
+        grid_numeric = self.get_grid_numeric()
         
         # Настраиваем цветовую карту
         cmap = LandCoverType.get_color_map()
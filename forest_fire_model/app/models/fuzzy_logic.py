@@ -1,135 +1,687 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+from typing import Optional
 import numpy as np
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
+
+# Каталог кэша скомпилированных контроллеров по умолчанию
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'forest_fire_cache')
+
+
+class LRUCache:
+    """
+    Потокобезопасный словарь ограниченного размера с вытеснением давно
+    не использованных записей и счетчиками попаданий и промахов.
+    """
+    def __init__(self, maxsize: int = 4096):
+        """
+        Args:
+            maxsize (int): Наибольшее число записей (0 - кэш отключен).
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def __getstate__(self):
+        # Блокировка не сериализуется (кэш передается в дочерние процессы)
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """
+        Возвращает значение по ключу или None, учитывая попадание или промах.
+        """
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data.move_to_end(key)
+            return value
+    
+    def put(self, key, value):
+        """
+        Сохраняет значение, вытесняя самую старую запись при переполнении.
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        """
+        Удаляет все записи и обнуляет счетчики.
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+class CompiledFuzzyInference:
+    """
+    Скомпилированная форма нечеткого контроллера для пакетного вывода.
+    
+    Функции принадлежности хранятся таблицами на универсумах переменных,
+    правила - матрицей индексов термов. Вывод повторяет схему Мамдани
+    из skfuzzy: И - минимум, накопление - максимум, дефаззификация по
+    центроиду на универсуме, дополненном точками пересечения термов
+    с уровнями отсечения. Поэтому результат совпадает с
+    FuzzyFireController.compute_fire_probability с точностью до ошибок
+    округления (расхождение не превышает 1e-9).
+    """
+    # Порядок входов совпадает с аргументами compute_fire_probability
+    INPUTS = ('wind_speed', 'humidity', 'burning_neighbors', 'temperature')
+    
+    def __init__(self, input_universes, input_mfs, rule_terms, rule_levels,
+                 output_universe, output_mfs, chunk_size: int = 1024, cache_size: int = 4096):
+        """
+        Args:
+            input_universes (list): Универсумы входных переменных (в порядке INPUTS).
+            input_mfs (list): Матрицы функций принадлежности (термы x универсум).
+            rule_terms (np.ndarray): Индексы термов входов для каждого правила (правила x 4).
+            rule_levels (np.ndarray): Индекс выходного терма для каждого правила.
+            output_universe (np.ndarray): Универсум выходной переменной.
+            output_mfs (np.ndarray): Матрица функций принадлежности выходных термов.
+            chunk_size (int): Число уникальных наборов входов, обрабатываемых за раз.
+            cache_size (int): Размер кэша результатов по наборам входов (0 - без кэша).
+        """
+        self.input_universes = [np.asarray(u, dtype=np.float64) for u in input_universes]
+        self.input_mfs = [np.asarray(m, dtype=np.float64) for m in input_mfs]
+        self.output_universe = np.asarray(output_universe, dtype=np.float64)
+        self.output_mfs = np.asarray(output_mfs, dtype=np.float64)
+        self.chunk_size = chunk_size
+        
+        # Счетчики: все запрошенные наборы входов и уникальные наборы в запросах
+        self.evaluations = 0
+        self.unique_evaluations = 0
+        
+        # Результаты по точным значениям входов. При постоянной погоде шаг автомата
+        # порождает лишь несколько десятков наборов (число соседей x коэффициент
+        # ветра); ключ включает погоду, поэтому ее смена не дает устаревших значений
+        self.cache = LRUCache(cache_size)
+        
+        # Правила сортируются по выходному терму, чтобы накопление
+        # выполнялось одним reduceat по каждому терму
+        order = np.argsort(rule_levels, kind='stable')
+        self.rule_terms = np.asarray(rule_terms)[order]
+        self.rule_levels = np.asarray(rule_levels)[order]
+        self.level_terms, self.level_starts = np.unique(self.rule_levels, return_index=True)
+        
+        # Наклонные отрезки выходных термов: только на них уровень отсечения
+        # может дать новую точку универсума
+        term_idx, seg_idx = np.nonzero(np.diff(self.output_mfs, axis=1) != 0)
+        self.seg_term = term_idx
+        self.seg_x1 = self.output_universe[seg_idx]
+        self.seg_x2 = self.output_universe[seg_idx + 1]
+        self.seg_y1 = self.output_mfs[term_idx, seg_idx]
+        self.seg_y2 = self.output_mfs[term_idx, seg_idx + 1]
+    
+    def compute(self, wind_speed, humidity, burning_neighbors, temperature) -> np.ndarray:
+        """
+        Рассчитывает вероятность возгорания для массивов входных значений.
+        
+        Args:
+            wind_speed, humidity, burning_neighbors, temperature: Скаляры или
+                массивы, приводимые к общей форме.
+            
+        Returns:
+            np.ndarray: Вероятности возгорания (0-100) той же формы, что и входы.
+        """
+        values = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in
+                                       (wind_speed, humidity, burning_neighbors, temperature)))
+        shape = values[0].shape
+        if values[0].size == 0:
+            return np.zeros(shape)
+        
+        # Входы ограничиваются универсумами, как в ControlSystemSimulation
+        inputs = np.stack([np.clip(v.ravel(), u[0], u[-1])
+                           for v, u in zip(values, self.input_universes)], axis=1)
+        
+        # Одинаковые наборы входов считаются один раз
+        unique, inverse = np.unique(inputs, axis=0, return_inverse=True)
+        self.evaluations += len(inputs)
+        self.unique_evaluations += len(unique)
+        result = self._lookup(unique)
+        return result[inverse.ravel()].reshape(shape)
+    
+    def _lookup(self, unique: np.ndarray) -> np.ndarray:
+        """
+        Возвращает результаты для уникальных наборов входов, вычисляя
+        только отсутствующие в кэше.
+        """
+        if self.cache.maxsize <= 0:
+            keys = None
+            missing = np.arange(len(unique))
+            result = np.empty(len(unique))
+        else:
+            keys = [tuple(row) for row in unique.tolist()]
+            cached = [self.cache.get(key) for key in keys]
+            missing = np.array([i for i, value in enumerate(cached) if value is None], dtype=np.intp)
+            result = np.array([np.nan if value is None else value for value in cached])
+        
+        for start in range(0, len(missing), self.chunk_size):
+            chunk = missing[start:start + self.chunk_size]
+            values = self._compute_unique(unique[chunk])
+            result[chunk] = values
+            if keys is not None:
+                for i, value in zip(chunk, values.tolist()):
+                    self.cache.put(keys[i], value)
+        return result
+    
+    def compute_fire_probabilities(self, wind_speed, humidity,
+                                   burning_neighbors, temperature) -> np.ndarray:
+        """
+        Псевдоним compute(): позволяет передавать скомпилированную форму
+        в автомат вместо FuzzyFireController (например, в дочерние процессы).
+        """
+        return self.compute(wind_speed, humidity, burning_neighbors, temperature)
+
+    def compute_fire_probability(self, wind_speed: float, humidity: float,
+                                 burning_neighbors: float, temperature: float) -> float:
+        """
+        Вероятность возгорания для одного набора входов: позволяет передавать
+        скомпилированную форму и в эталонный ForestFireAutomaton.
+        """
+        return float(self.compute(wind_speed, humidity, burning_neighbors, temperature))
+    
+    def compile(self) -> 'CompiledFuzzyInference':
+        """
+        Возвращает себя: скомпилированную форму можно передавать везде,
+        где ожидается FuzzyFireController.
+        """
+        return self
+    
+    def save(self, file_path: str):
+        """
+        Сохраняет таблицы функций принадлежности и матрицу правил в файл NPZ.
+        
+        Файл записывается во временный и затем переименовывается, поэтому
+        процессы, одновременно читающие кэш, не видят незаконченной записи.
+        
+        Args:
+            file_path (str): Путь к файлу.
+        """
+        arrays = {'rule_terms': self.rule_terms, 'rule_levels': self.rule_levels,
+                  'output_universe': self.output_universe, 'output_mfs': self.output_mfs}
+        for i, (universe, mfs) in enumerate(zip(self.input_universes, self.input_mfs)):
+            arrays[f'input_universe_{i}'] = universe
+            arrays[f'input_mfs_{i}'] = mfs
+        
+        directory = os.path.dirname(os.path.abspath(file_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    
+    @classmethod
+    def load(cls, file_path: str, **kwargs) -> 'CompiledFuzzyInference':
+        """
+        Загружает скомпилированную форму, сохраненную save().
+        
+        Args:
+            file_path (str): Путь к файлу.
+            **kwargs: chunk_size и cache_size.
+        """
+        with np.load(file_path) as data:
+            return cls(input_universes=[data[f'input_universe_{i}'] for i in range(len(cls.INPUTS))],
+                       input_mfs=[data[f'input_mfs_{i}'] for i in range(len(cls.INPUTS))],
+                       rule_terms=data['rule_terms'],
+                       rule_levels=data['rule_levels'],
+                       output_universe=data['output_universe'],
+                       output_mfs=data['output_mfs'],
+                       **kwargs)
+    
+    def stats(self) -> dict:
+        """
+        Возвращает накопленные счетчики вычислений.
+        """
+        return {'evaluations': self.evaluations, 'unique_evaluations': self.unique_evaluations,
+                'cache_hits': self.cache.hits, 'cache_misses': self.cache.misses}
+    
+    def _compute_unique(self, inputs: np.ndarray) -> np.ndarray:
+        """
+        Выполняет вывод для блока наборов входов (строки x 4).
+        """
+        # Фаззификация и активация правил (И = минимум)
+        strength = None
+        for i, (universe, mfs) in enumerate(zip(self.input_universes, self.input_mfs)):
+            membership = np.stack([np.interp(inputs[:, i], universe, mf) for mf in mfs], axis=1)
+            term_values = membership[:, self.rule_terms[:, i]]
+            strength = term_values if strength is None else np.minimum(strength, term_values)
+        
+        # Накопление по выходным термам (ИЛИ = максимум)
+        cuts = np.zeros((len(inputs), len(self.output_mfs)))
+        cuts[:, self.level_terms] = np.maximum.reduceat(strength, self.level_starts, axis=1)
+        
+        # Дополнение универсума точками, где термы пересекают уровень отсечения
+        level = cuts[:, self.seg_term]
+        crosses = (self.seg_y1 >= level) != (self.seg_y2 >= level)
+        crosses &= level > 0
+        extra = self.seg_x1 + (level - self.seg_y1) * (self.seg_x2 - self.seg_x1) / (self.seg_y2 - self.seg_y1)
+        extra = np.where(crosses, extra, self.seg_x1)
+        x = np.concatenate([np.broadcast_to(self.output_universe, (len(inputs), len(self.output_universe))),
+                            extra], axis=1)
+        x.sort(axis=1)
+        
+        # Агрегированная функция принадлежности выхода
+        y = np.zeros_like(x)
+        for k, mf in enumerate(self.output_mfs):
+            np.maximum(y, np.minimum(cuts[:, k:k + 1], np.interp(x, self.output_universe, mf)), out=y)
+        
+        # Центроид кусочно-линейной функции (точная площадь трапеций)
+        x1, x2 = x[:, :-1], x[:, 1:]
+        y1, y2 = y[:, :-1], y[:, 1:]
+        dx = x2 - x1
+        area = (0.5 * dx * (y1 + y2)).sum(axis=1)
+        moment = (dx * (x1 * (2 * y1 + y2) + x2 * (y1 + 2 * y2)) / 6.0).sum(axis=1)
+        
+        # Пустая выходная функция дает 0, как и compute_fire_probability
+        return np.where(area > 0, moment / np.maximum(area, np.finfo(float).eps), 0.0)
+
+
+# Определение нечеткого контроллера. Переменная: (имя, универсум (начало, конец, шаг)
+# для np.arange, термы (метка, функция принадлежности, параметры)). Порядок входов
+# совпадает с аргументами compute_fire_probability, порядок термов - с порядком их
+# объявления в переменных skfuzzy
+INPUT_VARIABLES = (
+    # Скорость ветра - 10 категорий
+    ('wind_speed', (-31, 31, 1), (
+        ('head storm', 'trapmf', (-30, -30, -25, -22)),
+        ('head strong', 'trapmf', (-25, -22, -18, -15)),
+        ('head moderate', 'trapmf', (-18, -15, -12, -10)),
+        ('head light', 'trapmf', (-12, -10, -5, -2)),
+        ('calm', 'trapmf', (-5, -2, 2, 5)),
+        ('fair light', 'trapmf', (2, 5, 10, 12)),
+        ('fair moderate', 'trapmf', (10, 12, 15, 18)),
+        ('fair strong', 'trapmf', (15, 18, 22, 25)),
+        ('fair storm', 'trapmf', (22, 25, 30, 30)),
+    )),
+    # Влажность - 4 категории
+    ('humidity', (0, 101, 1), (
+        ('humid', 'trapmf', (60, 70, 100, 100)),
+        ('normal', 'trapmf', (40, 50, 60, 70)),
+        ('dry', 'trapmf', (20, 30, 40, 50)),
+        ('very_dry', 'trapmf', (0, 0, 20, 30)),
+    )),
+    # Горящие соседи - 5 категорий
+    ('burning_neighbors', (0, 9, 1), (
+        ('none', 'trimf', (0, 0, 1)),
+        ('few', 'trimf', (0, 2, 4)),
+        ('some', 'trimf', (2, 4, 6)),
+        ('many', 'trimf', (4, 6, 8)),
+        ('all', 'trimf', (6, 8, 8)),
+    )),
+    # Температура - 4 категории
+    ('temperature', (-20, 51, 1), (
+        ('cold', 'trapmf', (-20, -20, 0, 10)),
+        ('cool', 'trapmf', (5, 10, 15, 20)),
+        ('warm', 'trapmf', (15, 20, 30, 35)),
+        ('hot', 'trapmf', (30, 35, 50, 50)),
+    )),
+)
+
+# Вероятность возгорания - 8 категорий
+OUTPUT_VARIABLE = ('fire_prob', (0, 101, 1), (
+    ('extremely_low', 'trapmf', (0, 0, 5, 15)),
+    ('very_low', 'trapmf', (5, 15, 20, 30)),
+    ('low', 'trapmf', (20, 30, 35, 45)),
+    ('medium_low', 'trapmf', (35, 45, 50, 60)),
+    ('medium', 'trapmf', (50, 60, 65, 75)),
+    ('medium_high', 'trapmf', (65, 75, 80, 90)),
+    ('high', 'trapmf', (80, 85, 90, 95)),
+    ('very_high', 'trapmf', (90, 95, 100, 100)),
+))
+
+# Категории правил и их веса в уровне вероятности возгорания
+TEMPERATURE_WEIGHTS = {'cold': 1, 'cool': 2, 'warm': 3, 'hot': 4}
+WIND_WEIGHTS = {'head light': -1, 'head moderate': -2, 'head strong': -3, 'head storm': -4, 'calm': 0,
+                'fair light': 2, 'fair moderate': 3, 'fair strong': 4, 'fair storm': 5}
+HUMIDITY_WEIGHTS = {'humid': 1, 'normal': 2, 'dry': 3, 'very_dry': 4}
+NEIGHBOR_WEIGHTS = {'none': 1, 'few': 2, 'some': 3, 'many': 4, 'all': 5}
+
+# Версия формата скомпилированной формы: входит в ключ кэша на диске
+COMPILED_FORMAT_VERSION = 1
+
+
+def membership_function(shape: str, universe: np.ndarray, params) -> np.ndarray:
+    """
+    Вычисляет функцию принадлежности skfuzzy (trapmf, trimf) на универсуме.
+    """
+    import skfuzzy as fuzz
+
+    return getattr(fuzz, shape)(universe, list(params))
+
+
+def fire_prob_level(temp: str, wind: str, humidity: str, neighbors: str) -> str:
+    """
+    Возвращает выходной терм правила для сочетания категорий входов.
+    """
+    total_weight = (
+        TEMPERATURE_WEIGHTS[temp] * 2 + 
+        WIND_WEIGHTS[wind] * 5 + 
+        HUMIDITY_WEIGHTS[humidity] * 3 + 
+        NEIGHBOR_WEIGHTS[neighbors] * 2
+    )
+
+    if total_weight < 10:
+        return 'extremely_low'
+    elif 10 <= total_weight < 15:
+        return 'very_low'
+    elif 15 <= total_weight < 20:
+        return 'low'
+    elif 20 <= total_weight < 25:
+        return 'medium_low'
+    elif 25 <= total_weight < 30:
+        return 'medium'
+    elif 30 <= total_weight < 35:
+        return 'medium_high'
+    elif 35 <= total_weight < 40:
+        return 'high'
+    else:
+        return 'very_high'
+
+
+def build_rule_table() -> list:
+    """
+    Строит таблицу правил: по правилу на каждое сочетание категорий.
+
+    Returns:
+        list: Кортежи (temp, wind, humidity, neighbors, level).
+    """
+    return [(temp, wind, humidity, neighbors, fire_prob_level(temp, wind, humidity, neighbors))
+            for temp in TEMPERATURE_WEIGHTS
+            for wind in WIND_WEIGHTS
+            for humidity in HUMIDITY_WEIGHTS
+            for neighbors in NEIGHBOR_WEIGHTS]
+
 
 class FuzzyFireController:
+    """
+    Нечеткий контроллер вероятности возгорания на skfuzzy.
+
+    Переменные и правила задаются определением (INPUT_VARIABLES, OUTPUT_VARIABLE,
+    build_rule_table). Система правил skfuzzy строится при первом поэлементном
+    вызове compute_fire_probability: для пакетного вывода достаточно
+    скомпилированной формы (см. также load_compiled_controller).
+    """
     
     def __init__(self):
+        from skfuzzy import control as ctrl
+
         # Входные переменные
-        self.wind_speed = ctrl.Antecedent(np.arange(-31, 31, 1), 'wind_speed')
-        self.humidity = ctrl.Antecedent(np.arange(0, 101, 1), 'humidity')
-        self.burning_neighbors = ctrl.Antecedent(np.arange(0, 9, 1), 'burning_neighbors')
-        self.temperature = ctrl.Antecedent(np.arange(-20, 51, 1), 'temperature')
+        self.wind_speed, self.humidity, self.burning_neighbors, self.temperature = (
+            ctrl.Antecedent(np.arange(*universe), name) for name, universe, _ in INPUT_VARIABLES)
         
         # Выходная переменная
-        self.fire_prob = ctrl.Consequent(np.arange(0, 101, 1), 'fire_prob')
+        name, universe, _ = OUTPUT_VARIABLE
+        self.fire_prob = ctrl.Consequent(np.arange(*universe), name)
         
         # Настройка функций принадлежности
         self._setup_membership_functions()
         # Создание системы правил
         self._setup_rules()
         
-        self.control_system = ctrl.ControlSystem(self.rules)
-        self.simulator = ctrl.ControlSystemSimulation(self.control_system)
+        # Система правил skfuzzy (строится по запросу)
+        self.control_system = None
+        self._simulator = None
+        
+        # Скомпилированная форма для пакетных вычислений (строится по запросу)
+        self._compiled = None
+        
+        # Количество вызовов compute_fire_probability и кэш их результатов
+        self.scalar_evaluations = 0
+        self.cache = LRUCache()
     
     def _setup_membership_functions(self):
-        # Скорость ветра - 10 категорий
-        self.wind_speed['head storm'] = fuzz.trapmf(self.wind_speed.universe, [-30, -30, -25, -22])
-        self.wind_speed['head strong'] = fuzz.trapmf(self.wind_speed.universe, [-25, -22, -18, -15])
-        self.wind_speed['head moderate'] = fuzz.trapmf(self.wind_speed.universe, [-18, -15, -12, -10])
-        self.wind_speed['head light'] = fuzz.trapmf(self.wind_speed.universe, [-12, -10, -5, -2])
-
-        self.wind_speed['calm'] = fuzz.trapmf(self.wind_speed.universe, [-5, -2, 2, 5])
-
-        self.wind_speed['fair light'] = fuzz.trapmf(self.wind_speed.universe, [2, 5, 10, 12])
-        self.wind_speed['fair moderate'] = fuzz.trapmf(self.wind_speed.universe, [10, 12, 15, 18])
-        self.wind_speed['fair strong'] = fuzz.trapmf(self.wind_speed.universe, [15, 18, 22, 25])
-        self.wind_speed['fair storm'] = fuzz.trapmf(self.wind_speed.universe, [22, 25, 30, 30])
-        
-        # Влажность - 4 категории
-        self.humidity['humid'] = fuzz.trapmf(self.humidity.universe, [60, 70, 100, 100])
-        self.humidity['normal'] = fuzz.trapmf(self.humidity.universe, [40, 50, 60, 70])
-        self.humidity['dry'] = fuzz.trapmf(self.humidity.universe, [20, 30, 40, 50])
-        self.humidity['very_dry'] = fuzz.trapmf(self.humidity.universe, [0, 0, 20, 30])
-        
-        # Горящие соседи - 5 категорий
-        self.burning_neighbors['none'] = fuzz.trimf(self.burning_neighbors.universe, [0, 0, 1])
-        self.burning_neighbors['few'] = fuzz.trimf(self.burning_neighbors.universe, [0, 2, 4])
-        self.burning_neighbors['some'] = fuzz.trimf(self.burning_neighbors.universe, [2, 4, 6])
-        self.burning_neighbors['many'] = fuzz.trimf(self.burning_neighbors.universe, [4, 6, 8])
-        self.burning_neighbors['all'] = fuzz.trimf(self.burning_neighbors.universe, [6, 8, 8])
-        
-        # Температура - 4 категории
-        self.temperature['cold'] = fuzz.trapmf(self.temperature.universe, [-20, -20, 0, 10])
-        self.temperature['cool'] = fuzz.trapmf(self.temperature.universe, [5, 10, 15, 20])
-        self.temperature['warm'] = fuzz.trapmf(self.temperature.universe, [15, 20, 30, 35])
-        self.temperature['hot'] = fuzz.trapmf(self.temperature.universe, [30, 35, 50, 50])
-        
-        # Вероятность возгорания - 8 категорий (можно оставить без изменений)
-        self.fire_prob['extremely_low'] = fuzz.trapmf(self.fire_prob.universe, [0, 0, 5, 15])
-        self.fire_prob['very_low'] = fuzz.trapmf(self.fire_prob.universe, [5, 15, 20, 30])
-        self.fire_prob['low'] = fuzz.trapmf(self.fire_prob.universe, [20, 30, 35, 45])
-        self.fire_prob['medium_low'] = fuzz.trapmf(self.fire_prob.universe, [35, 45, 50, 60])
-        self.fire_prob['medium'] = fuzz.trapmf(self.fire_prob.universe, [50, 60, 65, 75])
-        self.fire_prob['medium_high'] = fuzz.trapmf(self.fire_prob.universe, [65, 75, 80, 90])
-        self.fire_prob['high'] = fuzz.trapmf(self.fire_prob.universe, [80, 85, 90, 95])
-        self.fire_prob['very_high'] = fuzz.trapmf(self.fire_prob.universe, [90, 95, 100, 100])
+        variables = [self.wind_speed, self.humidity, self.burning_neighbors, self.temperature, self.fire_prob]
+        for variable, (_, _, terms) in zip(variables, INPUT_VARIABLES + (OUTPUT_VARIABLE,)):
+            for label, shape, params in terms:
+                variable[label] = membership_function(shape, variable.universe, params)
     
     def _setup_rules(self):
-        self.rules = []
-        
-        # Упрощенные категории
-        temp_categories = ['cold', 'cool', 'warm', 'hot']
-        wind_categories = ['head light', 'head moderate', 'head strong', 'head storm', 'calm', 'fair light', 'fair moderate', 'fair strong', 'fair storm']
-        humidity_categories = ['humid', 'normal', 'dry', 'very_dry']
-        neighbor_categories = ['none', 'few', 'some', 'many', 'all']
-        
-        # Обновленный маппинг весов
-        def get_fire_prob_level(temp, wind, humidity, neighbors):
-            temp_weights = {'cold': 1, 'cool': 2, 'warm': 3, 'hot': 4}
-            wind_weights = {'head light': -1, 'head moderate': -2, 'head strong': -3, 'head storm': -4, 'calm': 0, 'fair light': 2, 'fair moderate': 3, 'fair strong': 4, 'fair storm': 5}
-            humidity_weights = {'humid': 1, 'normal': 2, 'dry': 3, 'very_dry': 4}
-            neighbor_weights = {'none': 1, 'few': 2, 'some': 3, 'many': 4, 'all': 5}
-            
-            total_weight = (
-                temp_weights[temp] * 2 + 
-                wind_weights[wind] * 5 + 
-                humidity_weights[humidity] * 3 + 
-                neighbor_weights[neighbors] * 2
+        from skfuzzy import control as ctrl
+
+        # Таблица правил (temp, wind, humidity, neighbors, level) сохраняется
+        # отдельно: по ней строится скомпилированный механизм вывода
+        self.rule_table = build_rule_table()
+        self.rules = [
+            ctrl.Rule(
+                self.temperature[temp] & 
+                self.wind_speed[wind] & 
+                self.humidity[humidity] & 
+                self.burning_neighbors[neighbors],
+                self.fire_prob[level]
             )
+            for temp, wind, humidity, neighbors, level in self.rule_table
+        ]
+    
+    @property
+    def simulator(self):
+        """
+        Симулятор системы правил skfuzzy (построение графа 720 правил
+        занимает основное время создания контроллера).
+        """
+        if self._simulator is None:
+            from skfuzzy import control as ctrl
 
-            if total_weight < 10:
-                return 'extremely_low'
-            elif 10 <= total_weight < 15:
-                return 'very_low'
-            elif 15 <= total_weight < 20:
-                return 'low'
-            elif 20 <= total_weight < 25:
-                return 'medium_low'
-            elif 25 <= total_weight < 30:
-                return 'medium'
-            elif 30 <= total_weight < 35:
-                return 'medium_high'
-            elif 35 <= total_weight < 40:
-                return 'high'
-            else:
-                return 'very_high'
-        
-        # Генерация правил
-        for temp in temp_categories:
-            for wind in wind_categories:
-                for humidity in humidity_categories:
-                    for neighbors in neighbor_categories:
-                        level = get_fire_prob_level(temp, wind, humidity, neighbors)
-                        self.rules.append(
-                            ctrl.Rule(
-                                self.temperature[temp] & 
-                                self.wind_speed[wind] & 
-                                self.humidity[humidity] & 
-                                self.burning_neighbors[neighbors],
-                                self.fire_prob[level]
-                            )
-                        )
+            self.control_system = ctrl.ControlSystem(self.rules)
+            self._simulator = ctrl.ControlSystemSimulation(self.control_system)
+        return self._simulator
     
     def compute_fire_probability(self, wind_speed: float, humidity: float, 
                                burning_neighbors: int, temperature: float) -> float:
-        self.simulator.input['wind_speed'] = wind_speed
-        self.simulator.input['humidity'] = humidity
-        self.simulator.input['burning_neighbors'] = burning_neighbors
-        self.simulator.input['temperature'] = temperature
+        self.scalar_evaluations += 1
+        key = (float(wind_speed), float(humidity), float(burning_neighbors), float(temperature))
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        
+        simulator = self.simulator
+        simulator.input['wind_speed'] = wind_speed
+        simulator.input['humidity'] = humidity
+        simulator.input['burning_neighbors'] = burning_neighbors
+        simulator.input['temperature'] = temperature
         
         try:
-            self.simulator.compute()
-            return self.simulator.output['fire_prob']
+            simulator.compute()
+            result = simulator.output['fire_prob']
         except:
-            return 0.0
\ No newline at end of file
+            result = 0.0
+        self.cache.put(key, result)
+        return result
+    
+    def compile(self) -> CompiledFuzzyInference:
+        """
+        Возвращает скомпилированную форму контроллера (строится один раз).
+        
+        Использует те же функции принадлежности и ту же таблицу правил,
+        что и система skfuzzy.
+        
+        Returns:
+            CompiledFuzzyInference: Механизм пакетного вывода.
+        """
+        if self._compiled is None:
+            variables = [self.wind_speed, self.humidity, self.burning_neighbors, self.temperature]
+            self._compiled = _compile(
+                input_universes=[var.universe for var in variables],
+                input_terms=[{label: term.mf for label, term in var.terms.items()} for var in variables],
+                output_universe=self.fire_prob.universe,
+                output_terms={label: term.mf for label, term in self.fire_prob.terms.items()},
+                rule_table=self.rule_table
+            )
+        return self._compiled
+    
+    def stats(self) -> dict:
+        """
+        Возвращает накопленные счетчики вычислений: поэлементных (skfuzzy)
+        и пакетных (скомпилированная форма), а также попадания и промахи
+        кэшей обеих форм.
+        
+        Returns:
+            dict: scalar_evaluations, evaluations, unique_evaluations, cache_hits, cache_misses.
+        """
+        stats = {'scalar_evaluations': self.scalar_evaluations,
+                 'cache_hits': self.cache.hits, 'cache_misses': self.cache.misses}
+        if self._compiled is not None:
+            compiled = self._compiled.stats()
+            compiled['cache_hits'] += stats['cache_hits']
+            compiled['cache_misses'] += stats['cache_misses']
+            stats.update(compiled)
+        return stats
+    
+    def clear_cache(self):
+        """
+        Очищает кэши результатов (например, после изменения правил или
+        функций принадлежности).
+        """
+        self.cache.clear()
+        if self._compiled is not None:
+            self._compiled.cache.clear()
+    
+    def compute_fire_probabilities(self, wind_speed, humidity,
+                                   burning_neighbors, temperature) -> np.ndarray:
+        """
+        Пакетный вариант compute_fire_probability для массивов входов.
+        
+        Args:
+            wind_speed, humidity, burning_neighbors, temperature: Скаляры или
+                массивы, приводимые к общей форме.
+            
+        Returns:
+            np.ndarray: Вероятности возгорания (0-100).
+        """
+        return self.compile().compute(wind_speed, humidity, burning_neighbors, temperature)
+
+
+def _compile(input_universes, input_terms, output_universe, output_terms, rule_table,
+             **kwargs) -> CompiledFuzzyInference:
+    """
+    Строит скомпилированную форму по таблицам функций принадлежности.
+
+    Args:
+        input_universes (list): Универсумы входов (в порядке CompiledFuzzyInference.INPUTS).
+        input_terms (list): Для каждого входа словарь метка терма -> функция принадлежности.
+        output_universe (np.ndarray): Универсум выхода.
+        output_terms (dict): Метка выходного терма -> функция принадлежности.
+        rule_table (list): Правила (temp, wind, humidity, neighbors, level).
+        **kwargs: chunk_size и cache_size CompiledFuzzyInference.
+    """
+    term_labels = [list(terms) for terms in input_terms]
+    levels = list(output_terms)
+    
+    rule_terms = []
+    rule_levels = []
+    for temp, wind, humidity, neighbors, level in rule_table:
+        labels = (wind, humidity, neighbors, temp)
+        rule_terms.append([names.index(label) for names, label in zip(term_labels, labels)])
+        rule_levels.append(levels.index(level))
+    
+    return CompiledFuzzyInference(
+        input_universes=input_universes,
+        input_mfs=[list(terms.values()) for terms in input_terms],
+        rule_terms=np.array(rule_terms),
+        rule_levels=np.array(rule_levels),
+        output_universe=output_universe,
+        output_mfs=list(output_terms.values()),
+        **kwargs
+    )
+
+
+def controller_definition() -> dict:
+    """
+    Возвращает определение контроллера (переменные и правила) в виде,
+    сериализуемом в JSON.
+    """
+    return {'format': COMPILED_FORMAT_VERSION,
+            'inputs': INPUT_VARIABLES,
+            'output': OUTPUT_VARIABLE,
+            'rules': build_rule_table()}
+
+
+def definition_hash(definition: Optional[dict] = None) -> str:
+    """
+    Возвращает хеш SHA-256 определения контроллера (по умолчанию - текущего).
+    """
+    if definition is None:
+        definition = controller_definition()
+    data = json.dumps(definition, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def compile_definition(**kwargs) -> CompiledFuzzyInference:
+    """
+    Строит скомпилированную форму по определению, не создавая систему
+    правил skfuzzy. Результат совпадает с FuzzyFireController().compile().
+
+    Args:
+        **kwargs: chunk_size и cache_size CompiledFuzzyInference.
+    """
+    def tables(variable):
+        _, universe, terms = variable
+        universe = np.arange(*universe)
+        return universe, {label: membership_function(shape, universe, params)
+                          for label, shape, params in terms}
+
+    inputs = [tables(variable) for variable in INPUT_VARIABLES]
+    output_universe, output_terms = tables(OUTPUT_VARIABLE)
+    return _compile(input_universes=[universe for universe, _ in inputs],
+                    input_terms=[terms for _, terms in inputs],
+                    output_universe=output_universe,
+                    output_terms=output_terms,
+                    rule_table=build_rule_table(),
+                    **kwargs)
+
+
+def load_compiled_controller(cache_dir: Optional[str] = None, **kwargs) -> CompiledFuzzyInference:
+    """
+    Возвращает скомпилированный контроллер из кэша на диске.
+
+    Ключ кэша - хеш определения контроллера, поэтому изменение функций
+    принадлежности или правил дает новый файл. При промахе (или поврежденном
+    файле) форма строится по определению и сохраняется; если каталог кэша
+    недоступен для записи, контроллер просто не сохраняется.
+
+    Args:
+        cache_dir (str): Каталог кэша (по умолчанию DEFAULT_CACHE_DIR).
+        **kwargs: chunk_size и cache_size CompiledFuzzyInference.
+
+    Returns:
+        CompiledFuzzyInference: Скомпилированный контроллер.
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    file_path = os.path.join(cache_dir, f"fuzzy_controller.{definition_hash()}.npz")
+    try:
+        return CompiledFuzzyInference.load(file_path, **kwargs)
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        pass
+
+    compiled = compile_definition(**kwargs)
+    try:
+        compiled.save(file_path)
+    except OSError:
+        pass
+    return compiled
@@ -1,5 +1,5 @@
 from enum import Enum
-import matplotlib.colors as colors
+import numpy as np
 
 class LandCoverType(Enum):
     """
@@ -41,6 +41,8 @@ class LandCoverType(Enum):
         Returns:
             colors.ListedColormap: Цветовая карта, где каждому типу/состоянию соответствует цвет.
         """
+        import matplotlib.colors as colors
+
         colors_list = [
             '#05450a', '#086a10', '#54a708', '#78d203', '#009900',
             '#c6b044', '#dcd159', '#dade48', '#fbff13', '#b6ff05',
@@ -70,10 +72,27 @@ class LandCoverType(Enum):
         Returns:
             float: Модификатор (0.0-1.0), где 1.0 - высокая вероятность возгорания.
         """
-        modifiers = {
-            1: 0.9, 2: 0.7, 3: 0.8, 4: 0.6, 5: 0.75,
-            6: 0.5, 7: 0.5, 8: 0.4, 9: 0.3, 10: 0.2,
-            11: 0.1, 12: 0.3, 13: 0.05, 14: 0.25, 15: 0.0,
-            16: 0.05, 17: 0.0
-        }
-        return modifiers.get(land_type, 0.0)
\ No newline at end of file
+        return IGNITION_MODIFIERS.get(land_type, 0.0)
+
+    @classmethod
+    def get_ignition_modifier_table(cls) -> np.ndarray:
+        """
+        Возвращает таблицу модификаторов вероятности возгорания,
+        индексируемую кодом типа растительности (0-255).
+        
+        Returns:
+            np.ndarray: Массив из 256 модификаторов (0.0 для неизвестных кодов).
+        """
+        table = np.zeros(256)
+        for land_type, modifier in IGNITION_MODIFIERS.items():
+            table[land_type] = modifier
+        return table
+
+
+# Модификаторы вероятности возгорания по типам растительности
+IGNITION_MODIFIERS = {
+    1: 0.9, 2: 0.7, 3: 0.8, 4: 0.6, 5: 0.75,
+    6: 0.5, 7: 0.5, 8: 0.4, 9: 0.3, 10: 0.2,
+    11: 0.1, 12: 0.3, 13: 0.05, 14: 0.25, 15: 0.0,
+    16: 0.05, 17: 0.0
+}
\ No newline at end of file
@@ -0,0 +1,185 @@
+import json
+import os
+import time
+from contextlib import nullcontext
+from typing import Callable, Optional
+
+
+class _Phase:
+    """
+    Контекстный менеджер замера одной фазы шага.
+    """
+    __slots__ = ('_metrics', '_name', '_start')
+
+    def __init__(self, metrics: 'SimulationMetrics', name: str):
+        self._metrics = metrics
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._metrics._add_phase(self._name, self._start, time.perf_counter_ns())
+
+
+class SimulationMetrics:
+    """
+    Сбор показателей моделирования по шагам.
+
+    Для каждого шага записываются время фаз (мс) и счетчики: число
+    вычислений нечеткой логики, клеток-кандидатов и активных клеток,
+    доля повторных наборов входов нечеткого вывода. Запись шага
+    передается в callback, может дописываться строкой в файл JSON Lines и
+    сохраняться в формате Chrome Trace (chrome://tracing, Perfetto).
+
+    Атрибуты:
+        records (list): Записи завершенных шагов (если keep_records=True).
+    """
+    enabled = True
+
+    def __init__(self, callback: Optional[Callable[[dict], None]] = None,
+                 jsonl_file: Optional[str] = None,
+                 trace_file: Optional[str] = None,
+                 keep_records: bool = True):
+        """
+        Args:
+            callback: Функция, вызываемая с записью каждого шага.
+            jsonl_file (str): Файл для записей шагов в формате JSON Lines.
+            trace_file (str): Файл Chrome Trace, записываемый при close().
+            keep_records (bool): Хранить записи шагов в records (по умолчанию True).
+        """
+        self.callback = callback
+        self.trace_file = trace_file
+        self.keep_records = keep_records
+        self.records = []
+        self._jsonl = open(jsonl_file, 'w', encoding='utf-8') if jsonl_file else None
+        self._trace_events = [] if trace_file else None
+        self._origin = time.perf_counter_ns()
+        self._depth = 0
+        self._step = None
+        self._step_start = 0
+        self._phases = {}
+        self._counters = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def phase(self, name: str) -> _Phase:
+        """
+        Возвращает контекстный менеджер, замеряющий фазу name текущего шага.
+        """
+        return _Phase(self, name)
+
+    def count(self, name: str, value: float = 1):
+        """
+        Прибавляет value к счетчику name текущего шага.
+        """
+        self._counters[name] = self._counters.get(name, 0) + value
+
+    def begin_step(self, step: int):
+        """
+        Начинает запись шага. Вложенные вызовы (например, update() внутри
+        update_frame()) относятся к той же записи.
+        """
+        self._depth += 1
+        if self._depth == 1:
+            self._step = step
+            self._step_start = time.perf_counter_ns()
+            self._phases = {}
+            self._counters = {}
+
+    def end_step(self):
+        """
+        Завершает запись шага, если это внешний вызов.
+        """
+        self._depth -= 1
+        if self._depth > 0:
+            return
+        end = time.perf_counter_ns()
+        record = {
+            'step': self._step,
+            'wall_ms': (end - self._step_start) / 1e6,
+            'phases': {name: duration / 1e6 for name, duration in self._phases.items()},
+            'counters': self._counters,
+        }
+        if self.keep_records:
+            self.records.append(record)
+        if self._jsonl is not None:
+            self._jsonl.write(json.dumps(record) + '\n')
+        if self._trace_events is not None:
+            self._trace_events.append(self._trace_event(f'step {self._step}', self._step_start, end))
+            self._trace_events.append({'name': 'cells', 'ph': 'C', 'pid': os.getpid(), 'tid': 0,
+                                       'ts': (end - self._origin) / 1e3, 'args': self._counters})
+        if self.callback is not None:
+            self.callback(record)
+
+    def _add_phase(self, name: str, start: int, end: int):
+        self._phases[name] = self._phases.get(name, 0) + end - start
+        if self._trace_events is not None:
+            self._trace_events.append(self._trace_event(name, start, end))
+
+    def _trace_event(self, name: str, start: int, end: int) -> dict:
+        return {'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': 0,
+                'ts': (start - self._origin) / 1e3, 'dur': (end - start) / 1e3}
+
+    def summary(self) -> dict:
+        """
+        Возвращает суммарное время фаз (мс) и суммы счетчиков по сохраненным шагам;
+        для долей (счетчики *_rate) - среднее по шагам, где они записаны.
+        """
+        phases = {}
+        counters = {}
+        rate_steps = {}
+        for record in self.records:
+            for name, value in record['phases'].items():
+                phases[name] = phases.get(name, 0) + value
+            for name, value in record['counters'].items():
+                counters[name] = counters.get(name, 0) + value
+                if name.endswith('_rate'):
+                    rate_steps[name] = rate_steps.get(name, 0) + 1
+        for name, steps in rate_steps.items():
+            counters[name] /= steps
+        return {'steps': len(self.records), 'phases': phases, 'counters': counters}
+
+    def close(self):
+        """
+        Закрывает файл JSON Lines и записывает Chrome Trace.
+        """
+        if self._jsonl is not None:
+            self._jsonl.close()
+            self._jsonl = None
+        if self._trace_events is not None:
+            with open(self.trace_file, 'w', encoding='utf-8') as f:
+                json.dump({'traceEvents': self._trace_events, 'displayTimeUnit': 'ms'}, f)
+            self._trace_events = None
+
+
+class NullMetrics:
+    """
+    Отключенный сбор показателей: все методы ничего не делают.
+    """
+    enabled = False
+    _phase = nullcontext()
+
+    def phase(self, name: str):
+        return self._phase
+
+    def count(self, name: str, value: float = 1):
+        pass
+
+    def begin_step(self, step: int):
+        pass
+
+    def end_step(self):
+        pass
+
+    def close(self):
+        pass
+
+
+# Общий экземпляр отключенного сбора показателей
+NULL_METRICS = NullMetrics()
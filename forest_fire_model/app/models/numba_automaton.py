@@ -0,0 +1,120 @@
+import numpy as np
+from numba import njit
+
+from .cell import CellState
+from .vectorized_automaton import VectorizedForestFireAutomaton
+from .terrain import NEIGHBOR_OFFSETS
+from .rules import BURNING_TRANSITIONS, FIRST_BURNING_STATE, LAST_BURNING_STATE
+
+# Спецификация автомата в виде массивов для ядер Numba
+_OFFSETS = np.array(NEIGHBOR_OFFSETS, dtype=np.int64)
+_TRANSITIONS = np.array([(current.value, min_duration, following.value)
+                         for current, min_duration, following in BURNING_TRANSITIONS], dtype=np.int64)
+_FOREST = CellState.FOREST.value
+
+
+@njit(cache=True)
+def _front_candidates(burning_cells, state, height, width, offsets, code):
+    """
+    Находит лесные клетки с горящими соседями и их коды окрестности.
+
+    code - рабочий массив кодов размера сетки, заполненный нулями; после
+    вызова он снова заполнен нулями.
+    """
+    candidates = np.empty(burning_cells.size * offsets.shape[0], dtype=np.int64)
+    count = 0
+    for i in range(burning_cells.size):
+        y = burning_cells[i] // width
+        x = burning_cells[i] - y * width
+        for bit in range(offsets.shape[0]):
+            # Горящая клетка выставляет соседу бит своего положения относительно соседа
+            ny = y - offsets[bit, 0]
+            nx = x - offsets[bit, 1]
+            if ny < 0 or ny >= height or nx < 0 or nx >= width:
+                continue
+            cell = ny * width + nx
+            if state[cell] != _FOREST:
+                continue
+            if code[cell] == 0:
+                candidates[count] = cell
+                count += 1
+            code[cell] |= np.uint8(1 << bit)
+
+    candidates = np.sort(candidates[:count])
+    neighbor_code = np.empty(count, dtype=np.uint8)
+    for i in range(count):
+        neighbor_code[i] = code[candidates[i]]
+        code[candidates[i]] = 0
+    return candidates, neighbor_code
+
+
+@njit(cache=True)
+def _advance(burning_cells, ignited, state, next_state, fire_duration, transitions):
+    """
+    Выполняет переходы горящих клеток и применяет следующее состояние
+    к горящим и подожженным клеткам.
+
+    Returns:
+        np.ndarray: Упорядоченные индексы клеток, горящих после шага.
+    """
+    for i in range(burning_cells.size):
+        cell = burning_cells[i]
+        for t in range(transitions.shape[0]):
+            if state[cell] == transitions[t, 0]:
+                if fire_duration[cell] >= transitions[t, 1]:
+                    next_state[cell] = np.uint8(transitions[t, 2])
+                break
+
+    changed = np.sort(np.concatenate((burning_cells, ignited)))
+    burning = np.empty(changed.size, dtype=np.int64)
+    count = 0
+    for i in range(changed.size):
+        cell = changed[i]
+        state[cell] = next_state[cell]
+        if FIRST_BURNING_STATE <= state[cell] <= LAST_BURNING_STATE:
+            fire_duration[cell] += 1
+            burning[count] = cell
+            count += 1
+    return burning[:count].copy()
+
+
+class NumbaForestFireAutomaton(VectorizedForestFireAutomaton):
+    """
+    Векторизованный автомат, в котором обход фронта и переходы состояний
+    выполняются ядрами, скомпилированными Numba.
+
+    Вероятности возгорания и случайные числа разыгрываются так же, как в
+    VectorizedForestFireAutomaton, поэтому результат при одном зерне совпадает.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Рабочий массив кодов окрестности; вне шага заполнен нулями
+        self._neighbor_code = np.zeros(self.height * self.width, dtype=np.uint8)
+
+    def _update_front(self):
+        """
+        Обновляет только активные клетки (см. VectorizedForestFireAutomaton._update_front).
+        """
+        metrics = self.metrics
+        dirty_cells = self._take_dirty_cells()
+        next_state = self.next_state.ravel()
+
+        # Фаза 1: Расчет следующего состояния
+        with metrics.phase('neighbors'):
+            candidates, neighbor_code = _front_candidates(self.burning_cells, self.state.ravel(),
+                                                          self.height, self.width, _OFFSETS,
+                                                          self._neighbor_code)
+        self.candidate_count = candidates.size
+        if candidates.size:
+            with metrics.phase('fuzzy'):
+                self._ignite_candidates(candidates, neighbor_code)
+            ignited = candidates[next_state[candidates] == CellState.IGNITION.value]
+        else:
+            ignited = candidates
+
+        # Фаза 2: Переходы и применение следующего состояния (подожженные и
+        # измененные через grid[y][x] клетки не пересекаются с горящими)
+        with metrics.phase('apply_state'):
+            changed = np.union1d(ignited, dirty_cells) if dirty_cells.size else ignited
+            self.burning_cells = _advance(self.burning_cells, changed, self.state.ravel(), next_state,
+                                          self.fire_duration.ravel(), _TRANSITIONS)
@@ -0,0 +1,311 @@
+import copy
+import os
+import weakref
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Optional, Union
+import numpy as np
+from scipy import ndimage
+
+from .cell import CellState
+from .wind import WindDirection
+from .fuzzy_logic import FuzzyFireController
+from .vectorized_automaton import VectorizedForestFireAutomaton, NEIGHBOR_BITS, slope_fire_probabilities
+from .rules import FIRST_BURNING_STATE, LAST_BURNING_STATE, apply_burning_transitions
+
+# Массивы сетки, размещаемые в общей памяти
+SHARED_ARRAYS = ('state', 'next_state', 'fire_duration', 'land_type')
+
+
+def _share(array: np.ndarray):
+    """
+    Копирует массив в новый блок общей памяти.
+
+    Returns:
+        tuple: Блок общей памяти, массив в нем и описание массива для _attach().
+    """
+    memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)
+    shared[...] = array
+    return memory, shared, (memory.name, array.shape, array.dtype.str)
+
+
+def _attach(layout: dict):
+    """
+    Подключает массивы сетки из общей памяти по их описанию.
+
+    Returns:
+        tuple: Список блоков общей памяти и словарь массивов.
+    """
+    memories = []
+    arrays = {}
+    for name, (memory_name, shape, dtype) in layout.items():
+        memory = shared_memory.SharedMemory(name=memory_name)
+        memories.append(memory)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+    return memories, arrays
+
+
+def _tile_worker(connection, layout: dict, row_start: int, row_stop: int,
+                 ignition_modifiers: np.ndarray):
+    """
+    Процесс-исполнитель, обновляющий полосу строк [row_start, row_stop).
+
+    Команды принимаются через канал: 'terrain' - подключение весов уклона из
+    общей памяти (или их отключение), 'compute' - расчет следующего состояния
+    полосы, 'apply' - применение следующего состояния, 'stop' - завершение.
+    Между фазами все исполнители синхронизируются основным процессом, поэтому
+    в фазе расчета массив state не изменяется.
+    """
+    memories, arrays = _attach(layout)
+    state, next_state = arrays['state'], arrays['next_state']
+    fire_duration, land_type = arrays['fire_duration'], arrays['land_type']
+    height, width = state.shape
+    terrain_memories, slope_weights, fuzzy_controller = [], None, None
+
+    # Полоса с ореолом в одну строку сверху и снизу (если полоса не у края сетки)
+    halo_start, halo_stop = max(row_start - 1, 0), min(row_stop + 1, height)
+    inner = slice(row_start - halo_start, row_start - halo_start + row_stop - row_start)
+    halo = np.empty((halo_stop - halo_start, width), dtype=np.uint8)
+
+    try:
+        while True:
+            command, *args = connection.recv()
+            if command == 'stop':
+                break
+
+            if command == 'terrain':
+                slope_layout, fuzzy_controller = args
+                slope_weights = None
+                for memory in terrain_memories:
+                    memory.close()
+                terrain_memories = []
+                if slope_layout is not None:
+                    terrain_memories, terrain = _attach({'slope_weights': slope_layout})
+                    slope_weights = terrain.pop('slope_weights')
+                connection.send(None)
+
+            elif command == 'compute':
+                rng, step, probability_table, weather = args
+                # Обмен ореолом: копия строк полосы и соседних строк соседних полос
+                halo[...] = state[halo_start:halo_stop]
+                burning = (halo >= FIRST_BURNING_STATE) & (halo <= LAST_BURNING_STATE)
+                if not burning.any():
+                    connection.send(0)
+                    continue
+
+                neighbor_code = ndimage.correlate(burning.view(np.uint8), NEIGHBOR_BITS,
+                                                  mode='constant', cval=0)[inner]
+                strip_state = halo[inner]
+                candidates = np.flatnonzero((strip_state == CellState.FOREST.value) & (neighbor_code > 0))
+                if candidates.size:
+                    code = neighbor_code.ravel()[candidates]
+                    cells = candidates + row_start * width
+                    if slope_weights is None:
+                        prob = probability_table[code]
+                    else:
+                        prob = slope_fire_probabilities(fuzzy_controller, slope_weights, cells, code, *weather)
+                    prob *= np.take(ignition_modifiers, land_type.ravel()[cells], mode='clip')
+                    ignited = cells[rng.uniforms(step, cells) * 100 < prob]
+                    next_state.ravel()[ignited] = CellState.IGNITION.value
+
+                strip_next = next_state[row_start:row_stop]
+                duration = fire_duration[row_start:row_stop]
+                apply_burning_transitions(strip_state, duration, strip_next)
+                connection.send(candidates.size)
+
+            elif command == 'apply':
+                strip_state = state[row_start:row_stop]
+                strip_state[...] = next_state[row_start:row_stop]
+                burning = (strip_state >= FIRST_BURNING_STATE) & (strip_state <= LAST_BURNING_STATE)
+                fire_duration[row_start:row_stop][burning] += 1
+                connection.send(np.flatnonzero(burning) + row_start * width)
+    finally:
+        del state, next_state, fire_duration, land_type, arrays, slope_weights
+        for memory in memories + terrain_memories:
+            memory.close()
+
+
+def _shutdown(processes, connections, memories):
+    """
+    Останавливает исполнителей и освобождает общую память.
+    """
+    for connection in connections:
+        try:
+            connection.send(('stop',))
+        except (BrokenPipeError, OSError):
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    for memory in memories:
+        try:
+            memory.close()
+        except BufferError:
+            pass  # На массивы еще есть внешние ссылки: память освободится вместе с ними
+        memory.unlink()
+
+
+class ParallelForestFireAutomaton(VectorizedForestFireAutomaton):
+    """
+    Автомат лесного пожара с разбиением сетки на горизонтальные полосы,
+    каждую из которых обновляет отдельный процесс.
+
+    Массивы сетки размещаются в общей памяти. Шаг выполняется в две фазы с
+    синхронизацией между ними: в фазе расчета каждый процесс копирует свою
+    полосу вместе с граничными строками соседних полос (ореол в одну клетку),
+    поэтому подсчет соседей на границах полос точен. Случайные числа CounterRNG
+    зависят только от шага и индекса клетки, и результат при заданном зерне
+    не зависит от числа полос.
+
+    С рельефом веса уклона также размещаются в общей памяти, а вероятность
+    возгорания кандидатов рассчитывается в процессах полос скомпилированным
+    нечетким контроллером.
+
+    Процессы запускаются при создании автомата; после использования нужно
+    вызвать close() (или использовать автомат как контекстный менеджер).
+    Ветвь, созданная fork(), запускает собственные процессы и закрывается отдельно.
+    """
+    def __init__(self, land_cover_file: Union[str, np.ndarray],
+                 fuzzy_controller: FuzzyFireController,
+                 wind_direction: WindDirection = WindDirection.N,
+                 wind_speed: float = 0.0,
+                 humidity: float = 50.0,
+                 temperature: float = 15.0,
+                 seed=None,
+                 tiles: Optional[int] = None):
+        """
+        Args:
+            land_cover_file (str | np.ndarray): Путь к файлу с картой растительности (TIFF-формат)
+                или уже загруженная карта.
+            wind_direction, wind_speed, humidity, temperature: Параметры погоды.
+            seed: Зерно генератора случайных чисел (по умолчанию None).
+            tiles (int): Количество полос и процессов (по умолчанию - число ядер).
+        """
+        self._memories = []
+        self._slope_memory = None
+        super().__init__(land_cover_file, fuzzy_controller, wind_direction, wind_speed,
+                         humidity, temperature, seed=seed, track_front=False)
+
+        tiles = max(1, min(tiles or os.cpu_count() or 1, self.height))
+        bounds = np.linspace(0, self.height, tiles + 1).astype(int)
+        self.tiles = tiles
+
+        layout = {name: (memory.name, self.land_cover.shape, getattr(self, name).dtype.str)
+                  for name, memory in zip(SHARED_ARRAYS, self._memories)}
+        context = mp.get_context()
+        self._processes = []
+        self._connections = []
+        for row_start, row_stop in zip(bounds[:-1], bounds[1:]):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_tile_worker, daemon=True,
+                args=(child, layout, int(row_start), int(row_stop),
+                      self.ignition_modifiers))
+            process.start()
+            child.close()
+            self._processes.append(process)
+            self._connections.append(parent)
+
+        self._finalizer = weakref.finalize(self, _shutdown, self._processes, self._connections, self._memories)
+
+    def _init_grid(self, land_type: np.ndarray = None):
+        """
+        Создает сетку и переносит ее массивы в общую память.
+        """
+        super()._init_grid(land_type)
+        for name in SHARED_ARRAYS:
+            memory, shared, _ = _share(getattr(self.grid, name))
+            self._memories.append(memory)
+            setattr(self.grid, name, shared)
+            setattr(self, name, shared)
+
+    def set_height_map(self, height_map: np.ndarray, cell_size=1.0):
+        """
+        Задает рельеф (см. ForestFireAutomaton.set_height_map) и передает
+        исполнителям веса уклона через общую память.
+        """
+        super().set_height_map(height_map, cell_size)
+        previous = self._slope_memory
+        slope_layout = controller = None
+        if self.slope_weights is not None:
+            self._slope_memory, self.slope_weights, slope_layout = _share(self.slope_weights)
+            self._memories.append(self._slope_memory)
+            compile_controller = getattr(self.fuzzy_controller, 'compile', None)
+            controller = compile_controller() if compile_controller is not None else self.fuzzy_controller
+        else:
+            self._slope_memory = None
+        self._broadcast('terrain', slope_layout, controller)
+
+        # Исполнители отключились от прежних весов: блок можно освободить
+        if previous is not None:
+            self._memories.remove(previous)
+            previous.close()
+            previous.unlink()
+
+    def fork(self, **weather) -> 'ParallelForestFireAutomaton':
+        """
+        Создает независимую копию моделирования в текущем состоянии
+        (см. ForestFireAutomaton.fork).
+
+        Ветвь получает собственные процессы полос и общую память, в которые
+        копируются массивы состояния, рельеф и генератор случайных чисел.
+        Ветвь нужно закрыть отдельно от исходного автомата.
+        """
+        branch = type(self)(self.land_cover, self.fuzzy_controller, self.wind_direction, self.wind_speed,
+                            self.humidity, self.temperature, tiles=self.tiles)
+        branch.land_cover_file = self.land_cover_file
+        branch.rng = copy.deepcopy(self.rng)
+        branch.step_count = self.step_count
+        branch.weather_schedule = self.weather_schedule
+        branch.state[...] = self.state
+        branch.next_state[...] = self.next_state
+        branch.fire_duration[...] = self.fire_duration
+        branch._on_forked(self)
+        if self.height_map is not None:
+            branch.set_height_map(self.height_map, self.cell_size)
+        if weather:
+            branch.set_weather(**weather)
+        return branch
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """
+        Останавливает процессы и освобождает общую память.
+        """
+        # Ссылки на массивы общей памяти должны быть освобождены до ее закрытия
+        for name in SHARED_ARRAYS:
+            setattr(self, name, None)
+            setattr(self.grid, name, None)
+        self.slope_weights = None
+        self._finalizer()
+
+    def _broadcast(self, *message) -> list:
+        """
+        Передает команду всем исполнителям и дожидается их ответов.
+        """
+        for connection in self._connections:
+            connection.send(message)
+        return [connection.recv() for connection in self._connections]
+
+    def _step(self):
+        """
+        Обновляет состояние клеток сетки за один шаг.
+        """
+        self._pending_cells = []
+        self._dirty_cells = np.empty(0, dtype=np.int64)
+        with self.metrics.phase('compute_next_state'):
+            if self.slope_weights is None:
+                tables = (self.probability_table(), None)
+            else:
+                tables = (None, (self.wind_speed * self.wind_factor_table, self.humidity, self.temperature))
+            counts = self._broadcast('compute', self.rng, self.step_count + 1, *tables)
+        self.candidate_count = sum(counts)
+        with self.metrics.phase('apply_state'):
+            self.burning_cells = np.concatenate(self._broadcast('apply'))
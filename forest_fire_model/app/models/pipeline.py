@@ -0,0 +1,148 @@
+import queue
+import threading
+from typing import Any, Callable, Optional, Sequence
+
+# Признак конца потока элементов
+_STOP = object()
+
+
+class FramePipeline:
+    """
+    Конвейер стадий обработки кадров в фоновых потоках с ограниченными очередями.
+
+    Каждая стадия выполняется в своем потоке и получает результаты предыдущей
+    через очередь размера queue_size; результат последней стадии отбрасывается.
+    Потоки обрабатывают элементы по одному в порядке поступления, поэтому
+    порядок кадров сохраняется. Заполненная очередь блокирует submit()
+    (противодавление), так что моделирование не опережает отрисовку и
+    кодирование больше чем на queue_size кадров на стадию.
+
+    Ошибка стадии останавливает обработку: остальные стадии пропускают
+    оставшиеся элементы, а исключение повторно возбуждается в вызывающем
+    потоке при следующем submit() или в close().
+
+    Пример:
+        with FramePipeline([render, writer.write]) as pipeline:
+            for _ in range(frames):
+                automaton.update()
+                pipeline.submit(automaton.state.copy())
+    """
+    def __init__(self, stages: Sequence[Callable[[Any], Any]], queue_size: int = 4,
+                 names: Optional[Sequence[str]] = None):
+        """
+        Args:
+            stages (list): Функции стадий: принимают элемент и возвращают элемент следующей стадии.
+            queue_size (int): Размер очереди перед каждой стадией (по умолчанию 4).
+            names (list): Имена потоков стадий (для отладки).
+        """
+        if not stages:
+            raise ValueError("Конвейер должен содержать хотя бы одну стадию")
+        if queue_size < 1:
+            raise ValueError(f"Размер очереди должен быть положительным: {queue_size}")
+        names = list(names) if names is not None else [f'stage-{i}' for i in range(len(stages))]
+
+        self._queues = [queue.Queue(queue_size) for _ in stages]
+        self._threads = [
+            threading.Thread(target=self._run, args=(i, stage), name=f'FramePipeline-{name}', daemon=True)
+            for i, (stage, name) in enumerate(zip(stages, names))
+        ]
+        self._error = None
+        self._error_lock = threading.Lock()
+        self._failed = threading.Event()
+        self._started = False
+        self._closed = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # При исключении в вызывающем потоке оставшиеся кадры не обрабатываются,
+        # а ошибка стадии не заменяет исходное исключение
+        self.close(abort=exc_type is not None)
+
+    @property
+    def failed(self) -> bool:
+        """
+        True, если одна из стадий завершилась с ошибкой.
+        """
+        return self._failed.is_set()
+
+    def start(self):
+        """
+        Запускает потоки стадий.
+        """
+        if not self._started:
+            self._started = True
+            for thread in self._threads:
+                thread.start()
+
+    def submit(self, item):
+        """
+        Передает элемент первой стадии, ожидая места в очереди.
+
+        Raises:
+            Exception: Ошибка, с которой завершилась одна из стадий.
+        """
+        if self._closed:
+            raise RuntimeError("Конвейер уже закрыт")
+        self._raise_error()
+        self._queues[0].put(item)
+
+    def close(self, abort: bool = False):
+        """
+        Дожидается обработки переданных элементов и останавливает потоки.
+
+        Args:
+            abort (bool): Пропустить необработанные элементы и не возбуждать
+                ошибку стадии.
+
+        Raises:
+            Exception: Ошибка, с которой завершилась одна из стадий (если не abort).
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if abort:
+            self._failed.set()
+        if self._started:
+            self._queues[0].put(_STOP)
+            for thread in self._threads:
+                thread.join()
+        if not abort:
+            self._raise_error()
+
+    def _run(self, index: int, stage: Callable[[Any], Any]):
+        """
+        Цикл потока стадии: обрабатывает элементы до признака конца.
+
+        После ошибки любой стадии элементы только извлекаются из очереди, чтобы
+        предыдущие стадии не блокировались, а признак конца дошел до всех потоков.
+        """
+        inbox = self._queues[index]
+        outbox = self._queues[index + 1] if index + 1 < len(self._queues) else None
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                break
+            if self._failed.is_set():
+                continue
+            try:
+                result = stage(item)
+            except BaseException as exc:
+                self._fail(exc)
+                continue
+            if outbox is not None:
+                outbox.put(result)
+        if outbox is not None:
+            outbox.put(_STOP)
+
+    def _fail(self, exc: BaseException):
+        with self._error_lock:
+            if self._error is None:
+                self._error = exc
+        self._failed.set()
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,190 @@
+import math
+from typing import List, Optional, Tuple, Union
+import numpy as np
+
+from .cell import CellState
+from .wind import WindDirection
+from .fuzzy_logic import FuzzyFireController
+from .forest_fire_automaton import ForestFireAutomaton, INITIAL_FIRE_DURATION
+from .vectorized_automaton import VectorizedForestFireAutomaton
+
+
+def downsample_land_cover(land_cover: np.ndarray, factor: int) -> np.ndarray:
+    """
+    Уменьшает карту растительности в factor раз фильтром большинства.
+
+    Клетка грубой карты получает самый частый тип растительности своего
+    блока factor x factor (при равенстве - меньший код). Неполные блоки у
+    края дополняются повтором крайних клеток.
+
+    Args:
+        land_cover (np.ndarray): Карта растительности.
+        factor (int): Коэффициент уменьшения.
+
+    Returns:
+        np.ndarray: Карта размера (ceil(строки / factor), ceil(столбцы / factor)).
+    """
+    height, width = land_cover.shape
+    rows, cols = -(-height // factor), -(-width // factor)
+    padded = np.pad(land_cover, ((0, rows * factor - height), (0, cols * factor - width)), mode='edge')
+    blocks = padded.reshape(rows, factor, cols, factor).transpose(0, 2, 1, 3).reshape(rows * cols, -1)
+
+    # Коды типов растительности - небольшие неотрицательные числа: номера
+    # встречающихся типов берутся по таблице, а число клеток каждого типа в
+    # каждом блоке считается одним bincount по ключу (блок, тип)
+    classes = np.flatnonzero(np.bincount(padded.ravel()))
+    index = np.zeros(classes[-1] + 1, dtype=np.int64)
+    index[classes] = np.arange(classes.size)
+    keys = index[blocks] + (np.arange(rows * cols) * classes.size)[:, None]
+    counts = np.bincount(keys.ravel(), minlength=rows * cols * classes.size).reshape(rows * cols, classes.size)
+    return classes[np.argmax(counts, axis=1)].reshape(rows, cols).astype(land_cover.dtype)
+
+
+class WindowForestFireAutomaton(VectorizedForestFireAutomaton):
+    """
+    Векторизованный автомат, моделирующий прямоугольное окно большой карты.
+
+    Случайные числа разыгрываются по индексам клеток всей карты, поэтому,
+    пока пожар не выходит за окно, результат совпадает с моделированием всей карты.
+    """
+    def __init__(self, land_cover: np.ndarray, fuzzy_controller: FuzzyFireController,
+                 window: Tuple[int, int, int, int], full_width: int, **kwargs):
+        """
+        Args:
+            land_cover (np.ndarray): Полная карта растительности.
+            fuzzy_controller (FuzzyFireController): Нечеткий контроллер.
+            window (tuple): Границы окна (row_start, row_stop, col_start, col_stop).
+            full_width (int): Число столбцов полной карты.
+            **kwargs: Параметры погоды и зерно (см. VectorizedForestFireAutomaton).
+        """
+        row_start, row_stop, col_start, col_stop = window
+        super().__init__(land_cover[row_start:row_stop, col_start:col_stop], fuzzy_controller, **kwargs)
+        self.window = window
+        self.full_width = full_width
+
+    def _rng_cells(self, cells: np.ndarray) -> np.ndarray:
+        ys, xs = np.divmod(cells, self.width)
+        return (ys + self.window[0]) * self.full_width + xs + self.window[2]
+
+
+class PreviewResult:
+    """
+    Результат двухуровневого моделирования.
+
+    Атрибуты:
+        factor (int): Коэффициент уменьшения грубой карты.
+        shape (tuple): Размер полной карты.
+        coarse (VectorizedForestFireAutomaton): Автомат грубого прогона.
+        window (tuple): Окно точного прогона (row_start, row_stop, col_start, col_stop)
+            или None, если грубый прогон ничего не сжег.
+        fine (WindowForestFireAutomaton): Автомат точного прогона (None, если он не выполнялся).
+        clipped (bool): Пожар точного прогона дошел до границы окна внутри карты
+            (результат у границы может быть неполным).
+    """
+    def __init__(self, factor: int, shape: Tuple[int, int], coarse: VectorizedForestFireAutomaton):
+        self.factor = factor
+        self.shape = shape
+        self.coarse = coarse
+        self.window = None
+        self.fine = None
+        self.clipped = False
+
+    def coarse_footprint(self) -> np.ndarray:
+        """
+        Маска клеток полной карты, затронутых пожаром в грубом прогоне.
+        """
+        burned = self.coarse.state != CellState.FOREST.value
+        burned = burned.repeat(self.factor, axis=0).repeat(self.factor, axis=1)
+        return burned[:self.shape[0], :self.shape[1]]
+
+    def footprint(self) -> np.ndarray:
+        """
+        Маска клеток полной карты, затронутых пожаром в точном прогоне
+        (если он не выполнялся - в грубом).
+        """
+        if self.fine is None:
+            return self.coarse_footprint()
+        burned = np.zeros(self.shape, dtype=bool)
+        row_start, row_stop, col_start, col_stop = self.window
+        burned[row_start:row_stop, col_start:col_stop] = self.fine.state != CellState.FOREST.value
+        return burned
+
+
+def run_preview(land_cover: Union[str, np.ndarray],
+                fuzzy_controller: FuzzyFireController,
+                ignition_points: List[Tuple[int, int]],
+                steps: int,
+                factor: int = 4,
+                margin: Optional[int] = None,
+                wind_direction: WindDirection = WindDirection.N,
+                wind_speed: float = 0.0,
+                humidity: float = 50.0,
+                temperature: float = 15.0,
+                seed=None,
+                fine: bool = True) -> PreviewResult:
+    """
+    Двухуровневое моделирование: быстрый грубый прогон на уменьшенной карте,
+    затем точный прогон только в окне вокруг сгоревшей в грубом прогоне области.
+
+    Клетка грубой карты в factor раз больше, поэтому грубый прогон выполняет
+    ceil(steps / factor) шагов.
+
+    Args:
+        land_cover (str | np.ndarray): Путь к файлу карты растительности или сама карта.
+        fuzzy_controller (FuzzyFireController): Нечеткий контроллер.
+        ignition_points (list): Точки начального возгорания (x, y) на полной карте.
+        steps (int): Количество шагов точного прогона.
+        factor (int): Коэффициент уменьшения карты (по умолчанию 4).
+        margin (int): Запас вокруг сгоревшей области в клетках полной карты
+            (по умолчанию 2 * factor).
+        wind_direction, wind_speed, humidity, temperature: Параметры погоды.
+        seed: Зерно генератора случайных чисел.
+        fine (bool): Выполнять точный прогон (по умолчанию True).
+
+    Returns:
+        PreviewResult: Результаты обоих прогонов.
+    """
+    if isinstance(land_cover, str):
+        land_cover = ForestFireAutomaton.load_land_cover_tif(land_cover)
+    height, width = land_cover.shape
+    margin = 2 * factor if margin is None else margin
+    weather = dict(wind_direction=wind_direction, wind_speed=wind_speed,
+                   humidity=humidity, temperature=temperature, seed=seed)
+
+    coarse = VectorizedForestFireAutomaton(downsample_land_cover(land_cover, factor), fuzzy_controller, **weather)
+    for x, y in ignition_points:
+        coarse.ignite(x // factor, y // factor, INITIAL_FIRE_DURATION)
+    for _ in range(math.ceil(steps / factor)):
+        if coarse.is_extinct():
+            break
+        coarse.update()
+    result = PreviewResult(factor, (height, width), coarse)
+
+    # Окно точного прогона: сгоревшая область грубого прогона и точки возгорания с запасом
+    burned_rows, burned_cols = np.nonzero(coarse.state != CellState.FOREST.value)
+    rows = np.concatenate([burned_rows * factor, burned_rows * factor + factor - 1,
+                           [y for _, y in ignition_points]])
+    cols = np.concatenate([burned_cols * factor, burned_cols * factor + factor - 1,
+                           [x for x, _ in ignition_points]])
+    if not rows.size:
+        return result
+    result.window = (max(int(rows.min()) - margin, 0), min(int(rows.max()) + margin + 1, height),
+                     max(int(cols.min()) - margin, 0), min(int(cols.max()) + margin + 1, width))
+    if not fine:
+        return result
+
+    row_start, row_stop, col_start, col_stop = result.window
+    automaton = WindowForestFireAutomaton(land_cover, fuzzy_controller, result.window, width, **weather)
+    for x, y in ignition_points:
+        automaton.ignite(x - col_start, y - row_start, INITIAL_FIRE_DURATION)
+    for _ in range(steps):
+        if automaton.is_extinct():
+            break
+        automaton.update()
+    result.fine = automaton
+
+    # Пожар у границы окна, не совпадающей с краем карты, мог выйти за окно
+    burned = automaton.state != CellState.FOREST.value
+    result.clipped = bool((row_start > 0 and burned[0].any()) or (row_stop < height and burned[-1].any()) or
+                          (col_start > 0 and burned[:, 0].any()) or (col_stop < width and burned[:, -1].any()))
+    return result
@@ -0,0 +1,118 @@
+import numpy as np
+
+# Константы splitmix64
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+# Независимые потоки генератора
+STREAM_IGNITION = 0  # Розыгрыш возгорания клеток на шаге
+STREAM_DRAWS = 1  # Прочие запросы (например, ignite_random_cells)
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """
+    Хеш-функция splitmix64 над массивом uint64 (переполнение - по модулю 2^64).
+    """
+    x = x + _GOLDEN_GAMMA
+    x = (x ^ (x >> np.uint64(30))) * _MIX_1
+    x = (x ^ (x >> np.uint64(27))) * _MIX_2
+    return x ^ (x >> np.uint64(31))
+
+
+def _to_unit(bits: np.ndarray) -> np.ndarray:
+    """
+    Переводит 64-битные значения в числа float64 из [0, 1) (старшие 53 бита).
+    """
+    return (bits >> np.uint64(11)) * (1.0 / (1 << 53))
+
+
+class CounterRNG:
+    """
+    Счетный генератор случайных чисел: значение определяется только
+    зерном, номером потока, номером шага (или запроса) и индексом клетки.
+
+    В отличие от последовательного генератора результат не зависит от
+    порядка и разбиения запросов, поэтому клетки можно обрабатывать
+    частями, по одной или в разных процессах без изменения хода моделирования.
+
+    Атрибуты:
+        key (np.ndarray): Ключ генератора (uint64, один элемент).
+        counter (int): Номер следующего запроса в потоке STREAM_DRAWS.
+    """
+    def __init__(self, seed=None):
+        """
+        Args:
+            seed: Зерно (int, np.random.SeedSequence или None - случайное).
+        """
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.key = seed.generate_state(1, np.uint64)
+        self.counter = 0
+
+    @property
+    def state(self) -> dict:
+        """
+        Состояние генератора (сериализуемое в JSON).
+        """
+        return {'key': int(self.key[0]), 'counter': self.counter}
+
+    @state.setter
+    def state(self, value: dict):
+        self.key = np.array([value['key']], dtype=np.uint64)
+        self.counter = value['counter']
+
+    def _stream_key(self, stream: int, index: int) -> np.ndarray:
+        stream_key = _splitmix64(self.key ^ np.array([stream], dtype=np.uint64))
+        return _splitmix64(stream_key ^ np.array([index], dtype=np.uint64))
+
+    def uniforms(self, step: int, cells: np.ndarray) -> np.ndarray:
+        """
+        Возвращает равномерно распределенные числа [0, 1) для клеток на шаге.
+
+        Args:
+            step (int): Номер шага моделирования.
+            cells (np.ndarray): Плоские индексы клеток.
+
+        Returns:
+            np.ndarray: Массив float64 той же длины, что и cells.
+        """
+        step_key = self._stream_key(STREAM_IGNITION, step)
+        return _to_unit(_splitmix64(np.asarray(cells, dtype=np.uint64) ^ step_key))
+
+    def integers(self, high: int, size: int) -> np.ndarray:
+        """
+        Возвращает size целых чисел из [0, high) и продвигает счетчик запросов.
+
+        Args:
+            high (int): Верхняя граница (не включается).
+            size (int): Количество чисел.
+
+        Returns:
+            np.ndarray: Массив int64.
+        """
+        draw_key = self._stream_key(STREAM_DRAWS, self.counter)
+        self.counter += 1
+        values = _to_unit(_splitmix64(np.arange(size, dtype=np.uint64) ^ draw_key))
+        return (values * high).astype(np.int64)
+
+
+def stacked_uniforms(keys: np.ndarray, step: int, layers: np.ndarray, cells: np.ndarray) -> np.ndarray:
+    """
+    Равномерные числа [0, 1) для клеток нескольких генераторов одним запросом.
+
+    Число для клетки cells[i] совпадает с CounterRNG.uniforms(step, ...) генератора
+    с ключом keys[layers[i]].
+
+    Args:
+        keys (np.ndarray): Ключи генераторов (uint64).
+        step (int): Номер шага моделирования.
+        layers (np.ndarray): Номер генератора для каждой клетки.
+        cells (np.ndarray): Плоские индексы клеток.
+
+    Returns:
+        np.ndarray: Массив float64 той же длины, что и cells.
+    """
+    stream_keys = _splitmix64(keys ^ np.uint64(STREAM_IGNITION))
+    step_keys = _splitmix64(stream_keys ^ np.uint64(step))
+    return _to_unit(_splitmix64(np.asarray(cells, dtype=np.uint64) ^ step_keys[layers]))
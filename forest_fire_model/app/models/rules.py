@@ -0,0 +1,192 @@
+from typing import Iterable, List, Optional
+import numpy as np
+
+from .cell import CellState
+from .wind import WindDirection
+from .terrain import NEIGHBOR_OFFSETS
+
+# Общая спецификация автомата: все реализации шага (эталонная, NumPy, Numba)
+# берут правила переходов и учета ветра отсюда
+
+# Переходы между состояниями горения: (состояние, наименьшая продолжительность
+# горения, следующее состояние). Лес загорается только от горящих соседей
+BURNING_TRANSITIONS = (
+    (CellState.IGNITION, 1, CellState.FIRE),
+    (CellState.FIRE, 8, CellState.BURNING_OUT),
+    (CellState.BURNING_OUT, 9, CellState.ASH),
+)
+
+# Горящие состояния образуют непрерывный диапазон значений CellState
+FIRST_BURNING_STATE = CellState.IGNITION.value
+LAST_BURNING_STATE = CellState.BURNING_OUT.value
+
+# Коэффициент направления ветра по весу горящего соседа в матрице влияния ветра.
+# Сосед с весом DOWNWIND_WEIGHT (огонь идет по ветру) задает коэффициент
+# независимо от остальных, иначе действует последний в порядке обхода сосед
+DOWNWIND_WEIGHT = 1
+WIND_FACTORS = {1: 1, 0.5: 0, -1: -0.6, -0.5: -0.6}
+
+
+def next_burning_state(state: CellState, fire_duration: int) -> Optional[CellState]:
+    """
+    Возвращает следующее состояние горящей клетки (None - состояние не меняется).
+
+    Args:
+        state (CellState): Текущее состояние клетки.
+        fire_duration (int): Продолжительность горения.
+    """
+    for current, min_duration, following in BURNING_TRANSITIONS:
+        if state == current:
+            return following if fire_duration >= min_duration else None
+    return None
+
+
+def apply_burning_transitions(state: np.ndarray, fire_duration: np.ndarray, next_state: np.ndarray):
+    """
+    Записывает в next_state переходы горящих клеток (массивы одной формы).
+
+    Клетки без перехода сохраняют значение next_state.
+    """
+    for current, min_duration, following in BURNING_TRANSITIONS:
+        next_state[(state == current.value) & (fire_duration >= min_duration)] = following.value
+
+
+def combine_wind_factor(factor: float, weight: float) -> float:
+    """
+    Учитывает очередного горящего соседа с весом weight в коэффициенте ветра.
+
+    Args:
+        factor (float): Коэффициент по предыдущим соседям (0 - соседей не было).
+        weight (float): Вес соседа в матрице влияния ветра.
+    """
+    if factor == WIND_FACTORS[DOWNWIND_WEIGHT]:
+        return factor
+    return WIND_FACTORS.get(weight, factor)
+
+
+def wind_factor(weights: Iterable[float]) -> float:
+    """
+    Коэффициент ветра для горящих соседей с весами weights в порядке обхода.
+    """
+    factor = 0
+    for weight in weights:
+        factor = combine_wind_factor(factor, weight)
+    return factor
+
+
+def build_wind_effect_matrix(wind_direction: WindDirection, wind_speed: float) -> List[List[float]]:
+    """
+    Создает матрицу 3x3, описывающую влияние ветра на распространение огня.
+
+    Args:
+        wind_direction (WindDirection): Направление ветра.
+        wind_speed (float): Скорость ветра (при 0 направление не учитывается).
+
+    Returns:
+        List[List[float]]: Матрица влияния ветра.
+    """
+    matrix = [[-0.5 for _ in range(3)] for _ in range(3)]
+    matrix[1][1] = 0.0  # Центральная клетка (текущая) не учитывается
+
+    if wind_speed == 0:
+        return matrix
+
+    # Настройка матрицы в зависимости от направления ветра
+    if wind_direction == WindDirection.N:
+        matrix[0][1] = 1  # Север
+        matrix[0][0] = 0.5  # Северо-запад
+        matrix[0][2] = 0.5  # Северо-восток
+        matrix[2][0] = -1  # Юг
+        matrix[2][1] = -1  # Юго-запад
+        matrix[2][2] = -1  # Юго-восток
+    elif wind_direction == WindDirection.NE:
+        matrix[0][2] = 1  # Северо-восток
+        matrix[0][1] = 1  # Север
+        matrix[1][2] = 1  # Восток
+        matrix[2][0] = -1  # Юго-запад
+        matrix[1][0] = -1  # Запад
+        matrix[2][0] = -1  # Юг
+    elif wind_direction == WindDirection.E:
+        matrix[1][2] = 1  # Восток
+        matrix[0][2] = 0.5  # Северо-восток
+        matrix[2][2] = 0.5  # Юго-восток
+        matrix[1][0] = -1  # Запад
+        matrix[0][0] = -1  # Северо-запад
+        matrix[2][0] = -1  # Юго-запад
+    elif wind_direction == WindDirection.SE:
+        matrix[2][2] = 1  # Юго-восток
+        matrix[1][2] = 1  # Восток
+        matrix[2][1] = 1  # Юг
+        matrix[0][0] = -1  # Северо-запад
+        matrix[0][1] = -1  # Север
+        matrix[1][0] = -1  # Запад
+    elif wind_direction == WindDirection.S:
+        matrix[2][1] = 1  # Юг
+        matrix[2][0] = 0.5  # Юго-запад
+        matrix[2][2] = 0.5  # Юго-восток
+        matrix[0][1] = -1  # Север
+        matrix[0][0] = -1  # Северо-запад
+        matrix[0][2] = -1  # Северо-восток
+    elif wind_direction == WindDirection.SW:
+        matrix[2][0] = 1  # Юго-запад
+        matrix[2][1] = 1  # Юг
+        matrix[1][0] = 1  # Запад
+        matrix[0][2] = -1  # Северо-восток
+        matrix[0][1] = -1  # Север
+        matrix[1][2] = -1  # Восток
+    elif wind_direction == WindDirection.W:
+        matrix[1][0] = 1  # Запад
+        matrix[0][0] = 0.5  # Северо-запад
+        matrix[2][0] = 0.5  # Юго-запад
+        matrix[1][2] = -1  # Восток
+        matrix[0][2] = -1  # Северо-восток
+        matrix[2][2] = -1  # Юго-восток
+    elif wind_direction == WindDirection.NW:
+        matrix[0][0] = 1  # Северо-запад
+        matrix[0][1] = 1  # Север
+        matrix[1][0] = 1  # Запад
+        matrix[2][2] = -1  # Юго-восток
+        matrix[1][2] = -1  # Восток
+        matrix[2][1] = -1  # Юг
+
+    return matrix
+
+
+def build_wind_factor_table(wind_effect_matrix: List[List[float]]) -> np.ndarray:
+    """
+    Строит таблицу коэффициента направления ветра для каждого кода окрестности
+    (бит k - горит k-й сосед в порядке NEIGHBOR_OFFSETS).
+
+    Повторяет логику ForestFireAutomaton._count_burning_neighbors: коэффициент
+    равен 1, если горит хотя бы один сосед с весом 1, иначе определяется
+    последним (в порядке обхода) горящим соседом.
+
+    Returns:
+        np.ndarray: Массив из 256 коэффициентов.
+    """
+    table = np.zeros(256)
+    for code in range(256):
+        table[code] = wind_factor(wind_effect_matrix[dy+1][dx+1]
+                                  for bit, (dy, dx) in enumerate(NEIGHBOR_OFFSETS) if code & (1 << bit))
+    return table
+
+
+def merge_weather(weather: tuple, wind_direction: WindDirection = None, wind_speed: float = None,
+                  humidity: float = None, temperature: float = None) -> tuple:
+    """
+    Возвращает погоду weather с замененными заданными параметрами.
+
+    Args:
+        weather (tuple): Текущая погода (направление ветра, скорость ветра, влажность, температура).
+        wind_direction, wind_speed, humidity, temperature: Новые значения (None - без изменений).
+    """
+    updates = (wind_direction, wind_speed, humidity, temperature)
+    return tuple(current if update is None else update for current, update in zip(weather, updates))
+
+
+def wind_matrix_changed(previous: tuple, weather: tuple) -> bool:
+    """
+    Проверяет, нужно ли перестроить матрицу влияния ветра при смене погоды:
+    матрица зависит только от направления ветра и от того, есть ли ветер.
+    """
+    return (weather[0], weather[1] == 0) != (previous[0], previous[1] == 0)
@@ -0,0 +1,346 @@
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+
+from .cell import CellState
+from .wind import WindDirection
+from .fuzzy_logic import FuzzyFireController
+from .forest_fire_automaton import ForestFireAutomaton, INITIAL_FIRE_DURATION
+from .backends import BACKENDS, DEFAULT_BACKEND, create_automaton
+from .video_renderer import VideoRenderer
+from .weather import WeatherSchedule
+from .terrain import load_dem
+from .arrival_times import ArrivalTimeRecorder
+from .fire_statistics import FireStatisticsRecorder
+
+
+class Scenario:
+    """
+    Сценарий моделирования для пакетного режима.
+
+    Атрибуты:
+        name (str): Название сценария.
+        land_cover_file (str): Путь к файлу с картой растительности.
+        ignition_points (list): Точки начального возгорания (x, y).
+        frames (int): Количество шагов моделирования.
+        wind_direction (WindDirection): Направление ветра.
+        wind_speed (float): Скорость ветра.
+        humidity (float): Влажность воздуха.
+        temperature (float): Температура воздуха.
+        output (str): Путь к выходному видеофайлу (None - без видео).
+        scale (int): Масштаб кадра видео.
+        fps (int): Частота кадров видео.
+        seed (int): Зерно генератора случайных чисел.
+        weather_file (str): Файл ряда погодных данных (CSV/JSON, см. WeatherSchedule);
+            заменяет постоянную погоду сценария.
+        step_duration (float): Длительность шага в секундах для ряда со временем.
+        dem_file (str): Файл цифровой модели рельефа (None - без рельефа).
+        stop_when_extinct (bool): Завершить видео, когда пожар погас, вместо
+            повтора последнего кадра.
+        arrival_output (str): Путь к файлу шагов переходов клеток (NPZ или GeoTIFF,
+            см. ArrivalTimes; None - не сохранять).
+        stats_output (str): Путь к файлу показателей пожара по шагам (CSV или JSON Lines,
+            см. FireStatisticsRecorder; None - не сохранять).
+        backend (str): Реализация шага автомата (см. backends.BACKENDS).
+    """
+    def __init__(self, name: str, land_cover_file: str,
+                 ignition_points: List[Tuple[int, int]],
+                 frames: int = 50,
+                 wind_direction: WindDirection = WindDirection.N,
+                 wind_speed: float = 0.0,
+                 humidity: float = 50.0,
+                 temperature: float = 15.0,
+                 output: Optional[str] = None,
+                 scale: int = 1,
+                 fps: int = 5,
+                 seed: Optional[int] = None,
+                 weather_file: Optional[str] = None,
+                 step_duration: Optional[float] = None,
+                 dem_file: Optional[str] = None,
+                 stop_when_extinct: bool = False,
+                 arrival_output: Optional[str] = None,
+                 stats_output: Optional[str] = None,
+                 backend: str = DEFAULT_BACKEND):
+        self.name = name
+        self.land_cover_file = land_cover_file
+        self.ignition_points = ignition_points
+        self.frames = frames
+        self.wind_direction = wind_direction
+        self.wind_speed = wind_speed
+        self.humidity = humidity
+        self.temperature = temperature
+        self.output = output
+        self.scale = scale
+        self.fps = fps
+        self.seed = seed
+        self.weather_file = weather_file
+        self.step_duration = step_duration
+        self.dem_file = dem_file
+        self.stop_when_extinct = stop_when_extinct
+        self.arrival_output = arrival_output
+        self.stats_output = stats_output
+        self.backend = backend
+
+    @classmethod
+    def from_dict(cls, data: dict, index: int = 0, base_dir: str = '') -> 'Scenario':
+        """
+        Создает сценарий из словаря (объекта JSON/YAML или строки CSV).
+
+        Точки возгорания задаются списком пар [[x, y], ...], строкой "x:y;x:y"
+        или полями ignition_x и ignition_y. Относительные пути к файлам
+        отсчитываются от base_dir.
+
+        Args:
+            data (dict): Параметры сценария.
+            index (int): Порядковый номер сценария (для названия по умолчанию).
+            base_dir (str): Каталог файла сценариев.
+
+        Returns:
+            Scenario: Сценарий.
+        """
+        data = {key: value for key, value in data.items() if value not in (None, '')}
+
+        ignition = data.get('ignition_points', data.get('ignition'))
+        if ignition is None and 'ignition_x' in data:
+            ignition = [(data['ignition_x'], data['ignition_y'])]
+        if ignition is None:
+            raise ValueError(f"Сценарий {index}: не заданы точки возгорания")
+        if isinstance(ignition, str):
+            ignition = [point.split(':') for point in ignition.split(';') if point.strip()]
+        ignition_points = [(int(x), int(y)) for x, y in ignition]
+
+        backend = str(data.get('backend', DEFAULT_BACKEND))
+        if backend not in BACKENDS:
+            raise ValueError(f"Сценарий {index}: неизвестная реализация {backend}")
+
+        def resolve(path):
+            return path if path is None or os.path.isabs(path) else os.path.join(base_dir, path)
+
+        return cls(
+            name=str(data.get('name', f'scenario_{index}')),
+            land_cover_file=resolve(data['land_cover_file']),
+            ignition_points=ignition_points,
+            frames=int(data.get('frames', 50)),
+            wind_direction=WindDirection[str(data.get('wind_direction', 'N')).upper()],
+            wind_speed=float(data.get('wind_speed', 0.0)),
+            humidity=float(data.get('humidity', 50.0)),
+            temperature=float(data.get('temperature', 15.0)),
+            output=resolve(data.get('output')),
+            scale=int(data.get('scale', 1)),
+            fps=int(data.get('fps', 5)),
+            seed=int(data['seed']) if 'seed' in data else None,
+            weather_file=resolve(data.get('weather_file')),
+            step_duration=float(data['step_duration']) if 'step_duration' in data else None,
+            dem_file=resolve(data.get('dem_file')),
+            stop_when_extinct=str(data.get('stop_when_extinct', False)).lower() in ('1', 'true', 'yes'),
+            arrival_output=resolve(data.get('arrival_output')),
+            stats_output=resolve(data.get('stats_output')),
+            backend=backend
+        )
+
+
+def load_scenarios(file_path: str) -> List[Scenario]:
+    """
+    Читает сценарии из файла JSON, YAML или CSV (по расширению).
+
+    JSON и YAML содержат список сценариев или объект с ключом "scenarios";
+    в CSV каждая строка - отдельный сценарий.
+
+    Args:
+        file_path (str): Путь к файлу сценариев.
+
+    Returns:
+        list: Список сценариев.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    with open(file_path, encoding='utf-8', newline='') as f:
+        if extension == '.json':
+            data = json.load(f)
+        elif extension in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("Для чтения сценариев YAML требуется пакет PyYAML")
+            data = yaml.safe_load(f)
+        elif extension == '.csv':
+            data = list(csv.DictReader(f))
+        else:
+            raise ValueError(f"Неподдерживаемый формат файла сценариев: {extension}")
+
+    if isinstance(data, dict):
+        data = data['scenarios']
+    base_dir = os.path.dirname(os.path.abspath(file_path))
+    return [Scenario.from_dict(item, index, base_dir) for index, item in enumerate(data)]
+
+
+class LandCoverCache:
+    """
+    Кэш загруженных карт растительности: сценарии с общим файлом
+    читают его с диска один раз.
+
+    При заданном maxsize хранится не более maxsize карт, дольше всего не
+    использовавшиеся вытесняются. Измененный на диске файл загружается заново.
+    """
+    def __init__(self, maxsize: Optional[int] = None):
+        """
+        Args:
+            maxsize (int): Наибольшее число карт в кэше (по умолчанию None - без ограничения).
+        """
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, file_path: str) -> np.ndarray:
+        """
+        Возвращает карту растительности, загружая ее при первом обращении
+        через ForestFireAutomaton.load_land_cover_tif.
+        """
+        key = (os.path.abspath(file_path), os.stat(file_path).st_mtime_ns)
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            else:
+                self._data[key] = ForestFireAutomaton.load_land_cover_tif(file_path)
+                if self.maxsize is not None and len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+            return self._data[key]
+
+
+class ScenarioRunner:
+    """
+    Пакетное выполнение сценариев в одном процессе с общим нечетким
+    контроллером и кэшем карт растительности.
+    """
+    def __init__(self, fuzzy_controller: FuzzyFireController, workers: int = 1,
+                 cache_size: Optional[int] = None, verbose: bool = True):
+        """
+        Args:
+            fuzzy_controller (FuzzyFireController): Нечеткий контроллер, общий для всех
+                сценариев, или его скомпилированная форма.
+            workers (int): Количество одновременно выполняемых сценариев (по умолчанию 1).
+            cache_size (int): Наибольшее число карт растительности в кэше (по умолчанию без ограничения).
+            verbose (bool): Печатать ход записи видео и завершение сценариев (по умолчанию True).
+        """
+        self.fuzzy_controller = fuzzy_controller
+        self.workers = workers
+        self.verbose = verbose
+        self.land_covers = LandCoverCache(cache_size)
+
+        # Компиляция выполняется заранее, чтобы потоки не строили ее одновременно
+        if isinstance(fuzzy_controller, FuzzyFireController):
+            fuzzy_controller.compile()
+
+    def run(self, scenarios: List[Scenario]) -> List[dict]:
+        """
+        Выполняет сценарии; при workers > 1 независимые сценарии выполняются параллельно.
+
+        Args:
+            scenarios (list): Список сценариев.
+
+        Returns:
+            list: Сводка по каждому сценарию в исходном порядке.
+        """
+        if self.workers <= 1:
+            return [self._report(self.run_scenario(scenario)) for scenario in scenarios]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return [self._report(summary) for summary in executor.map(self.run_scenario, scenarios)]
+
+    def _report(self, summary: dict) -> dict:
+        """
+        Печатает завершение сценария (время выполнения есть и в самой сводке).
+        """
+        if self.verbose:
+            print(f"Сценарий {summary['name']} завершён за {summary['seconds']:.1f} с")
+        return summary
+
+    def run_scenario(self, scenario: Scenario,
+                     on_progress: Optional[Callable[[int, int], None]] = None) -> dict:
+        """
+        Выполняет один сценарий.
+
+        Args:
+            scenario (Scenario): Сценарий.
+            on_progress: Функция, вызываемая после каждого шага с номером шага
+                и числом горящих клеток.
+
+        Returns:
+            dict: Название, число сгоревших клеток, путь к видео, число выполненных
+                шагов и время выполнения.
+        """
+        start = time.perf_counter()
+        automaton = create_automaton(
+            land_cover_file=self.land_covers.get(scenario.land_cover_file),
+            fuzzy_controller=self.fuzzy_controller,
+            backend=scenario.backend,
+            wind_direction=scenario.wind_direction,
+            wind_speed=scenario.wind_speed,
+            humidity=scenario.humidity,
+            temperature=scenario.temperature,
+            seed=scenario.seed
+        )
+        if scenario.dem_file:
+            automaton.set_height_map(*load_dem(scenario.dem_file, scenario.land_cover_file))
+        if scenario.weather_file:
+            automaton.set_weather_schedule(WeatherSchedule.from_file(scenario.weather_file, scenario.step_duration))
+        for x, y in scenario.ignition_points:
+            automaton.ignite(x, y, INITIAL_FIRE_DURATION)
+        recorder = None
+        if scenario.arrival_output:
+            import rasterio
+
+            with rasterio.open(scenario.land_cover_file) as src:
+                recorder = ArrivalTimeRecorder(automaton, src.profile)
+        statistics = None
+        if scenario.stats_output:
+            # Показатели дописываются в файл после каждого шага
+            os.makedirs(os.path.dirname(os.path.abspath(scenario.stats_output)), exist_ok=True)
+            statistics = FireStatisticsRecorder(automaton, scenario.stats_output, keep_records=False)
+
+        def on_step():
+            if recorder is not None:
+                recorder.record()
+            if statistics is not None:
+                statistics.record()
+            if on_progress is not None:
+                on_progress(automaton.step_count, automaton.burning_count())
+
+        try:
+            if scenario.output:
+                os.makedirs(os.path.dirname(os.path.abspath(scenario.output)), exist_ok=True)
+                steps = VideoRenderer(automaton, scenario.output, fps=scenario.fps, scale=scenario.scale,
+                                      verbose=self.verbose).render(
+                    scenario.frames, stop_when_extinct=scenario.stop_when_extinct, on_step=on_step)
+            else:
+                # Когда пожар погас, дальнейшие шаги не меняют результат
+                steps = 0
+                while steps < scenario.frames and not automaton.is_extinct():
+                    automaton.update()
+                    on_step()
+                    steps += 1
+        finally:
+            if statistics is not None:
+                statistics.close()
+
+        if recorder is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(scenario.arrival_output)), exist_ok=True)
+            recorder.arrival_times.save(scenario.arrival_output)
+
+        summary = {
+            'name': scenario.name,
+            'burned_cells': int(np.count_nonzero(automaton.state != CellState.FOREST.value)),
+            'output': scenario.output,
+            'arrival_output': scenario.arrival_output,
+            'stats_output': scenario.stats_output,
+            'steps': steps,
+            'seconds': time.perf_counter() - start
+        }
+        return summary
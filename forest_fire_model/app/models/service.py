@@ -0,0 +1,383 @@
+import asyncio
+import base64
+import itertools
+import json
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Optional
+
+from .fuzzy_logic import FuzzyFireController
+from .scenarios import Scenario, ScenarioRunner
+
+# Выходные файлы сценария, которые можно получить командой fetch
+OUTPUT_FIELDS = ('output', 'arrival_output', 'stats_output')
+
+# Состояние процесса-исполнителя: исполнитель сценариев с общим контроллером
+# и кэшем карт растительности и очередь событий хода выполнения
+_worker_runner = None
+_worker_events = None
+
+
+def _init_worker(controller, cache_size: int, events):
+    """
+    Инициализирует процесс-исполнитель один раз при запуске пула.
+    """
+    global _worker_runner, _worker_events
+    # Сообщения о ходе выполнения передаются событиями заданий, а не в stdout службы
+    _worker_runner = ScenarioRunner(controller, cache_size=cache_size, verbose=False)
+    _worker_events = events
+
+
+def _warm_up() -> int:
+    """
+    Пустая задача, запускающая процесс-исполнитель заранее.
+    """
+    return os.getpid()
+
+
+def _run_job(job_id: int, data: dict, base_dir: str, progress_interval: int) -> dict:
+    """
+    Выполняет сценарий задания в процессе-исполнителе, передавая ход выполнения в очередь событий.
+    """
+    try:
+        scenario = Scenario.from_dict(data, job_id, base_dir)
+        _worker_events.put({'job': job_id, 'event': 'started', 'name': scenario.name})
+
+        def on_progress(step: int, burning: int):
+            if step % progress_interval == 0:
+                _worker_events.put({'job': job_id, 'event': 'progress', 'step': step,
+                                    'frames': scenario.frames, 'burning': burning})
+
+        return _worker_runner.run_scenario(scenario, on_progress)
+    finally:
+        # Последнее событие задания: все события хода выполнения уже в очереди
+        _worker_events.put({'job': job_id, 'event': 'finished'})
+
+
+class Job:
+    """
+    Задание службы моделирования.
+
+    Атрибуты:
+        id (int): Номер задания.
+        status (str): queued, running, done или failed.
+        result (dict): Сводка по сценарию (после выполнения).
+        error (str): Сообщение об ошибке (если задание завершилось неудачно).
+        events (list): События хода выполнения.
+    """
+    def __init__(self, job_id: int, scenario: dict):
+        self.id = job_id
+        self.scenario = scenario
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.events = []
+        self.done = asyncio.Event()
+        self._finished = asyncio.Event()
+        self._watchers = set()
+
+    def info(self) -> dict:
+        info = {'job': self.id, 'status': self.status}
+        if self.result is not None:
+            info['result'] = self.result
+        if self.error is not None:
+            info['error'] = self.error
+        return info
+
+    def publish(self, event: dict):
+        self.events.append(event)
+        for watcher in self._watchers:
+            watcher.put_nowait(event)
+
+    async def watch(self) -> AsyncIterator[dict]:
+        """
+        Возвращает уже произошедшие и новые события задания до его завершения.
+        """
+        queue = asyncio.Queue()
+        for event in self.events:
+            queue.put_nowait(event)
+        self._watchers.add(queue)
+        try:
+            while True:
+                event = await queue.get()
+                yield event
+                if event['event'] in ('done', 'failed'):
+                    break
+        finally:
+            self._watchers.discard(queue)
+
+
+class SimulationService:
+    """
+    Локальная служба моделирования: принимает сценарии по протоколу JSON Lines
+    (один объект JSON в строке) через TCP или сокет Unix и выполняет их в
+    пуле заранее запущенных процессов.
+
+    Каждый процесс пула один раз получает скомпилированный нечеткий
+    контроллер и хранит кэш последних карт растительности, поэтому
+    задание не тратит время на импорт модулей и построение контроллера.
+
+    Команды (поле command):
+        ping - проверка связи;
+        submit - постановка сценария в очередь (scenario - параметры Scenario.from_dict);
+        status - состояние задания (job);
+        jobs - состояние всех заданий;
+        watch - поток событий задания до завершения (started, progress, done/failed);
+        result - сводка по завершенному заданию (wait - дождаться завершения);
+        fetch - содержимое выходного файла задания в base64 (output - поле сценария).
+    """
+    def __init__(self, fuzzy_controller: FuzzyFireController,
+                 workers: Optional[int] = None,
+                 cache_size: int = 8,
+                 base_dir: str = '.',
+                 progress_interval: int = 1):
+        """
+        Args:
+            fuzzy_controller (FuzzyFireController): Нечеткий контроллер.
+            workers (int): Количество процессов пула (по умолчанию - число ядер).
+            cache_size (int): Наибольшее число карт растительности в кэше процесса (по умолчанию 8).
+            base_dir (str): Каталог для относительных путей сценариев (по умолчанию текущий).
+            progress_interval (int): Интервал шагов между событиями progress (по умолчанию 1).
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.base_dir = os.path.abspath(base_dir)
+        self.progress_interval = max(1, progress_interval)
+        self.jobs = {}
+        self._job_ids = itertools.count(1)
+        self._server = None
+        self._loop = None
+
+        context = mp.get_context()
+        self._events = context.Queue()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                         initializer=_init_worker,
+                                         initargs=(fuzzy_controller.compile(), cache_size, self._events))
+        self._event_thread = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765, unix_path: Optional[str] = None):
+        """
+        Запускает процессы пула и начинает принимать соединения.
+
+        Args:
+            host (str): Адрес TCP (по умолчанию только локальный).
+            port (int): Порт TCP (0 - любой свободный).
+            unix_path (str): Путь к сокету Unix вместо TCP.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._event_thread = threading.Thread(target=self._forward_events, daemon=True)
+        self._event_thread.start()
+
+        # Процессы запускаются и инициализируются до первого задания
+        await asyncio.gather(*(self._loop.run_in_executor(self._pool, _warm_up)
+                               for _ in range(self.workers)))
+
+        if unix_path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+
+    @property
+    def address(self):
+        """
+        Адрес, на котором служба принимает соединения.
+        """
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """
+        Прекращает прием соединений и останавливает пул.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._events.put(None)
+        if self._event_thread is not None:
+            self._event_thread.join()
+
+    def _forward_events(self):
+        """
+        Передает события из процессов пула в цикл событий службы.
+        """
+        while True:
+            event = self._events.get()
+            if event is None:
+                break
+            self._loop.call_soon_threadsafe(self._on_event, event)
+
+    def _on_event(self, event: dict):
+        job = self.jobs.get(event['job'])
+        if job is None:
+            return
+        if event['event'] == 'finished':
+            job._finished.set()
+            return
+        if event['event'] == 'started':
+            job.status = 'running'
+        job.publish(event)
+
+    def submit(self, scenario: dict) -> Job:
+        """
+        Ставит сценарий в очередь пула.
+
+        Args:
+            scenario (dict): Параметры сценария (см. Scenario.from_dict).
+
+        Returns:
+            Job: Задание.
+        """
+        # Ошибки в параметрах сообщаются сразу, а не после ожидания в очереди
+        Scenario.from_dict(scenario, 0, self.base_dir)
+        job = Job(next(self._job_ids), scenario)
+        self.jobs[job.id] = job
+        asyncio.ensure_future(self._run(job))
+        return job
+
+    async def _run(self, job: Job):
+        future = self._loop.run_in_executor(self._pool, _run_job, job.id, job.scenario,
+                                            self.base_dir, self.progress_interval)
+        try:
+            job.result = await future
+            job.status = 'done'
+        except Exception as error:
+            job.error = f"{type(error).__name__}: {error}"
+            job.status = 'failed'
+        # Итоговое событие публикуется после всех событий хода выполнения; если
+        # процесс-исполнитель аварийно завершился, последнего события не будет
+        try:
+            await asyncio.wait_for(job._finished.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            pass
+        job.publish({'job': job.id, 'event': job.status, **job.info()})
+        job.done.set()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Обслуживает соединение клиента: каждая строка - отдельная команда.
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    async for response in self._dispatch(request):
+                        writer.write(json.dumps(response, ensure_ascii=False).encode() + b'\n')
+                        await writer.drain()
+                except Exception as error:
+                    writer.write(json.dumps({'error': f"{type(error).__name__}: {error}"},
+                                            ensure_ascii=False).encode() + b'\n')
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _job(self, request: dict) -> Job:
+        job = self.jobs.get(request.get('job'))
+        if job is None:
+            raise KeyError(f"Задание {request.get('job')} не найдено")
+        return job
+
+    async def _dispatch(self, request: dict) -> AsyncIterator[dict]:
+        command = request.get('command')
+        if command == 'ping':
+            yield {'pong': True, 'workers': self.workers}
+        elif command == 'submit':
+            yield self.submit(request['scenario']).info()
+        elif command == 'status':
+            yield self._job(request).info()
+        elif command == 'jobs':
+            yield {'jobs': [job.info() for job in self.jobs.values()]}
+        elif command == 'watch':
+            async for event in self._job(request).watch():
+                yield event
+        elif command == 'result':
+            job = self._job(request)
+            if request.get('wait'):
+                await job.done.wait()
+            yield job.info()
+        elif command == 'fetch':
+            job = self._job(request)
+            field = request.get('output', 'output')
+            if field not in OUTPUT_FIELDS:
+                raise ValueError(f"Неизвестный выходной файл: {field}")
+            if job.status != 'done' or not job.result.get(field):
+                raise ValueError(f"Задание {job.id} не имеет выходного файла {field}")
+            with open(job.result[field], 'rb') as f:
+                data = base64.b64encode(f.read()).decode('ascii')
+            yield {'job': job.id, 'output': field, 'file': os.path.basename(job.result[field]), 'data': data}
+        else:
+            raise ValueError(f"Неизвестная команда: {command}")
+
+
+class ServiceClient:
+    """
+    Клиент службы моделирования (asyncio).
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def connect(cls, host: str = '127.0.0.1', port: int = 8765,
+                      unix_path: Optional[str] = None) -> 'ServiceClient':
+        if unix_path is not None:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+
+    async def _send(self, request: dict):
+        self._writer.write(json.dumps(request, ensure_ascii=False).encode() + b'\n')
+        await self._writer.drain()
+
+    async def _receive(self) -> dict:
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionError("Служба закрыла соединение")
+        response = json.loads(line)
+        if 'error' in response and 'job' not in response:
+            raise RuntimeError(response['error'])
+        return response
+
+    async def call(self, command: str, **arguments) -> dict:
+        """
+        Выполняет команду с одним ответом (ping, submit, status, jobs, result, fetch).
+        """
+        await self._send({'command': command, **arguments})
+        return await self._receive()
+
+    async def submit(self, scenario: dict) -> int:
+        """
+        Ставит сценарий в очередь и возвращает номер задания.
+        """
+        return (await self.call('submit', scenario=scenario))['job']
+
+    async def watch(self, job: int) -> AsyncIterator[dict]:
+        """
+        Возвращает события задания до его завершения.
+        """
+        await self._send({'command': 'watch', 'job': job})
+        while True:
+            event = await self._receive()
+            yield event
+            if event.get('event') in ('done', 'failed'):
+                break
+
+    async def fetch(self, job: int, output: str = 'output') -> bytes:
+        """
+        Возвращает содержимое выходного файла задания.
+        """
+        return base64.b64decode((await self.call('fetch', job=job, output=output))['data'])
@@ -0,0 +1,419 @@
+import numpy as np
+from typing import Optional, Sequence, Tuple, Union
+
+from .cell import CellState
+from .wind import WindDirection
+from .fuzzy_logic import FuzzyFireController
+from .land_cover import LandCoverType
+from .forest_fire_automaton import ForestFireAutomaton
+from .vectorized_automaton import NEIGHBOR_COUNT_TABLE
+from .rng import CounterRNG, stacked_uniforms
+from .metrics import NULL_METRICS
+from .weather import WeatherSchedule
+from .terrain import NEIGHBOR_OFFSETS, compute_slope_weights, weighted_neighbor_count
+from .rules import (FIRST_BURNING_STATE, LAST_BURNING_STATE, apply_burning_transitions, build_wind_effect_matrix,
+                    build_wind_factor_table, merge_weather, wind_matrix_changed)
+
+# Фронт обрабатывается плотными сдвигами всей стопки, если горящих клеток не
+# меньше 1 / DENSE_FRONT_RATIO от всех клеток (иначе - по индексам соседей фронта)
+DENSE_FRONT_RATIO = 64
+
+
+class Realisation:
+    """
+    Погода и генератор случайных чисел одной реализации стопки.
+
+    Таблицы ветра строятся теми же функциями rules, что и в одиночных автоматах.
+
+    Атрибуты:
+        rng (CounterRNG): Генератор случайных чисел реализации.
+        wind_direction, wind_speed, humidity, temperature: Текущая погода.
+        weather_schedule (WeatherSchedule): Ряд погодных данных (или None).
+        wind_factor_table (np.ndarray): Коэффициент ветра для каждого кода окрестности.
+    """
+    def __init__(self, seed, wind_direction: WindDirection, wind_speed: float,
+                 humidity: float, temperature: float):
+        self.rng = CounterRNG(seed)
+        self.wind_direction = wind_direction
+        self.wind_speed = wind_speed
+        self.humidity = humidity
+        self.temperature = temperature
+        self.weather_schedule = None
+        self.wind_effect_matrix = build_wind_effect_matrix(wind_direction, wind_speed)
+        self.wind_factor_table = build_wind_factor_table(self.wind_effect_matrix)
+
+    @property
+    def weather(self) -> tuple:
+        return self.wind_direction, self.wind_speed, self.humidity, self.temperature
+
+    def set_weather(self, wind_direction: WindDirection = None, wind_speed: float = None,
+                    humidity: float = None, temperature: float = None) -> bool:
+        """
+        Изменяет погоду реализации (см. ForestFireAutomaton.set_weather).
+
+        Returns:
+            bool: True, если погода изменилась.
+        """
+        previous = self.weather
+        weather = merge_weather(previous, wind_direction, wind_speed, humidity, temperature)
+        if weather == previous:
+            return False
+        self.wind_direction, self.wind_speed, self.humidity, self.temperature = weather
+        if wind_matrix_changed(previous, weather):
+            self.wind_effect_matrix = build_wind_effect_matrix(self.wind_direction, self.wind_speed)
+            self.wind_factor_table = build_wind_factor_table(self.wind_effect_matrix)
+        return True
+
+
+class StackedForestFireAutomaton:
+    """
+    Автомат, моделирующий N независимых реализаций на одной карте растительности
+    как один массив состояний формы (N, строки, столбцы).
+
+    Реализации различаются зерном, точками возгорания и погодой. Шаг
+    выполняется для всех реализаций одними операциями над массивами по общему
+    фронту пожара, а вероятности возгорания всех реализаций берутся из одной
+    таблицы (N, 256), которая строится одним пакетным нечетким выводом и
+    перестраивается только после изменения погоды. Поэтому накладные расходы
+    Python на шаг не растут с числом реализаций.
+
+    Реализация k дает тот же результат, что VectorizedForestFireAutomaton с
+    зерном, погодой и точками возгорания этой реализации.
+
+    Атрибуты:
+        count (int): Число реализаций.
+        state, next_state, fire_duration (np.ndarray): Массивы формы (N, строки, столбцы).
+        land_type (np.ndarray): Общая карта типов растительности (строки, столбцы).
+        realisations (list): Погода и генераторы реализаций (Realisation).
+        burning_cells (np.ndarray): Плоские индексы горящих клеток в массиве (N, строки, столбцы).
+    """
+    def __init__(self, land_cover_file: Union[str, np.ndarray],
+                 fuzzy_controller: FuzzyFireController,
+                 count: int,
+                 wind_direction: Union[WindDirection, Sequence[WindDirection]] = WindDirection.N,
+                 wind_speed: Union[float, Sequence[float]] = 0.0,
+                 humidity: Union[float, Sequence[float]] = 50.0,
+                 temperature: Union[float, Sequence[float]] = 15.0,
+                 seed=None):
+        """
+        Args:
+            land_cover_file (str | np.ndarray): Путь к файлу с картой растительности (TIFF-формат)
+                или уже загруженная карта.
+            fuzzy_controller (FuzzyFireController): Нечеткий контроллер (или его скомпилированная форма).
+            count (int): Число реализаций.
+            wind_direction, wind_speed, humidity, temperature: Погода - общая для всех
+                реализаций или последовательность из count значений.
+            seed: Зерно: последовательность из count зерен реализаций или одно зерно,
+                из которого зерна реализаций получаются через SeedSequence.spawn
+                (как в run_ensemble).
+        """
+        if isinstance(land_cover_file, np.ndarray):
+            self.land_cover = land_cover_file
+        else:
+            self.land_cover = ForestFireAutomaton.load_land_cover_tif(land_cover_file)
+        self.height, self.width = self.land_cover.shape
+        self.count = count
+        self.fuzzy_controller = fuzzy_controller
+
+        land_type = self.land_cover
+        if land_type.dtype != np.uint8:
+            land_type = np.clip(land_type, 0, 255).astype(np.uint8)
+        self.land_type = land_type
+        shape = (count, self.height, self.width)
+        self.state = np.zeros(shape, dtype=np.uint8)
+        self.next_state = np.zeros(shape, dtype=np.uint8)
+        self.fire_duration = np.zeros(shape, dtype=np.int16)
+
+        if isinstance(seed, (list, tuple)):
+            seeds = list(seed)
+        else:
+            if not isinstance(seed, np.random.SeedSequence):
+                seed = np.random.SeedSequence(seed)
+            seeds = seed.spawn(count)
+        weather = [_per_realisation(value, count, name) for value, name in
+                   ((wind_direction, 'wind_direction'), (wind_speed, 'wind_speed'),
+                    (humidity, 'humidity'), (temperature, 'temperature'))]
+        if len(seeds) != count:
+            raise ValueError(f"Ожидалось {count} зерен, получено {len(seeds)}")
+        self.realisations = [Realisation(seeds[k], *(values[k] for values in weather)) for k in range(count)]
+        self._rng_keys = np.concatenate([realisation.rng.key for realisation in self.realisations])
+
+        self.ignition_modifiers = LandCoverType.get_ignition_modifier_table()
+        self._probability_table = None
+        self.slope_weights = None
+        self.step_count = 0
+        self.metrics = NULL_METRICS
+        self.candidate_count = 0
+        self.burning_cells = np.empty(0, dtype=np.int64)
+        self._pending_cells = []
+        # Рабочий массив кодов окрестности для обработки фронта; вне шага заполнен нулями
+        self._neighbor_code = np.zeros(self.state.size, dtype=np.uint8)
+
+    def ignite(self, realisation: int, x: int, y: int, fire_duration: int = 0):
+        """
+        Поджигает клетку в одной реализации (как ForestFireAutomaton.ignite).
+
+        Args:
+            realisation (int): Номер реализации.
+            x (int): Координата X клетки.
+            y (int): Координата Y клетки.
+            fire_duration (int): Начальное значение счетчика горения (по умолчанию 0).
+        """
+        self.state[realisation, y, x] = CellState.IGNITION.value
+        self.fire_duration[realisation, y, x] = fire_duration
+        self._pending_cells.append((realisation * self.height + y) * self.width + x)
+
+    def set_weather(self, realisation: int, wind_direction: WindDirection = None, wind_speed: float = None,
+                    humidity: float = None, temperature: float = None):
+        """
+        Изменяет погоду одной реализации; таблица вероятностей перестраивается
+        перед следующим шагом, только если погода действительно изменилась.
+
+        Args:
+            realisation (int): Номер реализации.
+            wind_direction, wind_speed, humidity, temperature: Новые значения
+                (None - оставить текущее).
+        """
+        if self.realisations[realisation].set_weather(wind_direction, wind_speed, humidity, temperature):
+            self._probability_table = None
+            self.metrics.count('weather_changes')
+
+    def set_weather_schedule(self, realisation: int, schedule: Optional[WeatherSchedule]):
+        """
+        Задает ряд погодных данных одной реализации (None - отключить).
+
+        Args:
+            realisation (int): Номер реализации.
+            schedule (WeatherSchedule): Ряд погодных данных.
+        """
+        self.realisations[realisation].weather_schedule = schedule
+
+    def set_height_map(self, height_map: Optional[np.ndarray], cell_size=1.0):
+        """
+        Задает общий для всех реализаций рельеф (см. ForestFireAutomaton.set_height_map).
+        """
+        if height_map is None:
+            self.slope_weights = None
+            return
+        if height_map.shape != (self.height, self.width):
+            raise ValueError("Размер рельефа не совпадает с картой растительности")
+        self.slope_weights = compute_slope_weights(height_map, cell_size)
+
+    def probability_table(self) -> np.ndarray:
+        """
+        Возвращает вероятности возгорания (0-100) для каждой реализации и кода
+        окрестности при текущей погоде реализаций.
+
+        Returns:
+            np.ndarray: Массив (N, 256).
+        """
+        if self._probability_table is None:
+            realisations = self.realisations
+            wind = np.stack([r.wind_speed * r.wind_factor_table for r in realisations])
+            humidity = np.array([r.humidity for r in realisations])[:, None]
+            temperature = np.array([r.temperature for r in realisations])[:, None]
+            # Один пакетный вывод для всех реализаций: повторяющиеся наборы
+            # входов (например, одинаковая погода) вычисляются один раз
+            self._probability_table = self.fuzzy_controller.compute_fire_probabilities(
+                wind, humidity, NEIGHBOR_COUNT_TABLE[None, :], temperature).reshape(self.count, -1)
+        return self._probability_table
+
+    def burning_mask(self) -> np.ndarray:
+        """
+        Маска горящих клеток формы (N, строки, столбцы).
+        """
+        return (self.state >= FIRST_BURNING_STATE) & (self.state <= LAST_BURNING_STATE)
+
+    def burning_counts(self) -> np.ndarray:
+        """
+        Возвращает число горящих клеток в каждой реализации.
+        """
+        self._merge_pending_cells()
+        return np.bincount(self.burning_cells // (self.height * self.width), minlength=self.count)
+
+    def is_extinct(self) -> bool:
+        """
+        Проверяет, погас ли пожар во всех реализациях.
+        """
+        self._merge_pending_cells()
+        return not self.burning_cells.size
+
+    @property
+    def active_cell_count(self) -> int:
+        """
+        Число активных клеток на последнем шаге во всех реализациях.
+        """
+        return self.burning_cells.size + self.candidate_count
+
+    def update(self):
+        """
+        Выполняет один шаг всех реализаций.
+        """
+        metrics = self.metrics
+        metrics.begin_step(self.step_count + 1)
+
+        with metrics.phase('weather'):
+            for k, realisation in enumerate(self.realisations):
+                if realisation.weather_schedule is not None:
+                    self.set_weather(k, *realisation.weather_schedule.at(self.step_count))
+
+        if self.is_extinct():
+            self.candidate_count = 0
+        else:
+            self._step()
+        self.step_count += 1
+        metrics.end_step()
+
+    def _merge_pending_cells(self):
+        """
+        Включает во фронт клетки, подожженные через ignite().
+        """
+        if not self._pending_cells:
+            return
+        cells = np.union1d(self.burning_cells, np.array(self._pending_cells, dtype=np.int64))
+        state = self.state.ravel()[cells]
+        self.burning_cells = cells[(state >= FIRST_BURNING_STATE) & (state <= LAST_BURNING_STATE)]
+        self._pending_cells = []
+
+    def _step(self):
+        """
+        Обновляет активные клетки всех реализаций (см. VectorizedForestFireAutomaton._update_front).
+        """
+        metrics = self.metrics
+        burning_cells = self.burning_cells
+
+        state = self.state.ravel()
+        next_state = self.next_state.ravel()
+        fire_duration = self.fire_duration.ravel()
+
+        # Фаза 1: Расчет следующего состояния
+        with metrics.phase('neighbors'):
+            # Широкий фронт дешевле обработать плотными сдвигами всей стопки,
+            # чем сортировкой индексов соседей
+            if burning_cells.size * DENSE_FRONT_RATIO >= state.size:
+                candidates, neighbor_code = self._dense_candidates()
+            else:
+                candidates, neighbor_code = self._front_candidates()
+        self.candidate_count = candidates.size
+        if candidates.size:
+            with metrics.phase('fuzzy'):
+                self._ignite_candidates(candidates, neighbor_code)
+            ignited = candidates[next_state[candidates] == CellState.IGNITION.value]
+        else:
+            ignited = candidates
+
+        # Переходы между состояниями горения
+        with metrics.phase('transitions'):
+            burning_next = next_state[burning_cells]
+            apply_burning_transitions(state[burning_cells], fire_duration[burning_cells], burning_next)
+            next_state[burning_cells] = burning_next
+
+        # Фаза 2: Применение следующего состояния только к изменившимся клеткам
+        with metrics.phase('apply_state'):
+            # Горящие и подожженные клетки не пересекаются, и оба списка упорядочены
+            changed = np.sort(np.concatenate([burning_cells, ignited]), kind='stable')
+            state[changed] = next_state[changed]
+            new_state = state[changed]
+            self.burning_cells = changed[(new_state >= FIRST_BURNING_STATE) & (new_state <= LAST_BURNING_STATE)]
+            fire_duration[self.burning_cells] += 1
+
+    def _front_candidates(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Находит кандидатов на возгорание по соседям горящих клеток фронта.
+
+        Returns:
+            tuple: Плоские индексы кандидатов (по возрастанию) и их коды окрестности.
+        """
+        area = self.height * self.width
+        burning_cells = self.burning_cells
+        code = self._neighbor_code
+        # Соседи ищутся внутри слоя своей реализации
+        ys, xs = np.divmod(burning_cells % area, self.width)
+        targets = []
+        for bit, (dy, dx) in enumerate(NEIGHBOR_OFFSETS):
+            valid = (ys >= dy) & (ys - dy < self.height) & (xs >= dx) & (xs - dx < self.width)
+            # Для одного смещения соседи разных горящих клеток различны:
+            # бит выставляется без накопления по повторяющимся индексам
+            cells = burning_cells[valid] - (dy * self.width + dx)
+            code[cells] |= np.uint8(1 << bit)
+            targets.append(cells)
+
+        # Списки соседей по каждому смещению упорядочены: устойчивая сортировка
+        # сливает готовые отрезки быстрее, чем np.unique сортирует заново
+        cells = _unique_sorted(np.sort(np.concatenate(targets), kind='stable'))
+        neighbor_code = code[cells]
+        code[cells] = 0
+        forest = self.state.ravel()[cells] == CellState.FOREST.value
+        return cells[forest], neighbor_code[forest]
+
+    def _dense_candidates(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Находит кандидатов на возгорание сдвигами маски горящих клеток всей стопки.
+
+        Returns:
+            tuple: Плоские индексы кандидатов (по возрастанию) и их коды окрестности.
+        """
+        burning = self.burning_mask().view(np.uint8)
+        code = np.zeros_like(burning)
+        height, width = self.height, self.width
+        for bit, (dy, dx) in enumerate(NEIGHBOR_OFFSETS):
+            # Бит k клетки (y, x) установлен, если горит сосед (y + dy, x + dx)
+            target = code[:, max(-dy, 0):height - max(dy, 0), max(-dx, 0):width - max(dx, 0)]
+            source = burning[:, max(dy, 0):height - max(-dy, 0), max(dx, 0):width - max(-dx, 0)]
+            # Сдвиг на np.uint8 не повышает тип: временные массивы остаются байтовыми
+            np.bitwise_or(target, source << np.uint8(bit), out=target)
+        candidates = np.flatnonzero((self.state == CellState.FOREST.value) & (code > 0))
+        return candidates, code.ravel()[candidates]
+
+    def _ignite_candidates(self, candidates: np.ndarray, neighbor_code: np.ndarray):
+        """
+        Разыгрывает возгорание кандидатов всех реализаций одним пакетом.
+
+        Args:
+            candidates (np.ndarray): Плоские индексы клеток-кандидатов в массиве (N, строки, столбцы).
+            neighbor_code (np.ndarray): Коды окрестности кандидатов.
+        """
+        layers, local = np.divmod(candidates, self.height * self.width)
+        if self.slope_weights is None:
+            prob = self.probability_table()[layers, neighbor_code]
+        else:
+            realisations = self.realisations
+            wind = np.stack([r.wind_speed * r.wind_factor_table for r in realisations])
+            humidity = np.array([r.humidity for r in realisations])
+            temperature = np.array([r.temperature for r in realisations])
+            # Клетки с нулевым взвешенным числом горящих соседей не загораются
+            # (см. vectorized_automaton.slope_fire_probabilities)
+            count = weighted_neighbor_count(self.slope_weights, local, neighbor_code)
+            spreading = count > 0
+            prob = np.zeros(candidates.size)
+            prob[spreading] = self.fuzzy_controller.compute_fire_probabilities(
+                wind[layers[spreading], neighbor_code[spreading]], humidity[layers[spreading]],
+                count[spreading], temperature[layers[spreading]])
+
+        # Учитываем тип растительности
+        prob *= np.take(self.ignition_modifiers, self.land_type.ravel()[local], mode='clip')
+
+        # Случайные числа каждой реализации - от ее генератора по индексу клетки слоя
+        uniforms = stacked_uniforms(self._rng_keys, self.step_count + 1, layers, local)
+        self.next_state.ravel()[candidates[uniforms * 100 < prob]] = CellState.IGNITION.value
+
+
+def _per_realisation(value, count: int, name: str) -> list:
+    """
+    Разворачивает общий параметр в список значений для count реализаций.
+    """
+    if isinstance(value, (str, WindDirection)) or np.isscalar(value):
+        return [value] * count
+    values = list(value)
+    if len(values) != count:
+        raise ValueError(f"{name}: ожидалось {count} значений, получено {len(values)}")
+    return values
+
+
+def _unique_sorted(values: np.ndarray) -> np.ndarray:
+    """
+    Удаляет повторы из упорядоченного массива.
+    """
+    if not values.size:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
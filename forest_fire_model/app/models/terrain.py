@@ -0,0 +1,146 @@
+from typing import Optional, Tuple, Union
+import numpy as np
+
+# Смещения соседей (dy, dx) в порядке обхода ForestFireAutomaton._count_burning_neighbors
+NEIGHBOR_OFFSETS = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if (dy, dx) != (0, 0)]
+
+# Коэффициент a влияния уклона exp(a * θ), θ в градусах (Alexandridis et al., 2008)
+SLOPE_COEFFICIENT = 0.078
+
+# Число знаков после запятой у взвешенного числа горящих соседей: округление
+# ограничивает число различных входов нечеткого вывода и сохраняет полезность кэша
+SLOPE_PRECISION = 1
+
+# Длина градуса меридиана в метрах (для карт в географических координатах)
+METERS_PER_DEGREE = 111320.0
+
+
+def cell_size(transform, crs, height: int) -> Tuple[float, float]:
+    """
+    Возвращает размер клетки растра в метрах.
+
+    Для географических координат размер по долготе пересчитывается по
+    широте центра растра.
+
+    Args:
+        transform: Аффинное преобразование растра.
+        crs: Система координат растра.
+        height (int): Число строк растра.
+
+    Returns:
+        tuple: Размер клетки (по X, по Y) в метрах.
+    """
+    size_x, size_y = abs(transform.a), abs(transform.e)
+    if crs is not None and crs.is_geographic:
+        latitude = transform.f + transform.e * height / 2
+        size_x *= METERS_PER_DEGREE * np.cos(np.radians(latitude))
+        size_y *= METERS_PER_DEGREE
+    return float(size_x), float(size_y)
+
+
+def load_dem(file_path: str, land_cover_file: Optional[str] = None,
+             shape: Optional[Tuple[int, int]] = None) -> Tuple[np.ndarray, Tuple[float, float]]:
+    """
+    Загружает цифровую модель рельефа, совмещенную с сеткой карты растительности.
+
+    Если задан файл карты растительности, рельеф пересчитывается в ее
+    систему координат и сетку (билинейная интерполяция); иначе размер
+    рельефа должен совпадать с shape.
+
+    Args:
+        file_path (str): Путь к файлу рельефа (TIFF-формат).
+        land_cover_file (str): Путь к файлу карты растительности.
+        shape (tuple): Размер сетки (строки, столбцы).
+
+    Returns:
+        tuple: Высоты (float64, NaN - нет данных) и размер клетки в метрах (по X, по Y).
+    """
+    import rasterio
+    from rasterio.warp import reproject, Resampling
+
+    with rasterio.open(file_path) as src:
+        if land_cover_file is None:
+            height_map = src.read(1, masked=True).astype(np.float64).filled(np.nan)
+            if shape is not None and height_map.shape != tuple(shape):
+                raise ValueError("Размер рельефа не совпадает с картой растительности")
+            return height_map, cell_size(src.transform, src.crs, src.height)
+
+        with rasterio.open(land_cover_file) as reference:
+            if _same_grid(src, reference):
+                # Рельеф уже на сетке карты растительности: пересчет не нужен
+                height_map = src.read(1, masked=True).astype(np.float64).filled(np.nan)
+                return height_map, cell_size(reference.transform, reference.crs, reference.height)
+
+            height_map = np.full((reference.height, reference.width), np.nan)
+            reproject(
+                source=rasterio.band(src, 1),
+                destination=height_map,
+                dst_transform=reference.transform,
+                dst_crs=reference.crs,
+                dst_nodata=np.nan,
+                resampling=Resampling.bilinear
+            )
+            return height_map, cell_size(reference.transform, reference.crs, reference.height)
+
+
+def _same_grid(src, reference) -> bool:
+    """
+    Проверяет, совпадают ли сетки двух растров (размер, система координат и привязка).
+    """
+    if src.shape != reference.shape or src.crs != reference.crs:
+        return False
+    coefficients = [(t.a, t.b, t.c, t.d, t.e, t.f) for t in (src.transform, reference.transform)]
+    return bool(np.allclose(*coefficients))
+
+
+def compute_slope_weights(height_map: np.ndarray,
+                          cell_size: Union[float, Tuple[float, float]] = 1.0,
+                          coefficient: float = SLOPE_COEFFICIENT) -> np.ndarray:
+    """
+    Рассчитывает веса влияния уклона для восьми соседей каждой клетки.
+
+    Вес k-го соседа клетки равен exp(a * θ), где θ - угол подъема (в градусах)
+    от соседа к клетке: огонь быстрее распространяется вверх по склону и
+    медленнее вниз. Для клеток без данных о высоте вес равен 1; веса
+    соседей за краем сетки не используются.
+
+    Args:
+        height_map (np.ndarray): Высоты клеток (м).
+        cell_size (float | tuple): Размер клетки в метрах (один или по X и по Y).
+        coefficient (float): Коэффициент a (по умолчанию SLOPE_COEFFICIENT).
+
+    Returns:
+        np.ndarray: Массив весов float32 формы (8, строки, столбцы) в порядке NEIGHBOR_OFFSETS.
+    """
+    size_x, size_y = (cell_size, cell_size) if np.isscalar(cell_size) else cell_size
+    height_map = np.asarray(height_map, dtype=np.float64)
+    padded = np.pad(height_map, 1, mode='edge')
+    rows, cols = height_map.shape
+
+    weights = np.empty((len(NEIGHBOR_OFFSETS), rows, cols), dtype=np.float32)
+    for k, (dy, dx) in enumerate(NEIGHBOR_OFFSETS):
+        neighbor = padded[1 + dy:1 + dy + rows, 1 + dx:1 + dx + cols]
+        slope = np.degrees(np.arctan((height_map - neighbor) / np.hypot(dx * size_x, dy * size_y)))
+        weight = np.exp(coefficient * slope)
+        weights[k] = np.where(np.isfinite(weight), weight, 1.0)
+    return weights
+
+
+def weighted_neighbor_count(slope_weights: np.ndarray, cells: np.ndarray,
+                            neighbor_code: np.ndarray) -> np.ndarray:
+    """
+    Суммирует веса уклона горящих соседей клеток в порядке обхода соседей.
+
+    Args:
+        slope_weights (np.ndarray): Веса уклона (см. compute_slope_weights).
+        cells (np.ndarray): Плоские индексы клеток.
+        neighbor_code (np.ndarray): Коды окрестности клеток (бит k - горит k-й сосед).
+
+    Returns:
+        np.ndarray: Взвешенное число горящих соседей, округленное до SLOPE_PRECISION.
+    """
+    weights = slope_weights.reshape(len(NEIGHBOR_OFFSETS), -1)
+    count = np.zeros(cells.size)
+    for bit in range(len(NEIGHBOR_OFFSETS)):
+        count += np.where(neighbor_code & (1 << bit), weights[bit, cells], 0.0)
+    return np.round(count, SLOPE_PRECISION)
@@ -0,0 +1,334 @@
+import numpy as np
+from typing import Union
+
+from .cell import CellState
+from .wind import WindDirection
+from .fuzzy_logic import FuzzyFireController
+from .land_cover import LandCoverType
+from .forest_fire_automaton import ForestFireAutomaton
+from .terrain import NEIGHBOR_OFFSETS, weighted_neighbor_count
+from .rules import FIRST_BURNING_STATE, LAST_BURNING_STATE, apply_burning_transitions, build_wind_factor_table
+
+# Ядро корреляции: каждому соседу соответствует свой бит кода окрестности
+NEIGHBOR_BITS = np.zeros((3, 3), dtype=np.uint8)
+for _bit, (_dy, _dx) in enumerate(NEIGHBOR_OFFSETS):
+    NEIGHBOR_BITS[_dy + 1, _dx + 1] = 1 << _bit
+
+# Число горящих соседей для каждого кода окрестности
+NEIGHBOR_COUNT_TABLE = np.array([bin(code).count('1') for code in range(256)], dtype=np.uint8)
+
+
+def slope_fire_probabilities(fuzzy_controller, slope_weights: np.ndarray, cells: np.ndarray,
+                             neighbor_code: np.ndarray, wind_speed_table: np.ndarray,
+                             humidity: float, temperature: float) -> np.ndarray:
+    """
+    Рассчитывает вероятность возгорания (0-100) клеток с учетом рельефа.
+
+    Клетки, взвешенное число горящих соседей которых округлилось до 0
+    (крутой спуск), не загораются, как в ForestFireAutomaton._update_cell.
+
+    Args:
+        fuzzy_controller: FuzzyFireController или его скомпилированная форма.
+        slope_weights (np.ndarray): Веса уклона (см. compute_slope_weights).
+        cells (np.ndarray): Плоские индексы клеток-кандидатов.
+        neighbor_code (np.ndarray): Коды окрестности кандидатов.
+        wind_speed_table (np.ndarray): Скорость ветра с учетом направления для каждого кода окрестности.
+        humidity (float): Влажность воздуха.
+        temperature (float): Температура воздуха.
+
+    Returns:
+        np.ndarray: Вероятности возгорания.
+    """
+    count = weighted_neighbor_count(slope_weights, cells, neighbor_code)
+    spreading = count > 0
+    prob = np.zeros(cells.size)
+    prob[spreading] = fuzzy_controller.compute_fire_probabilities(
+        wind_speed_table[neighbor_code[spreading]], humidity, count[spreading], temperature)
+    return prob
+
+
+class VectorizedForestFireAutomaton(ForestFireAutomaton):
+    """
+    Автомат лесного пожара, обновляющий сетку операциями над массивами NumPy.
+
+    Работает непосредственно с массивами CellGrid (состояние, следующее
+    состояние, счетчик горения и тип растительности) без обхода клеток
+    в цикле Python. Правила переходов совпадают с ForestFireAutomaton._update_cell.
+    """
+    def __init__(self, land_cover_file: Union[str, np.ndarray],
+                 fuzzy_controller: FuzzyFireController,
+                 wind_direction: WindDirection = WindDirection.N,
+                 wind_speed: float = 0.0,
+                 humidity: float = 50.0,
+                 temperature: float = 15.0,
+                 seed=None,
+                 track_front: bool = True):
+        """
+        Инициализация векторизованного автомата.
+
+        Args:
+            land_cover_file (str | np.ndarray): Путь к файлу с картой растительности (TIFF-формат)
+                или уже загруженная карта.
+            wind_direction (WindDirection): Направление ветра (по умолчанию - север).
+            wind_speed (float): Скорость ветра (по умолчанию 0.0 м/с).
+            humidity (float): Влажность воздуха (по умолчанию 50.0%).
+            temperature (float): Температура воздуха (по умолчанию 15.0°C).
+            seed: Зерно генератора случайных чисел (по умолчанию None).
+            track_front (bool): Обновлять только клетки фронта пожара вместо всей сетки
+                (по умолчанию True).
+        """
+        super().__init__(land_cover_file, fuzzy_controller, wind_direction, wind_speed, humidity, temperature, seed)
+        self.ignition_modifiers = LandCoverType.get_ignition_modifier_table()
+        self.wind_factor_table = build_wind_factor_table(self.wind_effect_matrix)
+        self._probability_table = None
+        self.track_front = track_front
+
+        # В начале моделирования горящих клеток нет: сетка не сканируется
+        self.burning_cells = np.empty(0, dtype=np.int64)
+        self.candidate_count = 0
+        self._pending_cells = []
+        # Негорящие клетки, измененные через grid[y][x] (см. _merge_pending_cells)
+        self._dirty_cells = np.empty(0, dtype=np.int64)
+
+    def _on_weather_changed(self, wind_changed: bool):
+        """
+        Перестраивает таблицу коэффициентов ветра (если изменилась матрица ветра)
+        и сбрасывает таблицу вероятностей возгорания.
+        """
+        if wind_changed:
+            self.wind_factor_table = build_wind_factor_table(self.wind_effect_matrix)
+        self._probability_table = None
+
+    def probability_table(self) -> np.ndarray:
+        """
+        Возвращает вероятность возгорания (0-100) для каждого кода окрестности
+        при текущей погоде.
+
+        При заданной погоде вероятность зависит только от кода окрестности,
+        поэтому нечеткий вывод выполняется один раз на 256 кодов и повторяется
+        только после изменения погоды.
+
+        Returns:
+            np.ndarray: Массив из 256 вероятностей.
+        """
+        if self._probability_table is None:
+            self._probability_table = self.fuzzy_controller.compute_fire_probabilities(
+                self.wind_speed * self.wind_factor_table, self.humidity,
+                NEIGHBOR_COUNT_TABLE, self.temperature)
+        return self._probability_table
+
+    def _on_state_loaded(self):
+        self.reset_front()
+
+    def _on_forked(self, source: ForestFireAutomaton):
+        self.burning_cells = source.burning_cells.copy()
+        self._pending_cells = list(source._pending_cells)
+        self._dirty_cells = source._dirty_cells.copy()
+
+    def _on_cell_changed(self, index: int):
+        """
+        Запоминает клетку, измененную через grid[y][x], для включения во фронт.
+
+        Args:
+            index (int): Плоский индекс клетки.
+        """
+        self._pending_cells.append(index)
+
+    def ignite_random_cells(self, count: int = 1):
+        """
+        Зажигает случайные клетки леса.
+
+        Args:
+            count (int): Количество клеток для поджига (по умолчанию 1).
+        """
+        xs = self.rng.integers(self.width, count)
+        ys = self.rng.integers(self.height, count)
+        forest = self.state[ys, xs] == CellState.FOREST.value  # Зажигаем только лесные клетки
+        self.state[ys[forest], xs[forest]] = CellState.IGNITION.value
+        self._pending_cells.extend(ys[forest] * self.width + xs[forest])
+
+    def reset_front(self):
+        """
+        Пересчитывает множество горящих клеток по всей сетке.
+
+        Нужен только после прямого изменения массива state в обход ignite().
+        """
+        self.burning_cells = np.flatnonzero(self.burning_mask())
+        self.candidate_count = 0
+        self._pending_cells = []
+        self._dirty_cells = np.empty(0, dtype=np.int64)
+
+    @property
+    def active_cell_count(self) -> int:
+        """
+        Число активных клеток на последнем шаге: горящие клетки и их негоревшие соседи.
+        """
+        return self.burning_cells.size + self.candidate_count
+
+    def burning_count(self) -> int:
+        self._merge_pending_cells()
+        return int(self.burning_cells.size)
+
+    def burning_indices(self) -> np.ndarray:
+        """
+        Возвращает горящие клетки фронта без просмотра сетки.
+        """
+        self._merge_pending_cells()
+        return self.burning_cells
+
+    def _merge_pending_cells(self):
+        """
+        Включает во фронт клетки, измененные через grid[y][x] или ignite_random_cells().
+
+        Во фронте остаются только горящие клетки: клетка, погашенная через
+        grid[y][x], из него исключается. Такие клетки запоминаются в
+        _dirty_cells: при обновлении всей сетки (и в ForestFireAutomaton)
+        каждая клетка получает next_state, поэтому измененное через grid[y][x]
+        негорящее состояние заменяется на шаге и в режиме фронта.
+        """
+        if not self._pending_cells:
+            return
+        cells = np.union1d(self.burning_cells, np.array(self._pending_cells, dtype=np.int64))
+        state = self.state.ravel()[cells]
+        burning = (state >= FIRST_BURNING_STATE) & (state <= LAST_BURNING_STATE)
+        self.burning_cells = cells[burning]
+        self._dirty_cells = np.union1d(self._dirty_cells, cells[~burning])
+        self._pending_cells = []
+
+    def _take_dirty_cells(self) -> np.ndarray:
+        """
+        Возвращает негорящие клетки, измененные через grid[y][x] до шага, и очищает их список.
+        """
+        self._merge_pending_cells()
+        dirty = np.setdiff1d(self._dirty_cells, self.burning_cells, assume_unique=True)
+        self._dirty_cells = np.empty(0, dtype=np.int64)
+        return dirty
+
+    def _step(self):
+        """
+        Обновляет состояние клеток сетки за один шаг.
+        """
+        if self.track_front:
+            self._update_front()
+        else:
+            self._update_full_grid()
+
+    def _update_full_grid(self):
+        """
+        Обновляет состояние всех клеток сетки.
+        """
+        from scipy import ndimage
+
+        metrics = self.metrics
+
+        # Фаза 1: Расчет следующего состояния
+        with metrics.phase('neighbors'):
+            burning = self.burning_mask()
+            # Код окрестности: бит k установлен, если горит k-й сосед
+            neighbor_code = ndimage.correlate(burning.view(np.uint8), NEIGHBOR_BITS,
+                                              mode='constant', cval=0)
+            candidates = np.flatnonzero((self.state == CellState.FOREST.value) & (neighbor_code > 0))
+        self.candidate_count = candidates.size
+        if candidates.size:
+            with metrics.phase('fuzzy'):
+                self._ignite_candidates(candidates, neighbor_code.ravel()[candidates])
+
+        # Переходы между состояниями горения
+        with metrics.phase('transitions'):
+            apply_burning_transitions(self.state, self.fire_duration, self.next_state)
+
+        # Фаза 2: Применение следующего состояния
+        with metrics.phase('apply_state'):
+            self.state[...] = self.next_state
+            burning = self.burning_mask()
+            self.fire_duration[burning] += 1
+            self.burning_cells = np.flatnonzero(burning)
+            self._pending_cells = []
+            self._dirty_cells = np.empty(0, dtype=np.int64)
+
+    def _update_front(self):
+        """
+        Обновляет только активные клетки: горящие и их негоревших соседей.
+
+        Множество горящих клеток поддерживается инкрементально, поэтому
+        стоимость шага пропорциональна длине фронта, а не площади карты.
+        Результат совпадает с _update_full_grid при том же зерне: кандидаты
+        обрабатываются в том же порядке плоских индексов.
+        """
+        metrics = self.metrics
+        dirty_cells = self._take_dirty_cells()
+        burning_cells = self.burning_cells
+
+        state = self.state.ravel()
+        next_state = self.next_state.ravel()
+        fire_duration = self.fire_duration.ravel()
+
+        # Фаза 1: Расчет следующего состояния
+        with metrics.phase('neighbors'):
+            # Горящая клетка выставляет соседу бит, соответствующий ее положению относительно соседа
+            ys, xs = np.divmod(burning_cells, self.width)
+            targets = []
+            bits = []
+            for bit, (dy, dx) in enumerate(NEIGHBOR_OFFSETS):
+                ny, nx = ys - dy, xs - dx
+                valid = (ny >= 0) & (ny < self.height) & (nx >= 0) & (nx < self.width)
+                targets.append(ny[valid] * self.width + nx[valid])
+                bits.append(np.full(np.count_nonzero(valid), 1 << bit, dtype=np.int64))
+            targets = np.concatenate(targets)
+            bits = np.concatenate(bits)
+
+            cells, inverse = np.unique(targets, return_inverse=True)
+            neighbor_code = np.bincount(inverse, weights=bits, minlength=cells.size).astype(np.uint8)
+            forest = state[cells] == CellState.FOREST.value
+            candidates = cells[forest]
+        self.candidate_count = candidates.size
+        if candidates.size:
+            with metrics.phase('fuzzy'):
+                self._ignite_candidates(candidates, neighbor_code[forest])
+            ignited = candidates[next_state[candidates] == CellState.IGNITION.value]
+        else:
+            ignited = candidates
+
+        # Переходы между состояниями горения
+        with metrics.phase('transitions'):
+            burning_next = next_state[burning_cells]
+            apply_burning_transitions(state[burning_cells], fire_duration[burning_cells], burning_next)
+            next_state[burning_cells] = burning_next
+
+        # Фаза 2: Применение следующего состояния только к изменившимся клеткам
+        with metrics.phase('apply_state'):
+            changed = np.union1d(np.union1d(burning_cells, ignited), dirty_cells)
+            state[changed] = next_state[changed]
+            new_state = state[changed]
+            self.burning_cells = changed[(new_state >= FIRST_BURNING_STATE) & (new_state <= LAST_BURNING_STATE)]
+            fire_duration[self.burning_cells] += 1
+
+    def _ignite_candidates(self, candidates: np.ndarray, neighbor_code: np.ndarray):
+        """
+        Разыгрывает возгорание лесных клеток, у которых есть горящие соседи.
+
+        Args:
+            candidates (np.ndarray): Плоские индексы клеток-кандидатов.
+            neighbor_code (np.ndarray): Коды окрестности кандидатов.
+        """
+        if self.slope_weights is None:
+            # Вероятность возгорания по нечеткой логике - из таблицы для текущей погоды
+            prob = self.probability_table()[neighbor_code]
+        else:
+            prob = slope_fire_probabilities(self.fuzzy_controller, self.slope_weights, candidates, neighbor_code,
+                                            self.wind_speed * self.wind_factor_table, self.humidity,
+                                            self.temperature)
+
+        # Учитываем тип растительности
+        prob *= np.take(self.ignition_modifiers, self.land_type.ravel()[candidates], mode='clip')
+
+        # Применяем вероятность возгорания
+        ignited = candidates[self.rng.uniforms(self.step_count + 1, self._rng_cells(candidates)) * 100 < prob]
+        self.next_state.ravel()[ignited] = CellState.IGNITION.value
+
+    def _rng_cells(self, cells: np.ndarray) -> np.ndarray:
+        """
+        Возвращает индексы клеток для генератора случайных чисел (по умолчанию - плоские
+        индексы сетки). Подклассы, моделирующие часть карты, передают индексы всей карты.
+        """
+        return cells
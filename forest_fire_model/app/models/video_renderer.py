@@ -0,0 +1,297 @@
+import subprocess
+import tempfile
+from typing import Callable, Optional
+import numpy as np
+
+from .land_cover import LandCoverType
+from .forest_fire_automaton import ForestFireAutomaton
+from .cell_grid import land_cover_codes
+from .pipeline import FramePipeline
+
+
+def build_palette() -> np.ndarray:
+    """
+    Строит таблицу цветов для кодов числового представления сетки.
+
+    Соответствует отображению get_color_map() с нормализацией по get_bounds():
+    коды ниже первой границы получают первый цвет, выше последней - последний.
+
+    Returns:
+        np.ndarray: Массив (256, 3) uint8 с цветом RGB для каждого кода.
+    """
+    import matplotlib.colors as colors
+
+    colors_rgb = np.array([colors.to_rgb(c) for c in LandCoverType.get_color_map().colors])
+    colors_rgb = np.round(colors_rgb * 255).astype(np.uint8)
+    bounds = LandCoverType.get_bounds()
+
+    codes = np.arange(256)
+    index = np.clip(np.searchsorted(bounds, codes, side='right') - 1, 0, len(colors_rgb) - 1)
+    return colors_rgb[index]
+
+
+class FFmpegWriter:
+    """
+    Кодирует кадры RGB в видеофайл, передавая их в процесс ffmpeg через канал.
+    """
+    def __init__(self, output_file: str, width: int, height: int,
+                 fps: int = 5, bitrate: int = 3000, codec: str = 'libx264',
+                 ffmpeg_path: str = 'ffmpeg'):
+        """
+        Args:
+            output_file (str): Путь к выходному видеофайлу.
+            width (int): Ширина кадра в пикселях (четная для yuv420p).
+            height (int): Высота кадра в пикселях (четная для yuv420p).
+            fps (int): Частота кадров (по умолчанию 5).
+            bitrate (int): Битрейт в кбит/с (по умолчанию 3000).
+            codec (str): Видеокодек ffmpeg (по умолчанию libx264).
+            ffmpeg_path (str): Путь к исполняемому файлу ffmpeg.
+        """
+        self.output_file = output_file
+        self.width = width
+        self.height = height
+        self.command = [
+            ffmpeg_path, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+            '-s', f'{width}x{height}', '-r', str(fps),
+            '-i', '-',
+            '-an', '-vcodec', codec, '-pix_fmt', 'yuv420p', '-b:v', f'{bitrate}k',
+            output_file
+        ]
+        self.process = None
+        self._stderr = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(abort=exc_type is not None)
+
+    def open(self):
+        """
+        Запускает процесс ffmpeg.
+        """
+        self._stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(self.command, stdin=subprocess.PIPE, stderr=self._stderr)
+
+    def write(self, frame: np.ndarray):
+        """
+        Передает кадр (height, width, 3) uint8 в ffmpeg.
+        """
+        try:
+            self.process.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError:
+            self.close(abort=True)
+            raise RuntimeError(f"ffmpeg завершился с ошибкой: {self._error_message()}")
+
+    def close(self, abort: bool = False):
+        """
+        Завершает кодирование и дожидается окончания работы ffmpeg.
+
+        Args:
+            abort (bool): Прервать кодирование без проверки результата.
+        """
+        if self.process is None:
+            return
+        process, self.process = self.process, None
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        if abort:
+            process.kill()
+        returncode = process.wait()
+        if returncode != 0 and not abort:
+            raise RuntimeError(f"ffmpeg завершился с кодом {returncode}: {self._error_message()}")
+
+    def _error_message(self) -> str:
+        self._stderr.seek(0)
+        return self._stderr.read().decode(errors='replace').strip()
+
+
+class FrameRenderer:
+    """
+    Преобразует состояние автомата в кадр RGB по таблице цветов без matplotlib.
+    """
+    def __init__(self, automaton: ForestFireAutomaton, scale: int = 1):
+        """
+        Args:
+            automaton (ForestFireAutomaton): Автомат, состояние которого отображается.
+            scale (int): Целочисленный коэффициент увеличения кадра (по умолчанию 1).
+        """
+        self.automaton = automaton
+        self.scale = scale
+        self.palette = build_palette()
+
+        # yuv420p требует четных размеров кадра: при необходимости
+        # добавляется строка или столбец, повторяющие край
+        self.width = automaton.width * scale + (automaton.width * scale) % 2
+        self.height = automaton.height * scale + (automaton.height * scale) % 2
+        self._codes = np.empty((self.height, self.width), dtype=np.uint8)
+        self._frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+
+    def render(self) -> np.ndarray:
+        """
+        Возвращает кадр (height, width, 3) uint8 для текущего состояния.
+
+        Возвращаемый массив переиспользуется следующими вызовами.
+        """
+        return self.render_state(self.automaton.state, self._codes, self._frame)
+
+    def render_state(self, state: np.ndarray, codes: Optional[np.ndarray] = None,
+                     out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Возвращает кадр для снимка состояния автомата (например, из другого потока).
+
+        Args:
+            state (np.ndarray): Состояния клеток (height, width) uint8.
+            codes (np.ndarray): Рабочий массив кодов (по умолчанию создается).
+            out (np.ndarray): Массив для кадра (по умолчанию создается).
+
+        Returns:
+            np.ndarray: Кадр (height, width, 3) uint8.
+        """
+        if codes is None:
+            codes = np.empty((self.height, self.width), dtype=np.uint8)
+        if out is None:
+            out = np.empty((self.height, self.width, 3), dtype=np.uint8)
+
+        grid_codes = land_cover_codes(state, self.automaton.land_type)
+        if self.scale > 1:
+            grid_codes = grid_codes.repeat(self.scale, axis=0).repeat(self.scale, axis=1)
+
+        height, width = grid_codes.shape
+        codes[:height, :width] = grid_codes
+        codes[height:, :width] = grid_codes[-1:]
+        codes[:, width:] = codes[:, width - 1:width]
+
+        np.take(self.palette, codes, axis=0, out=out)
+        return out
+
+
+class VideoRenderer:
+    """
+    Моделирование с записью видео напрямую в ffmpeg в исходном разрешении сетки.
+
+    В конвейерном режиме (pipelined=True) моделирование, отрисовка и передача
+    кадров в ffmpeg выполняются одновременно: автомат передает снимки состояния
+    (uint8) в ограниченную очередь, отрисовка и кодирование идут в фоновых
+    потоках (см. FramePipeline). Время записи приближается ко времени самой
+    медленной стадии, а не к сумме всех стадий; видео совпадает с
+    последовательным режимом.
+    """
+    def __init__(self, automaton: ForestFireAutomaton, output_file: str,
+                 fps: int = 5, scale: int = 1, bitrate: int = 3000,
+                 pipelined: bool = False, queue_size: int = 4, verbose: bool = True):
+        """
+        Args:
+            automaton (ForestFireAutomaton): Автомат для моделирования.
+            output_file (str): Путь к выходному видеофайлу.
+            fps (int): Частота кадров (по умолчанию 5).
+            scale (int): Целочисленный коэффициент увеличения кадра (по умолчанию 1).
+            bitrate (int): Битрейт в кбит/с (по умолчанию 3000).
+            pipelined (bool): Отрисовывать и кодировать кадры в фоновых потоках (по умолчанию False).
+            queue_size (int): Размер очередей конвейера в кадрах (по умолчанию 4).
+            verbose (bool): Печатать ход записи (по умолчанию True).
+        """
+        self.automaton = automaton
+        self.renderer = FrameRenderer(automaton, scale)
+        self.output_file = output_file
+        self.fps = fps
+        self.bitrate = bitrate
+        self.pipelined = pipelined
+        self.queue_size = queue_size
+        self.verbose = verbose
+
+    def render(self, frames: int = 50, stop_when_extinct: bool = False,
+               on_step: Optional[Callable[[], None]] = None) -> int:
+        """
+        Выполняет заданное число шагов моделирования, записывая кадр после каждого.
+
+        После того как пожар погас, кадры не меняются: оставшиеся кадры
+        записываются повтором последнего без моделирования и отрисовки
+        или (при stop_when_extinct) не записываются.
+
+        Args:
+            frames (int): Количество кадров (по умолчанию 50).
+            stop_when_extinct (bool): Завершить видео, когда пожар погас (по умолчанию False).
+            on_step: Функция, вызываемая после каждого шага моделирования
+                (например, ArrivalTimeRecorder.record).
+
+        Returns:
+            int: Число выполненных шагов моделирования.
+        """
+        if self.pipelined:
+            return self._render_pipelined(frames, stop_when_extinct, on_step)
+
+        with FFmpegWriter(self.output_file, self.renderer.width, self.renderer.height,
+                          fps=self.fps, bitrate=self.bitrate) as writer:
+            metrics = self.automaton.metrics
+            for frame in range(1, frames + 1):
+                if self.verbose and frame % 10 == 0:
+                    print(f"Текущий кадр: {frame}")
+                metrics.begin_step(self.automaton.step_count + 1)
+                with metrics.phase('update'):
+                    self.automaton.update()
+                if on_step is not None:
+                    on_step()
+                with metrics.phase('render'):
+                    image = self.renderer.render()
+                with metrics.phase('encode'):
+                    writer.write(image)
+                metrics.end_step()
+
+                if frame < frames and self.automaton.is_extinct():
+                    if self.verbose:
+                        print(f"Пожар погас на кадре {frame}")
+                    if not stop_when_extinct:
+                        for _ in range(frames - frame):
+                            writer.write(image)
+                    return frame
+        return frames
+
+    def _render_pipelined(self, frames: int, stop_when_extinct: bool,
+                          on_step: Optional[Callable[[], None]]) -> int:
+        """
+        Конвейерный вариант render(): автомат передает снимки состояния,
+        отрисовка и кодирование выполняются в фоновых потоках.
+
+        Фаза 'submit' показывает время ожидания места в очереди: если она
+        велика, моделирование быстрее отрисовки или кодирования.
+        """
+        renderer = self.renderer
+        last = [None, None]
+
+        def render(state):
+            # Повтор снимка (пожар погас) не отрисовывается заново
+            if state is not last[0]:
+                last[:] = state, renderer.render_state(state)
+            return last[1]
+
+        with FFmpegWriter(self.output_file, renderer.width, renderer.height,
+                          fps=self.fps, bitrate=self.bitrate) as writer, \
+                FramePipeline([render, writer.write], queue_size=self.queue_size,
+                              names=['render', 'encode']) as pipeline:
+            metrics = self.automaton.metrics
+            for frame in range(1, frames + 1):
+                if self.verbose and frame % 10 == 0:
+                    print(f"Текущий кадр: {frame}")
+                metrics.begin_step(self.automaton.step_count + 1)
+                with metrics.phase('update'):
+                    self.automaton.update()
+                if on_step is not None:
+                    on_step()
+                state = self.automaton.state.copy()
+                with metrics.phase('submit'):
+                    pipeline.submit(state)
+                metrics.end_step()
+
+                if frame < frames and self.automaton.is_extinct():
+                    if self.verbose:
+                        print(f"Пожар погас на кадре {frame}")
+                    if not stop_when_extinct:
+                        for _ in range(frames - frame):
+                            pipeline.submit(state)
+                    return frame
+        return frames
@@ -0,0 +1,141 @@
+import csv
+import json
+import os
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+from .wind import WindDirection
+
+
+class WeatherSchedule:
+    """
+    Ряд погодных данных по шагам моделирования.
+
+    Скорость ветра, влажность и температура между точками ряда
+    интерполируются линейно (или берутся из последней точки), направление
+    ветра - всегда из последней точки. До первой и после последней точки
+    действуют крайние значения. Значения округляются до precision знаков:
+    погода, по которой перестраиваются таблицы автомата, меняется только
+    при заметном изменении входных данных.
+    """
+    def __init__(self, steps: Sequence[float],
+                 wind_directions: Sequence[WindDirection],
+                 wind_speeds: Sequence[float],
+                 humidities: Sequence[float],
+                 temperatures: Sequence[float],
+                 interpolate: bool = True,
+                 precision: int = 1):
+        """
+        Args:
+            steps (list): Номера шагов точек ряда (по возрастанию).
+            wind_directions (list): Направления ветра.
+            wind_speeds (list): Скорости ветра (м/с).
+            humidities (list): Влажность воздуха (%).
+            temperatures (list): Температура воздуха (°C).
+            interpolate (bool): Интерполировать значения между точками (по умолчанию True).
+            precision (int): Число знаков после запятой у значений погоды (по умолчанию 1).
+        """
+        order = np.argsort(np.asarray(steps, dtype=np.float64), kind='stable')
+        if not len(order):
+            raise ValueError("Ряд погодных данных пуст")
+        self.steps = np.asarray(steps, dtype=np.float64)[order]
+        self.wind_directions = [wind_directions[i] for i in order]
+        self.wind_speeds = np.asarray(wind_speeds, dtype=np.float64)[order]
+        self.humidities = np.asarray(humidities, dtype=np.float64)[order]
+        self.temperatures = np.asarray(temperatures, dtype=np.float64)[order]
+        self.interpolate = interpolate
+        self.precision = precision
+
+    @classmethod
+    def from_records(cls, records: List[dict], step_duration: Optional[float] = None,
+                     start: Optional[str] = None, **kwargs) -> 'WeatherSchedule':
+        """
+        Создает ряд из списка записей.
+
+        Запись содержит wind_direction, wind_speed, humidity, temperature и либо
+        номер шага (step), либо момент времени (time) - число секунд или дату ISO 8601.
+        Время переводится в шаги по step_duration (секунд на шаг) от start
+        (по умолчанию - время первой записи).
+
+        Args:
+            records (list): Записи ряда.
+            step_duration (float): Длительность шага в секундах (нужна для записей с time).
+            start (str): Момент, соответствующий шагу 0.
+            **kwargs: Параметры конструктора (interpolate, precision).
+
+        Returns:
+            WeatherSchedule: Ряд погодных данных.
+        """
+        if not records:
+            raise ValueError("Ряд погодных данных пуст")
+        if all('step' in record and record['step'] not in (None, '') for record in records):
+            steps = [float(record['step']) for record in records]
+        else:
+            if step_duration is None:
+                raise ValueError("Для записей со временем нужна длительность шага")
+            times = [_parse_time(record['time']) for record in records]
+            origin = _parse_time(start) if start is not None else min(times)
+            steps = [(time - origin) / step_duration for time in times]
+
+        return cls(
+            steps=steps,
+            wind_directions=[WindDirection[str(record['wind_direction']).upper()] for record in records],
+            wind_speeds=[float(record['wind_speed']) for record in records],
+            humidities=[float(record['humidity']) for record in records],
+            temperatures=[float(record['temperature']) for record in records],
+            **kwargs
+        )
+
+    @classmethod
+    def from_file(cls, file_path: str, step_duration: Optional[float] = None,
+                  start: Optional[str] = None, **kwargs) -> 'WeatherSchedule':
+        """
+        Читает ряд из файла CSV или JSON (список записей, см. from_records).
+        """
+        extension = os.path.splitext(file_path)[1].lower()
+        with open(file_path, encoding='utf-8', newline='') as f:
+            if extension == '.json':
+                records = json.load(f)
+            elif extension == '.csv':
+                records = list(csv.DictReader(f))
+            else:
+                raise ValueError(f"Неподдерживаемый формат файла погоды: {extension}")
+        return cls.from_records(records, step_duration, start, **kwargs)
+
+    def to_records(self) -> List[dict]:
+        """
+        Возвращает точки ряда в виде записей с номерами шагов (см. from_records).
+        """
+        return [
+            {'step': float(step), 'wind_direction': wind_direction.name, 'wind_speed': float(wind_speed),
+             'humidity': float(humidity), 'temperature': float(temperature)}
+            for step, wind_direction, wind_speed, humidity, temperature in zip(
+                self.steps, self.wind_directions, self.wind_speeds, self.humidities, self.temperatures)
+        ]
+
+    def at(self, step: float) -> Tuple[WindDirection, float, float, float]:
+        """
+        Возвращает погоду на шаге step.
+
+        Returns:
+            tuple: (направление ветра, скорость ветра, влажность, температура).
+        """
+        index = max(int(np.searchsorted(self.steps, step, side='right')) - 1, 0)
+        if self.interpolate:
+            values = [np.interp(step, self.steps, series)
+                      for series in (self.wind_speeds, self.humidities, self.temperatures)]
+        else:
+            values = [series[index] for series in (self.wind_speeds, self.humidities, self.temperatures)]
+        wind_speed, humidity, temperature = (round(float(value), self.precision) for value in values)
+        return self.wind_directions[index], wind_speed, humidity, temperature
+
+
+def _parse_time(value) -> float:
+    """
+    Переводит момент времени (секунды или дату ISO 8601) в секунды.
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return datetime.fromisoformat(str(value)).timestamp()
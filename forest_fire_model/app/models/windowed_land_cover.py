@@ -0,0 +1,188 @@
+import hashlib
+import os
+import tempfile
+from typing import Optional, Tuple, Union
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+from .wind import WindDirection
+from .fuzzy_logic import FuzzyFireController
+from .vectorized_automaton import VectorizedForestFireAutomaton
+
+
+class WindowedLandCover:
+    """
+    Карта растительности, читаемая из GeoTIFF блоками по мере необходимости.
+
+    Декодированный канал хранится в файле, отображаемом в память (np.memmap),
+    вместе с картой уже прочитанных блоков. Обращение к еще не прочитанной
+    области требует предварительного вызова ensure(). Кэш сохраняется между
+    запусками и привязан к пути, размеру и времени изменения исходного файла.
+
+    Атрибуты:
+        data (np.memmap): Канал карты растительности (uint8).
+        profile (dict): Профиль rasterio исходного файла.
+        block_shape (tuple): Размер блока чтения (строки, столбцы).
+    """
+    def __init__(self, file_path: str, cache_dir: Optional[str] = None,
+                 block_shape: Optional[Tuple[int, int]] = None):
+        """
+        Args:
+            file_path (str): Путь к файлу с картой растительности (TIFF-формат).
+            cache_dir (str): Каталог кэша (по умолчанию - во временном каталоге системы).
+            block_shape (tuple): Размер блока чтения (по умолчанию - внутренние блоки файла).
+        """
+        self.file_path = file_path
+        self.src = rasterio.open(file_path)
+        self.profile = self.src.profile
+        self.height, self.width = self.src.height, self.src.width
+        self.block_shape = tuple(block_shape or self.src.block_shapes[0])
+
+        cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), 'forest_fire_cache')
+        os.makedirs(cache_dir, exist_ok=True)
+        stat = os.stat(file_path)
+        key = f"{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}:{self.block_shape}"
+        cache_name = hashlib.sha1(key.encode()).hexdigest()[:16]
+        self.cache_file = os.path.join(cache_dir, f"{cache_name}.landcover")
+        self.blocks_file = os.path.join(cache_dir, f"{cache_name}.blocks.npy")
+
+        blocks = (-(-self.height // self.block_shape[0]), -(-self.width // self.block_shape[1]))
+        if os.path.exists(self.cache_file) and os.path.exists(self.blocks_file):
+            self.loaded = np.load(self.blocks_file)
+            mode = 'r+'
+        else:
+            self.loaded = np.zeros(blocks, dtype=bool)
+            mode = 'w+'  # Файл создается разреженным: место на диске занимают только прочитанные блоки
+        self.data = np.memmap(self.cache_file, dtype=np.uint8, mode=mode, shape=(self.height, self.width))
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return (self.height, self.width)
+
+    def ensure(self, row_start: int, row_stop: int, col_start: int, col_stop: int) -> bool:
+        """
+        Читает блоки, пересекающие область [row_start, row_stop) x [col_start, col_stop),
+        если они еще не прочитаны.
+
+        Returns:
+            bool: True, если были прочитаны новые блоки.
+        """
+        block_h, block_w = self.block_shape
+        row_start, col_start = max(row_start, 0), max(col_start, 0)
+        row_stop, col_stop = min(row_stop, self.height), min(col_stop, self.width)
+        if row_start >= row_stop or col_start >= col_stop:
+            return False
+
+        rows = slice(row_start // block_h, (row_stop - 1) // block_h + 1)
+        cols = slice(col_start // block_w, (col_stop - 1) // block_w + 1)
+        missing = np.argwhere(~self.loaded[rows, cols])
+        if not missing.size:
+            return False
+
+        for block_row, block_col in missing + (rows.start, cols.start):
+            y0, x0 = block_row * block_h, block_col * block_w
+            window = Window(x0, y0, min(block_w, self.width - x0), min(block_h, self.height - y0))
+            block = self.src.read(1, window=window)
+            self.data[y0:y0 + window.height, x0:x0 + window.width] = np.clip(block, 0, 255)
+            self.loaded[block_row, block_col] = True
+
+        self.data.flush()
+        np.save(self.blocks_file, self.loaded)
+        return True
+
+    def index(self, x: float, y: float) -> Tuple[int, int]:
+        """
+        Переводит координаты карты (в системе координат растра) в номер строки и столбца.
+
+        Returns:
+            tuple: (строка, столбец).
+        """
+        t = self.src.transform
+        # Обратное аффинное преобразование x = a*col + b*row + c, y = d*col + e*row + f
+        det = t.a * t.e - t.b * t.d
+        col = (t.e * (x - t.c) - t.b * (y - t.f)) / det
+        row = (t.a * (y - t.f) - t.d * (x - t.c)) / det
+        return int(np.floor(row)), int(np.floor(col))
+
+    def close(self):
+        """
+        Закрывает исходный файл.
+        """
+        self.src.close()
+
+
+class WindowedForestFireAutomaton(VectorizedForestFireAutomaton):
+    """
+    Векторизованный автомат для карт, не помещающихся в память.
+
+    Карта растительности подгружается блоками WindowedLandCover в пределах
+    ограничивающего прямоугольника фронта пожара с запасом margin, который
+    расширяется вместе с фронтом. Массивы состояний создаются лениво
+    (см. CellGrid), поэтому запуск не требует чтения всей карты.
+    """
+    def __init__(self, land_cover: Union[str, WindowedLandCover],
+                 fuzzy_controller: FuzzyFireController,
+                 wind_direction: WindDirection = WindDirection.N,
+                 wind_speed: float = 0.0,
+                 humidity: float = 50.0,
+                 temperature: float = 15.0,
+                 seed=None,
+                 margin: int = 2,
+                 cache_dir: Optional[str] = None):
+        """
+        Args:
+            land_cover (str | WindowedLandCover): Путь к файлу карты или уже открытая карта.
+            wind_direction, wind_speed, humidity, temperature: Параметры погоды.
+            seed: Зерно генератора случайных чисел (по умолчанию None).
+            margin (int): Запас вокруг фронта, в пределах которого карта должна быть прочитана
+                (не меньше 1 - соседи горящих клеток).
+            cache_dir (str): Каталог кэша WindowedLandCover.
+        """
+        if not isinstance(land_cover, WindowedLandCover):
+            land_cover = WindowedLandCover(land_cover, cache_dir)
+        self.windowed_land_cover = land_cover
+        self.margin = max(margin, 1)
+        super().__init__(land_cover.data, fuzzy_controller, wind_direction, wind_speed,
+                         humidity, temperature, seed=seed, track_front=True)
+        # Контрольные точки ссылаются на исходный файл, а не на кэш
+        self.land_cover_file = os.path.abspath(land_cover.file_path)
+
+    def ignite(self, x: int, y: int, fire_duration: int = 0):
+        """
+        Поджигает клетку с заданными координатами, подгружая карту вокруг нее.
+        """
+        self.windowed_land_cover.ensure(y - self.margin, y + self.margin + 1,
+                                        x - self.margin, x + self.margin + 1)
+        super().ignite(x, y, fire_duration)
+
+    def ignite_at(self, map_x: float, map_y: float, fire_duration: int = 0) -> Tuple[int, int]:
+        """
+        Поджигает клетку, заданную координатами карты.
+
+        Args:
+            map_x (float): Координата X (долгота или восточная координата).
+            map_y (float): Координата Y (широта или северная координата).
+            fire_duration (int): Начальное значение счетчика горения (по умолчанию 0).
+
+        Returns:
+            tuple: Координаты клетки (x, y) на сетке.
+        """
+        row, col = self.windowed_land_cover.index(map_x, map_y)
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise IndexError("Точка возгорания вне карты")
+        self.ignite(col, row, fire_duration)
+        return col, row
+
+    def _step(self):
+        """
+        Подгружает карту вокруг фронта и обновляет состояние клеток.
+        """
+        with self.metrics.phase('load_blocks'):
+            self._merge_pending_cells()
+            cells = self.burning_cells
+            if cells.size:
+                rows, cols = np.divmod(cells, self.width)
+                self.windowed_land_cover.ensure(rows.min() - self.margin, rows.max() + self.margin + 1,
+                                                cols.min() - self.margin, cols.max() + self.margin + 1)
+        super()._step()
@@ -1,9 +1,23 @@
-from app.models.animated_forest_fire import AnimatedForestFire
+# matplotlib и rasterio импортируются только в режимах, которые их используют;
+# нечеткий контроллер загружается скомпилированным из кэша на диске (без skfuzzy)
+from app.models.forest_fire_automaton import INITIAL_FIRE_DURATION
+from app.models.vectorized_automaton import VectorizedForestFireAutomaton
+from app.models.video_renderer import VideoRenderer
 from app.models.wind import WindDirection
 from app.models.cell import CellState
-import matplotlib.animation as animation
-from app.models.fuzzy_logic import FuzzyFireController
+from app.models.fuzzy_logic import load_compiled_controller
+from app.models.ensemble import run_ensemble, write_geotiff
+from app.models.scenarios import ScenarioRunner, load_scenarios
+from app.models.arrival_times import ArrivalTimeRecorder, ArrivalTimes
+from app.models.preview import run_preview
+from app.models.backends import BACKENDS, check_conformance
+from app.models.service import SimulationService
+from app.models.benchmark import (DEFAULT_SIZES, run_benchmarks, save_results, load_results, synthetic_land_cover,
+                                  compare_results, print_comparison)
+import argparse
+import asyncio
 import os
+import sys
 
 def parse_wind_direction(direction_str):
     try:
@@ -14,7 +28,7 @@ def parse_wind_direction(direction_str):
 
 def run_simulation():
     print("Инициализация нечеткого контроллера")
-    fuzzy = FuzzyFireController()
+    fuzzy = load_compiled_controller()
     print("Инициализация нечеткого контроллера завершена")
     
     input_dir = "data/input"
@@ -28,9 +42,17 @@ def run_simulation():
             break
         land_cover_file = os.path.join(input_dir, land_cover_filename)
 
-        output_filename = input("Имя выходного видеофайла: ").strip()
+        output_filename = input("Имя выходного файла (видео, каталог кадров или шаги переходов .npz/.tif): ").strip()
         output_file = os.path.join(output_dir, output_filename)
 
+        dem_filename = input("Имя файла рельефа (Enter - без рельефа): ").strip()
+
+        render_modes = ['matplotlib', 'frames', 'ffmpeg', 'arrival']
+        render_mode = input(f"Режим вывода ({'/'.join(render_modes)}): ").strip().lower() or 'matplotlib'
+        if render_mode not in render_modes:
+            print(f"Неверный режим вывода: {render_mode}. Используются значения: {render_modes}")
+            continue
+
         try:
             frames = int(input("Количество кадров: "))
             temperature = float(input("Температура: "))
@@ -43,12 +65,18 @@ def run_simulation():
 
             ignition_x = int(input("X координата начального возгорания: "))
             ignition_y = int(input("Y координата начального возгорания: "))
+            scale = int(input("Масштаб кадра: ")) if render_mode == 'ffmpeg' else 1
         except ValueError:
             print("Ошибка ввода. Пожалуйста, убедитесь, что числа введены корректно.")
             continue
 
         # Инициализация модели
-        automaton = AnimatedForestFire(
+        if render_mode in ('matplotlib', 'frames'):
+            from app.models.animated_forest_fire import AnimatedForestFire
+            automaton_class = AnimatedForestFire
+        else:
+            automaton_class = VectorizedForestFireAutomaton
+        automaton = automaton_class(
             land_cover_file=land_cover_file,
             fuzzy_controller=fuzzy,
             wind_direction=wind_direction,
@@ -56,16 +84,44 @@ def run_simulation():
             humidity=humidity,
             temperature=temperature
         )
+        if dem_filename:
+            automaton.load_terrain(os.path.join(input_dir, dem_filename))
 
         # Установка точки возгорания
         try:
             automaton.grid[ignition_y][ignition_x].state = CellState.IGNITION
-            automaton.grid[ignition_y][ignition_x].fire_duration =  -3
+            automaton.grid[ignition_y][ignition_x].fire_duration = INITIAL_FIRE_DURATION
         except IndexError:
             print("Неверные координаты возгорания. Попробуйте снова.")
             continue
 
+        if render_mode == 'arrival':
+            # Вместо кадров сохраняются шаги переходов клеток; кадры восстанавливаются командой frame
+            print(f"Моделирование... Сохраняется в {output_file}")
+            ArrivalTimeRecorder(automaton).run(frames).save(output_file)
+            print("Сценарий завершён и сохранён.\n")
+            continue
+
+        if render_mode == 'ffmpeg':
+            # Кадры передаются в ffmpeg напрямую, без matplotlib; отрисовка и
+            # кодирование идут в фоновых потоках параллельно с моделированием
+            print(f"Моделирование... Сохраняется в {output_file}")
+            VideoRenderer(automaton, output_file, fps=5, scale=scale, pipelined=True).render(frames)
+            print("Сценарий завершён и сохранён.\n")
+            continue
+
+        if render_mode == 'frames':
+            # Кадры PNG без видео: отрисовка и запись файлов в фоновых потоках
+            automaton.output_dir = output_file
+            os.makedirs(output_file, exist_ok=True)
+            print(f"Моделирование... Кадры сохраняются в {output_file}")
+            automaton.save_frames(frames)
+            print("Сценарий завершён и сохранён.\n")
+            continue
+
         # Настройка записи видео
+        import matplotlib.animation as animation
+
         Writer = animation.writers['ffmpeg']
         writer = Writer(
             fps=5,
@@ -80,5 +136,248 @@ def run_simulation():
         automaton.animation.event_source.stop()
         print("Сценарий завершён и сохранён.\n")
 
+def run_ensemble_mode(args):
+    wind_direction = parse_wind_direction(args.wind_direction)
+    if wind_direction is None:
+        return
+
+    print("Инициализация нечеткого контроллера")
+    fuzzy = load_compiled_controller()
+    print("Инициализация нечеткого контроллера завершена")
+
+    print(f"Ансамбль из {args.runs} прогонов...")
+    result = run_ensemble(
+        land_cover_file=args.land_cover,
+        fuzzy_controller=fuzzy,
+        runs=args.runs,
+        ignition_points=[tuple(point) for point in args.ignition],
+        steps=args.steps,
+        wind_direction=wind_direction,
+        wind_speed=args.wind_speed,
+        humidity=args.humidity,
+        temperature=args.temperature,
+        seed=args.seed,
+        workers=args.workers,
+        batch_size=args.batch_size
+    )
+    result.save(args.burn_probability, args.arrival_time)
+    print(f"Растры сохранены: {args.burn_probability}, {args.arrival_time}")
+
+def run_preview_mode(args):
+    wind_direction = parse_wind_direction(args.wind_direction)
+    if wind_direction is None:
+        return
+
+    print("Инициализация нечеткого контроллера")
+    fuzzy = load_compiled_controller()
+    print("Инициализация нечеткого контроллера завершена")
+
+    result = run_preview(
+        land_cover=args.land_cover,
+        fuzzy_controller=fuzzy,
+        ignition_points=[tuple(point) for point in args.ignition],
+        steps=args.steps,
+        factor=args.factor,
+        margin=args.margin,
+        wind_direction=wind_direction,
+        wind_speed=args.wind_speed,
+        humidity=args.humidity,
+        temperature=args.temperature,
+        seed=args.seed,
+        fine=not args.coarse_only
+    )
+    if result.window is None:
+        print("Грубый прогон: пожар не распространился")
+    else:
+        print(f"Окно точного прогона (строки, столбцы): {result.window}")
+    if result.clipped:
+        print("Внимание: пожар дошел до границы окна, увеличьте --margin")
+
+    import rasterio
+
+    with rasterio.open(args.land_cover) as src:
+        profile = src.profile
+    write_geotiff(args.output, result.footprint(), profile)
+    print(f"Область пожара сохранена: {args.output}")
+
+def run_batch_mode(args):
+    scenarios = load_scenarios(args.scenarios)
+
+    print("Инициализация нечеткого контроллера")
+    fuzzy = load_compiled_controller()
+    print("Инициализация нечеткого контроллера завершена")
+
+    print(f"Выполнение сценариев: {len(scenarios)}")
+    ScenarioRunner(fuzzy, workers=args.workers).run(scenarios)
+
+def run_serve_mode(args):
+    print("Инициализация нечеткого контроллера")
+    fuzzy = load_compiled_controller()
+    print("Инициализация нечеткого контроллера завершена")
+
+    service = SimulationService(fuzzy, workers=args.workers, cache_size=args.cache_size,
+                                base_dir=args.base_dir, progress_interval=args.progress_interval)
+
+    async def serve():
+        await service.start(args.host, args.port, args.unix_socket)
+        print(f"Служба моделирования запущена: {service.address}")
+        try:
+            await service.serve_forever()
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("Служба остановлена")
+
+def run_frame_mode(args):
+    import matplotlib.pyplot as plt
+    import rasterio
+
+    arrival_times = ArrivalTimes.load(args.arrival)
+    land_type = None
+    if args.land_cover:
+        with rasterio.open(args.land_cover) as src:
+            land_type = src.read(1)
+    image = arrival_times.frame(args.step, land_type, scale=args.scale)
+    plt.imsave(args.output, image)
+    print(f"Кадр {args.step} сохранён: {args.output}")
+
+def run_conformance_mode(args):
+    print("Инициализация нечеткого контроллера")
+    fuzzy = load_compiled_controller()
+    print("Инициализация нечеткого контроллера завершена")
+
+    land_cover = synthetic_land_cover(args.size, args.seed)
+    height_map, cell_size = None, 1.0
+    if args.dem:
+        from app.models.terrain import load_dem
+        height_map, cell_size = load_dem(args.dem, shape=land_cover.shape)
+    results = check_conformance(land_cover, fuzzy, steps=args.steps, seed=args.seed,
+                                backends=args.backends, height_map=height_map,
+                                cell_size=args.cell_size or cell_size)
+    for name, matches in results.items():
+        status = "недоступна" if matches is None else ("совпадает" if matches else "РАСХОДИТСЯ")
+        print(f"{name}: {status}")
+    if any(matches is False for matches in results.values()):
+        sys.exit(1)
+
+def run_benchmark_mode(args):
+    results = run_benchmarks(sizes=args.sizes, steps=args.steps, frames=args.frames,
+                             cold_start=not args.no_cold_start)
+    save_results(results, args.output)
+    print(f"Результаты сохранены: {args.output}")
+
+    if args.baseline:
+        regressions = print_comparison(compare_results(load_results(args.baseline), results, args.threshold))
+        if regressions:
+            sys.exit(1)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Моделирование лесного пожара")
+    subparsers = parser.add_subparsers(dest='mode')
+
+    ensemble = subparsers.add_parser('ensemble', help="Ансамбль стохастических прогонов одного сценария")
+    ensemble.add_argument('--land-cover', required=True, help="Файл карты растительности (GeoTIFF)")
+    ensemble.add_argument('--runs', type=int, default=100, help="Количество прогонов")
+    ensemble.add_argument('--steps', type=int, default=100, help="Количество шагов в прогоне")
+    ensemble.add_argument('--ignition', type=int, nargs=2, action='append', required=True,
+                          metavar=('X', 'Y'), help="Точка начального возгорания (можно несколько)")
+    ensemble.add_argument('--wind-direction', default='N', help="Направление ветра")
+    ensemble.add_argument('--wind-speed', type=float, default=0.0, help="Скорость ветра")
+    ensemble.add_argument('--humidity', type=float, default=50.0, help="Влажность")
+    ensemble.add_argument('--temperature', type=float, default=15.0, help="Температура")
+    ensemble.add_argument('--seed', type=int, default=None, help="Зерно ансамбля")
+    ensemble.add_argument('--workers', type=int, default=None, help="Количество процессов")
+    ensemble.add_argument('--batch-size', type=int, default=1,
+                          help="Количество прогонов, моделируемых одной стопкой в процессе")
+    ensemble.add_argument('--burn-probability', default='data/output/burn_probability.tif',
+                          help="Выходной растр вероятности загорания")
+    ensemble.add_argument('--arrival-time', default='data/output/arrival_time.tif',
+                          help="Выходной растр среднего шага загорания")
+
+    preview = subparsers.add_parser('preview', help="Быстрая оценка области пожара: грубый прогон и точный в окне")
+    preview.add_argument('--land-cover', required=True, help="Файл карты растительности (GeoTIFF)")
+    preview.add_argument('--steps', type=int, default=100, help="Количество шагов точного прогона")
+    preview.add_argument('--ignition', type=int, nargs=2, action='append', required=True,
+                         metavar=('X', 'Y'), help="Точка начального возгорания (можно несколько)")
+    preview.add_argument('--factor', type=int, default=4, help="Коэффициент уменьшения карты грубого прогона")
+    preview.add_argument('--margin', type=int, default=None,
+                         help="Запас вокруг области грубого прогона в клетках (по умолчанию 2 * factor)")
+    preview.add_argument('--coarse-only', action='store_true', help="Выполнить только грубый прогон")
+    preview.add_argument('--wind-direction', default='N', help="Направление ветра")
+    preview.add_argument('--wind-speed', type=float, default=0.0, help="Скорость ветра")
+    preview.add_argument('--humidity', type=float, default=50.0, help="Влажность")
+    preview.add_argument('--temperature', type=float, default=15.0, help="Температура")
+    preview.add_argument('--seed', type=int, default=None, help="Зерно генератора")
+    preview.add_argument('--output', default='data/output/preview.tif',
+                         help="Выходной растр области пожара (1 - затронута)")
+
+    batch = subparsers.add_parser('batch', help="Пакетное выполнение сценариев из файла")
+    batch.add_argument('scenarios', help="Файл сценариев (JSON, YAML или CSV)")
+    batch.add_argument('--workers', type=int, default=1,
+                       help="Количество одновременно выполняемых сценариев")
+
+    serve = subparsers.add_parser('serve', help="Локальная служба моделирования (JSON Lines через TCP или сокет Unix)")
+    serve.add_argument('--host', default='127.0.0.1', help="Адрес TCP")
+    serve.add_argument('--port', type=int, default=8765, help="Порт TCP")
+    serve.add_argument('--unix-socket', default=None, help="Путь к сокету Unix вместо TCP")
+    serve.add_argument('--workers', type=int, default=None, help="Количество процессов")
+    serve.add_argument('--cache-size', type=int, default=8,
+                       help="Количество карт растительности в кэше каждого процесса")
+    serve.add_argument('--base-dir', default='.', help="Каталог для относительных путей сценариев")
+    serve.add_argument('--progress-interval', type=int, default=1,
+                       help="Интервал шагов между сообщениями о ходе выполнения")
+
+    frame = subparsers.add_parser('frame', help="Восстановление кадра по файлу шагов переходов")
+    frame.add_argument('arrival', help="Файл шагов переходов (NPZ или GeoTIFF)")
+    frame.add_argument('--step', type=int, required=True, help="Номер шага")
+    frame.add_argument('--output', required=True, help="Выходное изображение (PNG)")
+    frame.add_argument('--land-cover', default=None,
+                       help="Файл карты растительности (нужен для GeoTIFF)")
+    frame.add_argument('--scale', type=int, default=1, help="Масштаб кадра")
+
+    conformance = subparsers.add_parser('conformance', help="Проверка совпадения реализаций шага автомата")
+    conformance.add_argument('--backends', nargs='+', choices=list(BACKENDS), default=None,
+                             help="Проверяемые реализации (первая - эталон; по умолчанию все)")
+    conformance.add_argument('--size', type=int, default=64, help="Размер стороны синтетической карты")
+    conformance.add_argument('--steps', type=int, default=30, help="Количество шагов")
+    conformance.add_argument('--seed', type=int, default=0, help="Зерно карты и генератора")
+    conformance.add_argument('--dem', default=None,
+                             help="Файл рельефа (TIFF) размера --size x --size (по умолчанию без рельефа)")
+    conformance.add_argument('--cell-size', type=float, default=None,
+                             help="Размер клетки рельефа в метрах (по умолчанию - по растру)")
+
+    benchmark = subparsers.add_parser('benchmark', help="Замеры производительности на синтетических картах")
+    benchmark.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                           help="Размеры сторон синтетических карт")
+    benchmark.add_argument('--steps', type=int, default=20, help="Количество шагов автомата")
+    benchmark.add_argument('--frames', type=int, default=10, help="Количество кадров отрисовки")
+    benchmark.add_argument('--output', default='data/output/benchmark.json', help="Файл результатов (JSON)")
+    benchmark.add_argument('--baseline', default=None,
+                           help="Эталонные результаты (JSON): при ухудшении код выхода 1")
+    benchmark.add_argument('--threshold', type=float, default=0.1,
+                           help="Допустимое относительное ухудшение метрики")
+    benchmark.add_argument('--no-cold-start', action='store_true', help="Не измерять холодный старт")
+
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    run_simulation()
\ No newline at end of file
+    args = parse_args()
+    if args.mode == 'ensemble':
+        run_ensemble_mode(args)
+    elif args.mode == 'preview':
+        run_preview_mode(args)
+    elif args.mode == 'batch':
+        run_batch_mode(args)
+    elif args.mode == 'serve':
+        run_serve_mode(args)
+    elif args.mode == 'frame':
+        run_frame_mode(args)
+    elif args.mode == 'conformance':
+        run_conformance_mode(args)
+    elif args.mode == 'benchmark':
+        run_benchmark_mode(args)
+    else:
+        run_simulation()
\ No newline at end of file
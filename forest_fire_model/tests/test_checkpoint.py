@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from app.models.benchmark import synthetic_land_cover
+from app.models.forest_fire_automaton import ForestFireAutomaton
+from app.models.fuzzy_logic import load_compiled_controller
+from app.models.vectorized_automaton import VectorizedForestFireAutomaton
+from app.models.weather import WeatherSchedule
+from app.models.wind import WindDirection
+
+ENGINES = [ForestFireAutomaton, VectorizedForestFireAutomaton]
+
+
+@pytest.fixture(scope='module')
+def controller():
+    return load_compiled_controller()
+
+
+def slope(shape) -> np.ndarray:
+    """
+    Склон, поднимающийся на восток.
+    """
+    return np.broadcast_to(np.arange(shape[1], dtype=np.float64) * 0.8, shape).copy()
+
+
+def assert_same_run(original, restored, steps):
+    for _ in range(steps):
+        original.update()
+        restored.update()
+    assert np.array_equal(original.state, restored.state)
+    assert np.array_equal(original.fire_duration, restored.fire_duration)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_checkpoint_restores_terrain(controller, tmp_path, engine):
+    land_cover = synthetic_land_cover(48)
+    automaton = engine(land_cover, controller, wind_speed=3.0, humidity=20.0, temperature=30.0, seed=5)
+    automaton.set_height_map(slope(land_cover.shape), (2.0, 1.5))
+    for y in range(22, 27):
+        for x in range(22, 27):
+            automaton.ignite(x, y, 1)
+    for _ in range(5):
+        automaton.update()
+
+    path = tmp_path / 'checkpoint.npz'
+    automaton.save_checkpoint(str(path))
+    restored = engine.load_checkpoint(str(path), controller)
+
+    assert np.array_equal(restored.height_map, automaton.height_map)
+    assert restored.cell_size == (2.0, 1.5)
+    assert np.array_equal(restored.slope_weights, automaton.slope_weights)
+    assert_same_run(automaton, restored, 15)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_checkpoint_restores_weather_schedule(controller, tmp_path, engine):
+    land_cover = synthetic_land_cover(48)
+    schedule = WeatherSchedule([0, 8, 16], [WindDirection.N, WindDirection.E, WindDirection.SW],
+                               [2.0, 9.0, 4.0], [30.0, 15.0, 40.0], [25.0, 35.0, 20.0], interpolate=False)
+    automaton = engine(land_cover, controller, seed=3)
+    automaton.set_weather_schedule(schedule)
+    automaton.ignite(24, 24, 1)
+    for _ in range(6):
+        automaton.update()
+
+    path = tmp_path / 'checkpoint.npz'
+    automaton.save_checkpoint(str(path))
+    restored = engine.load_checkpoint(str(path), controller)
+
+    assert restored.weather_schedule.to_records() == schedule.to_records()
+    assert restored.weather_schedule.interpolate is False
+    assert_same_run(automaton, restored, 15)
+    assert restored.weather == automaton.weather == schedule.at(automaton.step_count - 1)
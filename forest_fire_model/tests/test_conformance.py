@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from app.models.backends import check_conformance
+from app.models.cell import CellState
+from app.models.benchmark import synthetic_land_cover
+from app.models.fuzzy_logic import load_compiled_controller
+from app.models.vectorized_automaton import VectorizedForestFireAutomaton
+from app.models.wind import WindDirection
+
+SIZE = 32
+STEPS = 20
+
+
+@pytest.fixture(scope='module')
+def controller():
+    return load_compiled_controller()
+
+
+@pytest.fixture(scope='module')
+def land_cover():
+    return synthetic_land_cover(SIZE)
+
+
+def hills(size: int) -> np.ndarray:
+    """
+    Плавный рельеф с крутыми спусками, на которых взвешенное число горящих
+    соседей округляется до 0.
+    """
+    y, x = np.mgrid[0:size, 0:size]
+    return 6.0 * (np.sin(x / 3.0) + np.cos(y / 4.0))
+
+
+@pytest.mark.parametrize('wind_direction', [WindDirection.N, WindDirection.SE, WindDirection.W])
+@pytest.mark.parametrize('terrain', [False, True], ids=['flat', 'terrain'])
+def test_backends_match_reference(controller, land_cover, wind_direction, terrain):
+    height_map = hills(SIZE) if terrain else None
+    results = check_conformance(land_cover, controller, steps=STEPS, height_map=height_map,
+                                wind_direction=wind_direction, humidity=10.0, temperature=35.0)
+    assert results['reference'] is True
+    mismatches = [name for name, matches in results.items() if matches is False]
+    assert not mismatches
+
+
+# Изменения через grid[y][x]: негоревшая клетка, клетки в фронте пожара и горящая клетка вдали от него
+GRID_EDITS = [(3, 2, 2, CellState.ASH), (4, SIZE // 2, SIZE // 2, CellState.FOREST),
+              (4, SIZE // 2 + 1, SIZE // 2, CellState.ASH), (5, 26, 5, CellState.FIRE)]
+
+
+def test_grid_edits_match_reference(controller, land_cover):
+    results = check_conformance(land_cover, controller, steps=STEPS, grid_edits=GRID_EDITS,
+                                humidity=10.0, temperature=35.0)
+    assert not [name for name, matches in results.items() if matches is False]
+
+
+def test_grid_edits_front_matches_full_grid(controller, land_cover):
+    automata = [VectorizedForestFireAutomaton(land_cover, controller, humidity=10.0, temperature=35.0,
+                                              seed=0, track_front=track_front)
+                for track_front in (True, False)]
+    for automaton in automata:
+        automaton.ignite(SIZE // 2, SIZE // 2, 1)
+        for step in range(STEPS):
+            for edit_step, x, y, cell_state in GRID_EDITS:
+                if edit_step == step:
+                    automaton.grid[y][x].state = cell_state
+            automaton.update()
+    front, full = automata
+    assert np.array_equal(front.state, full.state)
+    assert np.array_equal(front.fire_duration, full.fire_duration)
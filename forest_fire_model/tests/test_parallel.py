@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from app.models.benchmark import synthetic_land_cover
+from app.models.fuzzy_logic import load_compiled_controller
+from app.models.parallel_automaton import ParallelForestFireAutomaton
+from app.models.vectorized_automaton import VectorizedForestFireAutomaton
+
+SIZE = 40
+
+
+@pytest.fixture(scope='module')
+def controller():
+    return load_compiled_controller()
+
+
+@pytest.fixture(scope='module')
+def land_cover():
+    return synthetic_land_cover(SIZE)
+
+
+def hills(size: int) -> np.ndarray:
+    y, x = np.mgrid[0:size, 0:size]
+    return 6.0 * (np.sin(x / 3.0) + np.cos(y / 4.0))
+
+
+def start(engine, land_cover, controller, **kwargs):
+    automaton = engine(land_cover, controller, wind_speed=4.0, humidity=15.0, temperature=30.0,
+                       seed=2, **kwargs)
+    automaton.ignite(SIZE // 2, SIZE // 2, 1)
+    return automaton
+
+
+def run(automaton, steps):
+    for _ in range(steps):
+        automaton.update()
+
+
+def test_terrain_matches_vectorized(controller, land_cover):
+    expected = start(VectorizedForestFireAutomaton, land_cover, controller)
+    expected.set_height_map(hills(SIZE), 2.0)
+    run(expected, 20)
+    with start(ParallelForestFireAutomaton, land_cover, controller, tiles=3) as automaton:
+        # Замена рельефа передается исполнителям
+        automaton.set_height_map(np.zeros((SIZE, SIZE)))
+        automaton.set_height_map(hills(SIZE), 2.0)
+        run(automaton, 20)
+        assert np.array_equal(automaton.state, expected.state)
+        assert np.array_equal(automaton.fire_duration, expected.fire_duration)
+
+        # Без рельефа исполнители возвращаются к таблице вероятностей
+        automaton.set_height_map(None)
+        expected.set_height_map(None)
+        run(automaton, 5)
+        run(expected, 5)
+        assert np.array_equal(automaton.state, expected.state)
+
+
+def test_fork_continues_independently(controller, land_cover):
+    with start(ParallelForestFireAutomaton, land_cover, controller, tiles=2) as automaton:
+        automaton.set_height_map(hills(SIZE))
+        run(automaton, 8)
+        with automaton.fork(wind_speed=9.0) as branch:
+            expected = start(VectorizedForestFireAutomaton, land_cover, controller)
+            expected.set_height_map(hills(SIZE))
+            run(expected, 8)
+            expected_branch = expected.fork(wind_speed=9.0)
+
+            run(branch, 10)
+            run(expected_branch, 10)
+            assert branch.step_count == expected_branch.step_count
+            assert np.array_equal(branch.state, expected_branch.state)
+            # Исходный автомат не изменился ветвью
+            assert np.array_equal(automaton.state, expected.state)
@@ -0,0 +1,70 @@
+import asyncio
+import csv
+import io
+import os
+
+import pytest
+
+from app.models.fuzzy_logic import load_compiled_controller
+from app.models.service import ServiceClient, SimulationService
+
+MAP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'input', 'map.tif')
+
+
+@pytest.fixture(scope='module')
+def controller():
+    return load_compiled_controller()
+
+
+async def session(controller, base_dir, scenario):
+    service = SimulationService(controller, workers=1, base_dir=str(base_dir), progress_interval=2)
+    await service.start(port=0)
+    client = await ServiceClient.connect(*service.address[:2])
+    try:
+        ping = await client.call('ping')
+        job = await client.submit(scenario)
+        events = [event async for event in client.watch(job)]
+        stats = await client.fetch(job, 'stats_output')
+        with pytest.raises(RuntimeError, match='output'):
+            await client.fetch(job, 'output')
+        return ping, events, stats
+    finally:
+        await client.close()
+        await service.close()
+
+
+def test_submit_watch_fetch(controller, tmp_path, capfd):
+    scenario = {'name': 'local', 'land_cover_file': MAP_FILE, 'ignition_points': [[130, 65]],
+                'frames': 6, 'humidity': 20, 'temperature': 30, 'seed': 1,
+                'stats_output': 'stats.csv'}
+    ping, events, stats = asyncio.run(session(controller, tmp_path, scenario))
+
+    assert ping == {'pong': True, 'workers': 1}
+    kinds = [event['event'] for event in events]
+    assert kinds[0] == 'started' and kinds[-1] == 'done'
+    assert [event['step'] for event in events if event['event'] == 'progress'] == [2, 4, 6]
+    result = events[-1]['result']
+    assert result['name'] == 'local' and result['steps'] == 6 and result['seconds'] > 0
+
+    rows = list(csv.DictReader(io.StringIO(stats.decode())))
+    assert [int(row['step']) for row in rows] == list(range(7))
+    assert stats == (tmp_path / 'stats.csv').read_bytes()
+
+    # Процессы пула не печатают в stdout службы
+    assert 'завершён' not in capfd.readouterr().out
+
+
+def test_invalid_scenario_is_rejected(controller, tmp_path):
+    async def submit_invalid():
+        service = SimulationService(controller, workers=1, base_dir=str(tmp_path))
+        await service.start(port=0)
+        client = await ServiceClient.connect(*service.address[:2])
+        try:
+            with pytest.raises(RuntimeError, match='точки возгорания'):
+                await client.submit({'land_cover_file': MAP_FILE})
+            return (await client.call('jobs'))['jobs']
+        finally:
+            await client.close()
+            await service.close()
+
+    assert asyncio.run(submit_invalid()) == []